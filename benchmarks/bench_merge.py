@@ -0,0 +1,94 @@
+"""
+Benchmark for xml_merge.
+
+Compares merge times of the previous xml_merge (a find() per child, and the merged document serialized for a debug
+message at every level whether DEBUG logging is on or not) against the current one (children indexed by tag once per
+level, debug messages only built when DEBUG logging is on), on EAD documents of increasing depth with repeated <c>
+components at each level. Logging is left at INFO, as in a normal run.
+
+Usage: python benchmarks/bench_merge.py [depth] [breadth] [repeats]
+"""
+
+import copy
+import logging
+import os
+import sys
+import time
+
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from preservica_modify.pres_modify import PreservicaMassMod, logger
+
+EAD_NS = "urn:isbn:1-931666-22-9"
+
+def make_ead(depth: int, breadth: int, label: str) -> etree._Element:
+    """
+    EAD document with breadth <c> components per level, nested depth levels deep.
+    """
+    def add_components(parent: etree._Element, level: int, path: str) -> None:
+        for i in range(breadth):
+            c = etree.SubElement(parent, f"{{{EAD_NS}}}c", level="file" if level == depth else "series")
+            did = etree.SubElement(c, f"{{{EAD_NS}}}did")
+            etree.SubElement(did, f"{{{EAD_NS}}}unitid").text = f"{path}/{i}"
+            etree.SubElement(did, f"{{{EAD_NS}}}unittitle").text = f"{label} title {path}/{i}"
+            etree.SubElement(did, f"{{{EAD_NS}}}unitdate").text = "1900-1950"
+            scope = etree.SubElement(c, f"{{{EAD_NS}}}scopecontent")
+            etree.SubElement(scope, f"{{{EAD_NS}}}p").text = f"{label} scope {path}/{i}"
+            if level < depth:
+                add_components(c, level + 1, f"{path}/{i}")
+    ead = etree.Element(f"{{{EAD_NS}}}ead", nsmap={None: EAD_NS})
+    archdesc = etree.SubElement(ead, f"{{{EAD_NS}}}archdesc", level="fonds")
+    did = etree.SubElement(archdesc, f"{{{EAD_NS}}}did")
+    etree.SubElement(did, f"{{{EAD_NS}}}unittitle").text = f"{label} fonds"
+    dsc = etree.SubElement(archdesc, f"{{{EAD_NS}}}dsc")
+    add_components(dsc, 1, "")
+    return ead
+
+def legacy_merge(mod: PreservicaMassMod, xml_a: etree._Element, xml_b: etree._Element, xnames: list) -> etree._Element:
+    """
+    xml_merge before the tag index, without its per-element debug messages, which cost little next to the serialization.
+    """
+    for b_child in xml_b.findall('./'):
+        a_child = xml_a.find('./' + b_child.tag)
+        if a_child is not None:
+            if b_child.text:
+                a_child.text = b_child.text
+            elif a_child.text is not None and mod.blank_override is True and b_child.tag in xnames:
+                a_child.text = None
+        else:
+            a_child = etree.SubElement(xml_a, b_child.tag)
+            a_child.text = b_child.text or None
+        if len(b_child) > 0:
+            legacy_merge(mod, a_child, b_child, xnames)
+    logger.debug(f'Merged XML: {etree.tostring(xml_a)}')
+    return xml_a
+
+def time_merge(merge, existing: etree._Element, new: etree._Element, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        xml_a = copy.deepcopy(existing)
+        start = time.perf_counter()
+        merge(xml_a, new)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    breadth = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    mod = PreservicaMassMod.__new__(PreservicaMassMod)
+    mod.blank_override = False
+    mod.xnames = []
+    print(f"{'Depth':>6}{'Elements':>10}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for depth in range(1, max_depth + 1):
+        existing = make_ead(depth, breadth, "old")
+        new = make_ead(depth, breadth, "new")
+        before = time_merge(lambda a, b: legacy_merge(mod, a, b, []), existing, new, repeats)
+        after = time_merge(lambda a, b: mod.xml_merge(a, b, xnames=[]), existing, new, repeats)
+        elements = sum(1 for _ in existing.iter())
+        print(f"{depth:>6}{elements:>10,}{before * 1000:>12.2f}{after * 1000:>12.2f}{before / after:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
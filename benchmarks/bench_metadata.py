@@ -0,0 +1,97 @@
+"""
+Benchmark for descriptive metadata generation.
+
+Compares rows/sec of the lxml generator (copy of the template per row, serialized with etree.tostring) against
+compiled templates, for each template shipped in preservica_modify/metadata, and checks the output is byte identical.
+Rows/sec are given for the whole of generate_descriptive_metadata, including the spreadsheet lookups, and for
+serialization alone, with each row's values gathered beforehand.
+
+Usage: python benchmarks/bench_metadata.py [rows] [exact|flat]
+"""
+
+import copy
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from preservica_modify.pres_modify import PreservicaMassMod
+
+METADATA_DIR = os.path.join(os.path.dirname(__file__), "..", "preservica_modify", "metadata")
+
+def make_instance(template: str, metadata_flag: str, rows: int, compiled: bool) -> PreservicaMassMod:
+    parsed = etree.parse(os.path.join(METADATA_DIR, template))
+    root_ln = etree.QName(parsed.getroot()).localname
+    headers = []
+    for elem in parsed.findall(".//"):
+        if not isinstance(elem.tag, str):
+            continue
+        qname = etree.QName(elem)
+        if metadata_flag == "flat":
+            headers.append(f"{root_ln}:{qname.localname}")
+        else:
+            headers.append(parsed.getelementpath(elem).replace(f"{{{qname.namespace}}}", root_ln + ":"))
+    headers = list(dict.fromkeys(headers))
+    df = pd.DataFrame({h: [(f"{h} value {i} & more" if i % 10 == 0 else f"{h} value {i}") if (i + n) % 3 else None for i in range(rows)] for n, h in enumerate(headers)})
+    mod = PreservicaMassMod.__new__(PreservicaMassMod)
+    mod.df = df
+    mod.column_headers = headers
+    mod.metadata_flag = metadata_flag
+    mod.compiled_metadata = compiled
+    mod.metadata_dir = METADATA_DIR
+    return mod
+
+def run(mod: PreservicaMassMod, template: str) -> tuple[float, list]:
+    xml_files = [f for f in mod.init_generate_descriptive_metadata() if os.path.basename(f["xml_file"]) == template]
+    ns = xml_files[0]["local_ns"]
+    output = []
+    start = time.perf_counter()
+    for idx in mod.df.index:
+        xml = mod.generate_descriptive_metadata(idx, xml_files)[0][ns]
+        output.append(xml if isinstance(xml, bytes) else etree.tostring(xml))
+    return len(mod.df) / (time.perf_counter() - start), output
+
+def run_serialize(mod: PreservicaMassMod, template: str) -> tuple[float, float]:
+    xml_file = [f for f in mod.init_generate_descriptive_metadata() if os.path.basename(f["xml_file"]) == template][0]
+    data, tree, compiled = xml_file["data"], xml_file["template"], xml_file["compiled"]
+    rows = [[mod._metadata_value(idx, d) for d in data] for idx in mod.df.index]
+    start = time.perf_counter()
+    for values in rows:
+        xml_new = copy.deepcopy(tree)
+        root = xml_new.getroot()
+        for d, value in zip(data, values):
+            if value is not None and d["Position"] is not None:
+                elem = root
+                for i in d["Position"]:
+                    elem = elem[i]
+                elem.text = str(value)
+        etree.tostring(xml_new)
+    lxml_rate = len(rows) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for values in rows:
+        compiled.render(values)
+    return lxml_rate, len(rows) / (time.perf_counter() - start)
+
+def main() -> None:
+    logging.basicConfig(level=logging.ERROR)
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    metadata_flag = sys.argv[2] if len(sys.argv) > 2 else "exact"
+    print(f"{'Template':<28}{'lxml rows/sec':>16}{'compiled rows/sec':>20}{'speedup':>10}")
+    for template in sorted(f for f in os.listdir(METADATA_DIR) if f.endswith(".xml")):
+        lxml_rate, lxml_out = run(make_instance(template, metadata_flag, rows, False), template)
+        compiled_rate, compiled_out = run(make_instance(template, metadata_flag, rows, True), template)
+        if lxml_out != compiled_out:
+            raise SystemExit(f"Output differs for {template}")
+        print(f"{template:<28}{lxml_rate:>16,.0f}{compiled_rate:>20,.0f}{compiled_rate / lxml_rate:>9.1f}x")
+    print("\nSerialization only")
+    print(f"{'Template':<28}{'lxml rows/sec':>16}{'compiled rows/sec':>20}{'speedup':>10}")
+    for template in sorted(f for f in os.listdir(METADATA_DIR) if f.endswith(".xml")):
+        lxml_rate, compiled_rate = run_serialize(make_instance(template, metadata_flag, rows, True), template)
+        print(f"{template:<28}{lxml_rate:>16,.0f}{compiled_rate:>20,.0f}{compiled_rate / lxml_rate:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
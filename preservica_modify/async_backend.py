@@ -0,0 +1,329 @@
+"""
+Asyncio Backend for Preservica Mass Modify
+
+Provides asynchronous versions of the pyPreservica EntityAPI and RetentionAPI calls used by Preservica Mass Modify,
+using aiohttp against the Preservica REST API. The classes expose the same method names as pyPreservica so the
+update methods in PreservicaMassMod can target either backend.
+
+Author: Christopher Prince
+license: Apache License 2.0"
+"""
+
+import asyncio
+import configparser
+import logging
+from typing import Optional, Any, Dict, List, Tuple, Union
+from lxml import etree
+from pyPreservica import Entity, EntityType, Asset, Folder, RetentionPolicy, RetentionAssignment
+from pyPreservica.common import HTTPException, ReferenceNotFoundException
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+IO_PATH = "information-objects"
+SO_PATH = "structural-objects"
+DEFAULT_XIP_NS = "http://preservica.com/XIP/v6.0"
+RM_NS = "http://preservica.com/RetentionManagement/v6.2"
+
+def credentials_from_file(credentials_file: str) -> Dict[str, Optional[str]]:
+    """
+    Reads username, password, server and tenant from a pyPreservica credentials.properties file.
+    """
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(credentials_file, encoding='utf-8')
+    section = config['credentials'] if 'credentials' in config else {}
+    return {'username': section.get('username'),
+            'password': section.get('password'),
+            'server': section.get('server'),
+            'tenant': section.get('tenant')}
+
+class AsyncPreservicaSession:
+    """
+    Authenticated aiohttp session for the Preservica REST API.
+
+    At most max_in_flight requests are sent at once, further requests wait for a free slot.
+    Use as an async context manager.
+    """
+    def __init__(self,
+                 server: str,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 tenant: Optional[str] = None,
+                 max_in_flight: int = 50,
+                 protocol: str = "https"):
+        if aiohttp is None:
+            logger.error("aiohttp package is not installed. Install with: pip install aiohttp")
+            raise RuntimeError("aiohttp package is not installed. Install with: pip install aiohttp")
+        self.server = server
+        self.username = username
+        self.password = password
+        self.tenant = tenant
+        self.max_in_flight = max_in_flight
+        self.protocol = protocol
+        self.xip_ns = DEFAULT_XIP_NS
+        self.token: Optional[str] = None
+        self._session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def base_url(self) -> str:
+        return f'{self.protocol}://{self.server}'
+
+    async def __aenter__(self) -> "AsyncPreservicaSession":
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._token_lock = asyncio.Lock()
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_in_flight))
+        await self.login()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def login(self) -> str:
+        data = {'username': str(self.username), 'password': str(self.password)}
+        if self.tenant:
+            data['tenant'] = str(self.tenant)
+        async with self._session.post(f'{self.base_url}/api/accesstoken/login', data=data) as response:
+            if response.status != 200:
+                message = await response.text()
+                logger.error(f'Failed to login to Preservica Server {self.server}: {response.status} {message}')
+                raise HTTPException(self.username, response.status, str(response.url), "login", message)
+            self.token = (await response.json())['token']
+        logger.info(f'Successfully logged into Preservica Server {self.server} (async backend), as user {self.username}')
+        return self.token
+
+    async def request(self, method: str, url: str, method_name: str, reference: Any = None,
+                      expected: Tuple[int, ...] = (200,), data: Optional[Union[str, bytes]] = None,
+                      content_type: Optional[str] = None, params: Optional[dict] = None) -> bytes:
+        """
+        Sends a single request, holding one of the max_in_flight slots until the response body is read.
+        Renews the token once on a 401 response.
+        """
+        for attempt in (1, 2):
+            token = self.token
+            headers = {'Preservica-Access-Token': str(token)}
+            if content_type is not None:
+                headers['Content-Type'] = content_type
+            async with self._semaphore:
+                async with self._session.request(method, url, headers=headers, data=data, params=params) as response:
+                    status = response.status
+                    body = await response.read()
+                    response_url = str(response.url)
+            if status == 401 and attempt == 1:
+                async with self._token_lock:
+                    if self.token == token:
+                        logger.debug('Token expired, requesting new token')
+                        await self.login()
+                continue
+            break
+        if status in expected:
+            return body
+        if status == 404:
+            exception = ReferenceNotFoundException(reference, status, response_url, method_name)
+        else:
+            exception = HTTPException(reference, status, response_url, method_name, body.decode('utf-8', errors='replace'))
+        logger.error(exception)
+        raise exception
+
+class AsyncEntityAPI:
+    """
+    Asynchronous counterpart of the pyPreservica EntityAPI calls used by Preservica Mass Modify.
+    """
+    def __init__(self, session: AsyncPreservicaSession):
+        self.session = session
+
+    def _url(self, ent: Entity, suffix: str = "") -> str:
+        return f'{self.session.base_url}/api/entity/{ent.path}/{ent.reference}{suffix}'
+
+    def _entity_from_xml(self, entity_type: EntityType, xml_data: bytes) -> Entity:
+        root = etree.fromstring(xml_data)
+        tag = "InformationObject" if entity_type == EntityType.ASSET else "StructuralObject"
+        obj = root.find(f'.//{{*}}{tag}')
+        if obj is None:
+            raise RuntimeError(f'Unexpected entity response, no {tag} element found')
+        self.session.xip_ns = etree.QName(obj).namespace or self.session.xip_ns
+
+        def _text(name: str) -> Optional[str]:
+            elem = obj.find(f'./{{*}}{name}')
+            return elem.text if elem is not None else None
+
+        metadata = {fragment.text: fragment.get('schema') for fragment in root.findall('.//{*}Metadata/{*}Fragment')}
+        cls = Asset if entity_type == EntityType.ASSET else Folder
+        ent = cls(_text('Ref'), _text('Title'), _text('Description'), _text('SecurityTag'), _text('Parent'), metadata)
+        custom_type = _text('CustomType')
+        if custom_type is not None:
+            ent.custom_type = custom_type
+        return ent
+
+    async def asset(self, reference: str) -> Entity:
+        body = await self.session.request('GET', f'{self.session.base_url}/api/entity/{IO_PATH}/{reference}', "asset", reference)
+        return self._entity_from_xml(EntityType.ASSET, body)
+
+    async def folder(self, reference: str) -> Entity:
+        body = await self.session.request('GET', f'{self.session.base_url}/api/entity/{SO_PATH}/{reference}', "folder", reference)
+        return self._entity_from_xml(EntityType.FOLDER, body)
+
+    async def entity(self, entity_type: EntityType, reference: str) -> Optional[Entity]:
+        if entity_type is EntityType.FOLDER:
+            return await self.folder(reference)
+        if entity_type is EntityType.ASSET:
+            return await self.asset(reference)
+        return None
+
+    async def save(self, ent: Entity) -> Entity:
+        xml_object = etree.Element(f'{{{self.session.xip_ns}}}{ent.tag}', nsmap={None: self.session.xip_ns})
+        for name, value in (("Ref", ent.reference), ("Title", ent.title), ("Description", ent.description), ("SecurityTag", ent.security_tag)):
+            etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}{name}').text = value
+        if ent.custom_type is not None:
+            etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}CustomType').text = ent.custom_type
+        if ent.parent is not None:
+            etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}Parent').text = ent.parent
+        await self.session.request('PUT', self._url(ent), "save", ent.reference,
+                                   data=etree.tostring(xml_object, encoding='utf-8'), content_type='application/xml;charset=UTF-8')
+        return ent
+
+    async def security_tag_async(self, ent: Entity, new_tag: str) -> str:
+        body = await self.session.request('PUT', self._url(ent, '/security-descriptor'), "security_tag_async", ent.reference,
+                                          expected=(202,), data=new_tag, content_type='text/plain',
+                                          params={'includeDescendants': 'false'})
+        return body.decode('utf-8')
+
+    async def _identifiers(self, ent: Entity) -> List[Dict[str, Optional[str]]]:
+        body = await self.session.request('GET', self._url(ent, '/identifiers'), "identifiers_for_entity", ent.reference)
+        identifiers = []
+        for identifier in etree.fromstring(body).findall('.//{*}Identifier'):
+            identifiers.append({etree.QName(child).localname: child.text for child in identifier})
+        # Kept on the entity with their ApiIds, so updating or deleting the identifiers read for a row does not read them again.
+        ent.api_identifiers = identifiers
+        return identifiers
+
+    async def _known_identifiers(self, ent: Entity) -> List[Dict[str, Optional[str]]]:
+        identifiers = getattr(ent, 'api_identifiers', None)
+        if identifiers is None:
+            identifiers = await self._identifiers(ent)
+        return identifiers
+
+    def _identifier_xml(self, ent: Entity, identifier_type: str, identifier_value: str) -> bytes:
+        xml_object = etree.Element(f'{{{self.session.xip_ns}}}Identifier', nsmap={None: self.session.xip_ns})
+        etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}Type').text = identifier_type
+        etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}Value').text = identifier_value
+        etree.SubElement(xml_object, f'{{{self.session.xip_ns}}}Entity').text = ent.reference
+        return etree.tostring(xml_object, encoding='utf-8')
+
+    async def identifiers_for_entity(self, ent: Entity) -> set:
+        return {(i.get('Type') or "", i.get('Value') or "") for i in await self._identifiers(ent)}
+
+    async def add_identifier(self, ent: Entity, identifier_type: str, identifier_value: str) -> None:
+        await self.session.request('POST', self._url(ent, '/identifiers'), "add_identifier", ent.reference,
+                                   data=self._identifier_xml(ent, identifier_type, identifier_value),
+                                   content_type='application/xml;charset=UTF-8')
+        ent.api_identifiers = None
+
+    async def update_identifiers(self, ent: Entity, identifier_type: str, identifier_value: str) -> None:
+        for identifier in await self._known_identifiers(ent):
+            if identifier.get('Type') == identifier_type:
+                await self.session.request('PUT', self._url(ent, f"/identifiers/{identifier.get('ApiId')}"), "update_identifiers",
+                                           ent.reference, expected=(200, 204),
+                                           data=self._identifier_xml(ent, identifier_type, identifier_value),
+                                           content_type='application/xml;charset=UTF-8')
+                identifier['Value'] = identifier_value
+                return
+
+    async def delete_identifiers(self, ent: Entity, identifier_type: str, identifier_value: str) -> None:
+        identifiers = await self._known_identifiers(ent)
+        for identifier in list(identifiers):
+            if identifier.get('Type') == identifier_type and identifier.get('Value') == identifier_value:
+                await self.session.request('DELETE', self._url(ent, f"/identifiers/{identifier.get('ApiId')}"), "delete_identifiers",
+                                           ent.reference, expected=(204,))
+                identifiers.remove(identifier)
+
+    async def metadata_for_entity(self, ent: Entity, schema: str) -> Optional[str]:
+        if ent.metadata is None:
+            ent = await self.entity(ent.entity_type, ent.reference)
+        for url, schema_name in ent.metadata.items():
+            if schema == schema_name:
+                body = await self.session.request('GET', url, "metadata", url)
+                content = etree.fromstring(body).find('.//{*}Content')
+                if content is None or len(content) == 0:
+                    return None
+                return etree.tostring(content[0], encoding='utf-8').decode('utf-8')
+        return None
+
+    def _metadata_container(self, ent: Entity, schema: str, data: str, mref: Optional[str] = None) -> bytes:
+        xip = self.session.xip_ns
+        xml_object = etree.Element(f'{{{xip}}}MetadataContainer', {"schemaUri": schema}, nsmap={'xip': xip})
+        if mref is not None:
+            etree.SubElement(xml_object, f'{{{xip}}}Ref').text = mref
+        etree.SubElement(xml_object, f'{{{xip}}}Entity').text = ent.reference
+        content = etree.SubElement(xml_object, f'{{{xip}}}Content')
+        content.append(etree.fromstring(data.encode('utf-8') if isinstance(data, str) else data))
+        return etree.tostring(xml_object, encoding='utf-8')
+
+    async def add_metadata(self, ent: Entity, schema: str, data: str) -> None:
+        await self.session.request('POST', self._url(ent, '/metadata'), "add_metadata", ent.reference,
+                                   data=self._metadata_container(ent, schema, data), content_type='application/xml;charset=UTF-8')
+
+    async def update_metadata(self, ent: Entity, schema: str, data: str) -> None:
+        if ent.metadata is None or schema not in ent.metadata.values():
+            raise RuntimeError("Only existing schema's can be updated.")
+        for url, schema_name in ent.metadata.items():
+            if schema == schema_name:
+                mref = url[url.rfind(f"{ent.reference}/metadata/") + len(f"{ent.reference}/metadata/"):]
+                await self.session.request('PUT', url, "update_metadata", ent.reference,
+                                           data=self._metadata_container(ent, schema, data, mref),
+                                           content_type='application/xml;charset=UTF-8')
+
+    async def move_async(self, entity: Entity, dest_folder: Optional[Folder]) -> str:
+        data = dest_folder.reference if dest_folder is not None else "@root@"
+        body = await self.session.request('PUT', self._url(entity, '/parent-ref'), "move_async", entity.reference,
+                                          expected=(202,), data=data, content_type='text/plain')
+        return body.decode('utf-8')
+
+class AsyncRetentionAPI:
+    """
+    Asynchronous counterpart of the pyPreservica RetentionAPI calls used by Preservica Mass Modify.
+    """
+    def __init__(self, session: AsyncPreservicaSession):
+        self.session = session
+
+    async def assignments(self, ent: Entity) -> List[RetentionAssignment]:
+        body = await self.session.request('GET', f'{self.session.base_url}/api/entity/{ent.path}/{ent.reference}/retention-assignments',
+                                          "assignments", ent.reference)
+        result = []
+        for assignment in etree.fromstring(body).findall('.//{*}RetentionAssignment'):
+            values = {etree.QName(child).localname: child.text for child in assignment}
+            retention_assignment = RetentionAssignment(values.get('Entity'), values.get('RetentionPolicy'), values.get('ApiId'),
+                                                       values.get('StartDate'), values.get('Expired') == 'true')
+            # RetentionAssignment does not hold the entity type, so remove_assignments needs the path of the entity it was read from.
+            retention_assignment.path = ent.path
+            result.append(retention_assignment)
+        return result
+
+    async def policy(self, reference: str) -> RetentionPolicy:
+        body = await self.session.request('GET', f'{self.session.base_url}/api/entity/retention-policies/{reference}', "policy", reference)
+        root = etree.fromstring(body)
+        name = root.find('.//{*}RetentionPolicy/{*}Name')
+        return RetentionPolicy(name.text if name is not None else None, reference)
+
+    async def add_assignments(self, ent: Entity, policy: RetentionPolicy) -> None:
+        if not isinstance(ent, Asset):
+            raise RuntimeError("Retention policies can only be assigned to Assets")
+        assignment = etree.Element(f'{{{RM_NS}}}RetentionAssignment', nsmap={None: RM_NS})
+        etree.SubElement(assignment, f'{{{RM_NS}}}RetentionPolicy').text = policy.reference
+        await self.session.request('POST', f'{self.session.base_url}/api/entity/{ent.path}/{ent.reference}/retention-assignments',
+                                   "add_assignments", ent.reference, data=etree.tostring(assignment, encoding='utf-8'),
+                                   content_type='application/xml;charset=UTF-8')
+
+    async def remove_assignments(self, retention_assignment: RetentionAssignment) -> str:
+        path = getattr(retention_assignment, 'path', IO_PATH)
+        await self.session.request('DELETE', f'{self.session.base_url}/api/entity/{path}/{retention_assignment.entity_reference}'
+                                   f'/retention-assignments/{retention_assignment.api_id}', "remove_assignments",
+                                   retention_assignment.entity_reference, expected=(204,))
+        return retention_assignment.entity_reference
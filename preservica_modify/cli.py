@@ -52,6 +52,28 @@ def create_parser() -> argparse.ArgumentParser:
                         "Also affects metadata updates - if 'include-xml' is specified, XML metadata updates will also be applied to descendant entities. ")
     program_group.add_argument("--dummy", "--dummy-run", action="store_true",
                         help="Run the program in dummy mode (no actual changes will be made to the system, but all processing will occur as normal and a report will be generated at the end)")
+    program_group.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of rows to process at the same time. By default rows are processed one at a time. " \
+                        "Increasing this will run rows on a pool of worker threads, which can greatly reduce run time on large spreadsheets as most time is spent waiting on Preservica. " \
+                        "Rows for the same Entity Reference are always processed in spreadsheet order.")
+    program_group.add_argument("--async-backend", action="store_true",
+                        help="Process rows on an asyncio event loop with a native async HTTP client instead of worker threads. " \
+                        "Requires the aiohttp package (pip install aiohttp). Not available with --delete or --descendants.")
+    program_group.add_argument("--max-in-flight", type=int, default=50,
+                        help="Maximum number of concurrent requests to Preservica when using --async-backend. Default is 50.")
+    program_group.add_argument("--pipeline", action="store_true",
+                        help="Process rows in a fetch, compute and write pipeline. Entities and their existing metadata for upcoming rows are fetched while earlier rows are being written. " \
+                        "Uses --workers threads for the fetch and write stages.")
+    program_group.add_argument("-p", "--processes", type=int, default=1,
+                        help="Number of worker processes. Rows are split between processes by a hash of the Entity Reference, " \
+                        "each process logging in separately and keeping its own continue file. Useful on multi-core machines when generating large amounts of XML metadata. " \
+                        "Can be combined with --workers or --async-backend, which then apply within each process.")
+    program_group.add_argument("--chunk-size", type=int, default=None,
+                        help="Read the input spreadsheet in chunks of this many rows, processing each chunk before reading the next, instead of loading it all at once. " \
+                        "Keeps memory use flat and starts updating sooner on very large spreadsheets. Only available for .csv and .jsonl input.")
+    program_group.add_argument("--cache-input", action="store_true",
+                        help="Save the loaded input spreadsheet to a <input>.cache.parquet file next to it, and load from that file on later runs (such as resuming an interrupted run) while the spreadsheet is unchanged. " \
+                        "Requires the pyarrow package (pip install pyarrow).")
     program_group.add_argument("--column-sensitivity", action="store_true",
                         help="Enable column sensitivity. By default, column names in the input spreadsheet are case sensitive, meaning that 'Title' and 'title' won't match." \
                         "Enabling this option will make column names case insensitive, so 'Title', 'title', and 'TITLE' would all be treated as the same column.")
@@ -68,6 +90,9 @@ def create_parser() -> argparse.ArgumentParser:
                         "If specified without a value, the 'exact' method will be used, which flattens the XML structure to only include elements being updated. " \
                         "If 'exact' is specified, the entire XML structure must be included in the metadata directory and it will be uploaded as-is (including any elements that are not being updated). ")
     
+    metadata_group.add_argument("--compiled-metadata", action="store_true",
+                        help="Compile each XML template into a serializer that writes spreadsheet values straight into the template's bytes, instead of building an XML tree for every row. " \
+                        "Output is identical, this only makes XML generation faster on large spreadsheets.")
     metadata_group.add_argument("--print-xmls", action="store_true",
                         help="Print the XML metadata files in the metadata directory to the console. This is useful for verifying that the XML files are correctly formatted and can be parsed by the program before running the full modification process.")
     metadata_group.add_argument("--print-remote-xmls", action="store_true",
@@ -202,6 +227,18 @@ def run_cli(args: argparse.Namespace) -> None:
             logger.exception("Login failed")
             raise
 
+    if args.workers < 1:
+        msg = "Number of workers must be 1 or greater."
+        logger.error(msg)
+        raise ValueError(msg)
+    if args.processes < 1:
+        msg = "Number of processes must be 1 or greater."
+        logger.error(msg)
+        raise ValueError(msg)
+    if args.max_in_flight < 1:
+        msg = "Maximum requests in flight must be 1 or greater."
+        logger.error(msg)
+        raise ValueError(msg)
     if args.metadata_dir is not None:
         if not os.path.isdir(os.path.abspath(args.metadata_dir)):
             msg = "Invlaid folder selected for metadata directory, closing program..."
@@ -236,7 +273,15 @@ def run_cli(args: argparse.Namespace) -> None:
                       use_keyring=args.use_keyring,
                       keyring_service=args.keyring_service,
                       save_password_to_keyring=args.save_password,
-                      column_sensitivity=args.column_sensitivity
+                      column_sensitivity=args.column_sensitivity,
+                      workers=args.workers,
+                      async_backend=args.async_backend,
+                      max_in_flight=args.max_in_flight,
+                      processes=args.processes,
+                      pipeline=args.pipeline,
+                      compiled_metadata=args.compiled_metadata,
+                      chunk_size=args.chunk_size,
+                      cache_input=args.cache_input
                       ).main()
   
 def server_helper(server_str: str) -> str:
@@ -253,14 +298,20 @@ def fmthelper(x: str):
         x = 'csv'
     if x in ('json', 'jsn', 'j'):
         x = 'json'
+    if x in ('jsonl', 'ndjson', 'json_lines'):
+        x = 'jsonl'
+    if x in ('parquet', 'parq', 'pq'):
+        x = 'parquet'
+    if x in ('feather', 'arrow', 'ipc', 'fea'):
+        x = 'feather'
     if x in ('ods', 'open_document_spreadsheet', 'o'):
         x = 'ods'
     if x in ('xml', 'html', 'htm'):
         x = 'xml'
     if x in ('dict','dictionary', 'd'):
         x = 'dict'
-    if x not in ('xlsx', 'csv', 'json', 'ods', 'xml', 'dict'):
-        raise argparse.ArgumentTypeError(f"Invalid format specified: {x}. Valid options are Excel (xlsx), CSV (csv), JSON (json), ODS (ods), XML (xml), or Dictionary (dict).")
+    if x not in ('xlsx', 'csv', 'json', 'jsonl', 'ods', 'xml', 'parquet', 'feather', 'dict'):
+        raise argparse.ArgumentTypeError(f"Invalid format specified: {x}. Valid options are Excel (xlsx), CSV (csv), JSON (json), JSON Lines (jsonl), ODS (ods), XML (xml), Parquet (parquet), Feather (feather), or Dictionary (dict).")
     return x.lower()
 
 def metadata_helper(x: str):
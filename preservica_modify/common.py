@@ -6,8 +6,10 @@ license: Apache License 2.0"
 """
 
 import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
 import logging, time
-from typing import Literal, Optional, Any
+from collections.abc import Mapping
+from typing import Literal, Optional, Any, Dict, Hashable, Iterator, List
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,82 @@ def check_bool(value) -> bool:
     else: 
         return False
 
+TRUE_VALUES = {"true","1","yes"}
+ISO_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+def bool_column(series: pd.Series) -> pd.Series:
+    """
+    check_bool for a whole column at once.
+    """
+    return series.astype(str).str.lower().isin(TRUE_VALUES)
+
+def date_column(series: pd.Series) -> pd.Series:
+    """
+    Parses a column of dates and formats them as ISO 8601 strings, with blanks as None.
+
+    Tries the ISO 8601 parser first, which is much faster than format='mixed', and only parses each value separately if the column doesn't match it.
+    """
+    if not is_datetime64_any_dtype(series):
+        try:
+            series = pd.to_datetime(series, format='ISO8601')
+        except (ValueError, TypeError):
+            series = pd.to_datetime(series, format='mixed')
+    return series.dt.strftime(ISO_DATE_FORMAT).astype(object).where(series.notna(), None)
+
+class Row:
+    """
+    A row of a RowStore. Reads straight from the store's columns, so holds no copy of the row's values.
+    """
+    __slots__ = ('_columns', '_pos', 'idx')
+
+    def __init__(self, columns: Dict[str, list], pos: int, idx: Hashable):
+        self._columns = columns
+        self._pos = pos
+        self.idx = idx
+
+    def __getitem__(self, column: str) -> Any:
+        return self._columns[column][self._pos]
+
+    def get(self, column: str, default: Any = None) -> Any:
+        values = self._columns.get(column)
+        if values is None:
+            return default
+        return values[self._pos]
+
+class RowStore(Mapping):
+    """
+    Column oriented copy of a spreadsheet, built once at load time.
+
+    Each column is a plain list with NaN, NaT and blank ("") cells as None, as check_nan would return them, and repeated strings shared.
+    Maps the dataframe index to Row records, so can be used in place of df.to_dict(orient='index').
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.index: List[Hashable] = list(df.index)
+        self.positions: Dict[Hashable, int] = {idx: pos for pos, idx in enumerate(self.index)}
+        strings: Dict[str, Optional[str]] = {}
+        self.columns: Dict[str, list] = {}
+        for column in df.columns:
+            series = df[column]
+            values = series.astype(object).where(series.notna(), None).tolist()
+            for i, value in enumerate(values):
+                if isinstance(value, str):
+                    if value not in strings:
+                        strings[value] = None if value == "" or value.lower() in {"nan","nat"} else value
+                    values[i] = strings[value]
+            self.columns[column] = values
+
+    def value(self, idx: Hashable, column: str) -> Any:
+        return self.columns[column][self.positions[idx]]
+
+    def __getitem__(self, idx: Hashable) -> Row:
+        return Row(self.columns, self.positions[idx], idx)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
 def export_csv(df: pd.DataFrame, output_filename: str, sep: str = ",", index: bool = False):
     try:
         df.to_csv(output_filename,index = index, sep = sep, encoding = "utf-8")
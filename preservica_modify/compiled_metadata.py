@@ -0,0 +1,107 @@
+"""
+Compiled Metadata Templates for Preservica Mass Modify
+
+Turns a parsed XML template into a serializer which writes escaped cell values straight into the template's
+serialized bytes. Rows are rendered without copying or mutating an lxml tree, and the output is byte identical
+to etree.tostring() of the filled template.
+
+Author: Christopher Prince
+license: Apache License 2.0"
+"""
+
+import copy
+import re
+from typing import Any, List, Optional, Sequence
+from lxml import etree
+
+SLOT_MARKER = b'@@PRESERVICA_MODIFY_SLOT@@'
+
+# Characters which need escaping or checking, anything else in an ASCII value is copied as is.
+_SPECIAL = re.compile('[&<>\r\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Characters lxml refuses in text content: control characters other than tab, newline and carriage return, surrogates and U+FFFE/U+FFFF.
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+def escape_text(value: str) -> bytes:
+    """
+    Escapes a text value the same way lxml serializes text content with the default (ASCII) encoding.
+    """
+    value = value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+    return value.encode('ascii', 'xmlcharrefreplace')
+
+class CompiledTemplate:
+    """
+    Serializer for a metadata template with a slot for each mapped element.
+
+    The template is serialized once with a marker as the text of each mapped element and split on the markers.
+    A slot left empty takes the element's original text, or closes the element as <tag/> when it had no text and no children,
+    as lxml would.
+
+    :param template: Parsed template
+    :param positions: Position of each mapped element, as child indexes from the root (None if the element is not in the template)
+    """
+    def __init__(self, template: etree._ElementTree, positions: Sequence[Optional[tuple]]):
+        tree = copy.deepcopy(template)
+        root = tree.getroot()
+        # Slots in document order, which is the order of the positions. Columns mapped to the same element share a slot,
+        # the last value given wins, as when setting the text on the tree.
+        order = sorted({position for position in positions if position is not None})
+        self.slots: List[List[int]] = [[i for i, p in enumerate(positions) if p == position] for position in order]
+        empty_texts: List[Optional[bytes]] = []
+        self_closing_slots: List[bool] = []
+        for position in order:
+            elem = root
+            for i in position:
+                elem = elem[i]
+            self_closing_slots.append(elem.text is None and len(elem) == 0)
+            empty_texts.append(escape_text(elem.text) if elem.text is not None else None)
+            elem.text = SLOT_MARKER.decode('ascii')
+        chunks = etree.tostring(tree).split(SLOT_MARKER)
+        if len(chunks) != len(self.slots) + 1:
+            raise ValueError('Template text already contains the slot marker, unable to compile.')
+        # Each slot is rendered as open + text + close when filled, or as its empty form. For an element which serializes
+        # as <tag/> when empty, the '>' ending the start tag and the closing tag move from the chunks into the slot.
+        self.opens: List[bytes] = []
+        self.closes: List[bytes] = []
+        self.empties: List[bytes] = []
+        for k, self_closing in enumerate(self_closing_slots):
+            if self_closing:
+                close_end = chunks[k + 1].index(b'>') + 1
+                self.opens.append(b'>')
+                self.closes.append(chunks[k + 1][:close_end])
+                self.empties.append(b'/>')
+                chunks[k] = chunks[k][:-1]
+                chunks[k + 1] = chunks[k + 1][close_end:]
+            else:
+                self.opens.append(b'')
+                self.closes.append(b'')
+                self.empties.append(empty_texts[k] or b'')
+        self.chunks: List[bytes] = chunks
+
+    def render(self, values: Sequence[Any]) -> Optional[bytes]:
+        """
+        Renders the template with a value per mapped element (None leaves the element as in the template).
+
+        Returns None if a value holds characters XML does not allow, so the caller can fall back to lxml and report the error the same way.
+        """
+        chunks = self.chunks
+        out: List[bytes] = [chunks[0]]
+        for k, columns in enumerate(self.slots):
+            value = None
+            for i in columns:
+                if values[i] is not None:
+                    value = values[i]
+            if value is None:
+                out.append(self.empties[k])
+            else:
+                text = str(value)
+                if text.isascii() and not _SPECIAL.search(text):
+                    escaped = text.encode('ascii')
+                elif _INVALID_XML.search(text):
+                    return None
+                else:
+                    escaped = escape_text(text)
+                out.append(self.opens[k])
+                out.append(escaped)
+                out.append(self.closes[k])
+            out.append(chunks[k + 1])
+        return b''.join(out)
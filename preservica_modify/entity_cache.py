@@ -0,0 +1,172 @@
+"""
+Entity Cache for Preservica Mass Modify
+
+Run-scoped cache of entities and children listings fetched from the EntityAPI. Rows, moves, deletes and descendants
+fetching the same entity share a single request. Entries expire after a TTL, the least recently used are evicted
+once the cache is full, and every write through the EntityAPI drops the entries for the entities it touches, so
+reads after a write always go back to Preservica.
+
+Author: Christopher Prince
+license: Apache License 2.0"
+"""
+
+import copy
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+# Reads returning an entity, cached by reference.
+CACHED_READS = {'asset', 'folder', 'content_object', 'entity'}
+# Reads which are passed through uncached. Any other method is treated as a write.
+UNCACHED_READS = {'identifiers_for_entity', 'metadata_for_entity', 'all_descendants', 'descendants'}
+
+class EntityCache:
+    """
+    Thread safe LRU cache with a TTL. Each entry records the entity references it depends on, so a write to an entity drops
+    every entry for it.
+    """
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._refs: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value, _ = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, refs: Iterable[str]) -> None:
+        if self.maxsize < 1:
+            return
+        refs = tuple(ref for ref in refs if ref)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, refs)
+            for ref in refs:
+                self._refs.setdefault(ref, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, refs: Iterable[str]) -> None:
+        with self._lock:
+            for ref in refs:
+                for key in self._refs.pop(ref, ()):
+                    self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        """
+        Called with the lock held.
+        """
+        _, _, refs = self._entries.pop(key)
+        for ref in refs:
+            keys = self._refs.get(ref)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._refs[ref]
+
+def _entity_refs(args: tuple, kwargs: dict) -> Set[str]:
+    """
+    References of the entities passed to a write, and of their parents, whose children listings the write may change.
+    """
+    refs = set()
+    for value in list(args) + list(kwargs.values()):
+        reference = getattr(value, 'reference', None)
+        if isinstance(reference, str):
+            refs.add(reference)
+            parent = getattr(value, 'parent', None)
+            if isinstance(parent, str):
+                refs.add(parent)
+    return refs
+
+class CachedEntityAPI:
+    """
+    Proxy for an EntityAPI (or the async EntityAPI) serving entity fetches and children listings from an EntityCache.
+
+    Cached entities are handed out as shallow copies, so changes a row makes to its entity before saving never leak into the cache.
+    """
+    def __init__(self, api: Any, cache: EntityCache):
+        self._api = api
+        self._cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._api, name)
+        if not callable(attr) or inspect.isgeneratorfunction(attr) or inspect.isclass(attr) or name in UNCACHED_READS:
+            return attr
+        if name in CACHED_READS or name == 'children':
+            key_of = self._read_key(name)
+            if inspect.iscoroutinefunction(attr):
+                return self._cached_async(attr, key_of)
+            return self._cached(attr, key_of)
+        if inspect.iscoroutinefunction(attr):
+            return self._invalidating_async(attr)
+        return self._invalidating(attr)
+
+    @staticmethod
+    def _read_key(name: str) -> Callable[..., Tuple[Hashable, str, bool]]:
+        """
+        Cache key, the reference the entry depends on and whether the result is an entity to copy, from a read's arguments.
+        """
+        def key_of(*args, **kwargs) -> Tuple[Hashable, str, bool]:
+            values = list(args) + list(kwargs.values())
+            if name == 'entity':
+                entity_type, reference = values[0], values[1]
+                return (name, str(entity_type), reference), reference, True
+            reference = getattr(values[0], 'reference', values[0])
+            if name == 'children':
+                return (name, reference) + tuple(values[1:]), reference, False
+            return (name, reference), reference, True
+        return key_of
+
+    def _cached(self, func: Callable, key_of: Callable) -> Callable:
+        def call(*args, **kwargs):
+            key, reference, is_entity = key_of(*args, **kwargs)
+            value = self._cache.get(key)
+            if value is None:
+                value = func(*args, **kwargs)
+                if value is not None:
+                    self._cache.put(key, value, (reference,))
+            return copy.copy(value) if is_entity else value
+        return call
+
+    def _cached_async(self, func: Callable, key_of: Callable) -> Callable:
+        async def call(*args, **kwargs):
+            key, reference, is_entity = key_of(*args, **kwargs)
+            value = self._cache.get(key)
+            if value is None:
+                value = await func(*args, **kwargs)
+                if value is not None:
+                    self._cache.put(key, value, (reference,))
+            return copy.copy(value) if is_entity else value
+        return call
+
+    def _invalidating(self, func: Callable) -> Callable:
+        def call(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._cache.invalidate(_entity_refs(args, kwargs))
+        return call
+
+    def _invalidating_async(self, func: Callable) -> Callable:
+        async def call(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._cache.invalidate(_entity_refs(args, kwargs))
+        return call
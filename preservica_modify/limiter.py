@@ -0,0 +1,222 @@
+"""
+Adaptive Concurrency Limiter for Preservica Mass Modify
+
+Wraps the pyPreservica EntityAPI and RetentionAPI (or their async counterparts) so every call goes through an
+AIMD (additive-increase, multiplicative-decrease) limiter. Concurrency is raised while latency stays flat
+and cut back on throttling (429/503) or server errors (5xx), so runs make use of spare capacity on a shared
+tenant without overloading it.
+
+Author: Christopher Prince
+license: Apache License 2.0"
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUS = (429, 503)
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """
+    HTTP status code of an error raised by pyPreservica, requests or the async backend, if there is one.
+    """
+    code = getattr(exc, 'http_status_code', None)
+    if code is None:
+        code = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if code is None and exc.args and isinstance(exc.args[0], int):
+        code = exc.args[0]
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class AIMDLimiter:
+    """
+    Thread and asyncio safe AIMD concurrency limiter.
+
+    Each successful call adds increase / limit to the limit (about +1 per round of limit calls) while its latency stays
+    within latency_tolerance of the best latency seen. Throttling or a 5xx multiplies the limit by decrease, at most once
+    per round: calls which started before the last decrease do not cut the limit again.
+    """
+    def __init__(self,
+                 initial: int = 4,
+                 minimum: int = 1,
+                 maximum: int = 50,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 latency_tolerance: float = 2.0,
+                 name: str = "Preservica"):
+        if maximum < 1 or minimum < 1 or minimum > maximum:
+            raise ValueError(f'Invalid limiter bounds: minimum {minimum}, maximum {maximum}')
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.name = name
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._best_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._lock = threading.Condition()
+        self._async_waiters: deque = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _try_acquire(self) -> bool:
+        if self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return True
+        return False
+
+    def acquire(self) -> float:
+        """
+        Blocks until a slot is free. Returns the start time to pass to release.
+        """
+        with self._lock:
+            while not self._try_acquire():
+                self._lock.wait()
+        return time.monotonic()
+
+    async def acquire_async(self) -> float:
+        """
+        Waits on the event loop until a slot is free. Returns the start time to pass to release.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return time.monotonic()
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    elif waiter.done() and not waiter.cancelled():
+                        self._wake()
+                raise
+
+    def _wake(self) -> None:
+        """
+        Wakes waiting threads and one waiting task per free slot. Called with the lock held.
+        """
+        self._lock.notify_all()
+        free = int(self._limit) - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            loop.call_soon_threadsafe(self._set_waiter, waiter)
+            free -= 1
+
+    def _set_waiter(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # The waiting task was cancelled before it could take the slot, pass it on.
+            with self._lock:
+                self._wake()
+        else:
+            waiter.set_result(None)
+
+    def release(self, started: float, error: Optional[BaseException] = None) -> None:
+        """
+        Frees the slot and adjusts the limit from the call's outcome.
+        """
+        latency = time.monotonic() - started
+        code = status_code(error) if error is not None else None
+        with self._lock:
+            self._in_flight -= 1
+            previous = int(self._limit)
+            if code is not None and (code in THROTTLE_STATUS or code >= 500):
+                if started >= self._last_decrease:
+                    self._limit = max(float(self.minimum), self._limit * self.decrease)
+                    self._last_decrease = time.monotonic()
+                    logger.warning(f'{self.name} returned {code}, reducing concurrency limit from {previous} to {int(self._limit)}')
+            elif error is None:
+                if self._best_latency is None or latency < self._best_latency:
+                    self._best_latency = latency
+                if latency <= self._best_latency * self.latency_tolerance:
+                    self._limit = min(float(self.maximum), self._limit + self.increase / max(self._limit, 1.0))
+                    if int(self._limit) > previous:
+                        logger.info(f'{self.name} latency steady, raising concurrency limit to {int(self._limit)}')
+            self._wake()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retrying a throttled call.
+        """
+        return min(30.0, 0.5 * (2 ** attempt))
+
+class LimitedAPI:
+    """
+    Proxy for an EntityAPI or RetentionAPI that runs every method call through an AIMDLimiter.
+
+    Throttled calls (429/503) are retried after a backoff, up to retries times. Generator methods, such as
+    all_descendants, are passed through unchanged, as their requests are made lazily while iterating.
+    """
+    def __init__(self, api: Any, limiter: AIMDLimiter, retries: int = 3):
+        self._api = api
+        self._limiter = limiter
+        self._retries = retries
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._api, name)
+        if not callable(attr) or inspect.isgeneratorfunction(attr) or inspect.isclass(attr):
+            return attr
+        if inspect.iscoroutinefunction(attr):
+            return self._wrap_async(attr)
+        return self._wrap(attr)
+
+    def _wrap(self, func: Callable) -> Callable:
+        def call(*args, **kwargs):
+            attempt = 0
+            while True:
+                started = self._limiter.acquire()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    self._limiter.release(started, e)
+                    if status_code(e) in THROTTLE_STATUS and attempt < self._retries:
+                        time.sleep(self._limiter.backoff(attempt))
+                        attempt += 1
+                        continue
+                    raise
+                except BaseException:
+                    self._limiter.release(started)
+                    raise
+                self._limiter.release(started)
+                return result
+        return call
+
+    def _wrap_async(self, func: Callable) -> Callable:
+        async def call(*args, **kwargs):
+            attempt = 0
+            while True:
+                started = await self._limiter.acquire_async()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    self._limiter.release(started, e)
+                    if status_code(e) in THROTTLE_STATUS and attempt < self._retries:
+                        await asyncio.sleep(self._limiter.backoff(attempt))
+                        attempt += 1
+                        continue
+                    raise
+                except BaseException:
+                    self._limiter.release(started)
+                    raise
+                self._limiter.release(started)
+                return result
+        return call
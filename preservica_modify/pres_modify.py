@@ -9,13 +9,19 @@ license: Apache License 2.0"
 """
 
 from pyPreservica import EntityAPI, RetentionAPI, UploadAPI, WorkflowAPI, AdminAPI, Entity, EntityType
+from pyPreservica.common import ReferenceNotFoundException
 import pandas as pd
-from pandas.api.types import is_datetime64_dtype
 from lxml import etree
 from datetime import datetime
-import os, re
-from preservica_modify.common import check_nan, check_bool, export_csv, export_json, export_xml, export_xl, export_ods
-from typing import Optional, Union, Dict, List, Hashable, Any
+import os, re, glob, copy, bisect, json, hashlib, inspect, asyncio, itertools, threading, zlib
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from queue import Queue
+from preservica_modify.limiter import AIMDLimiter, LimitedAPI, status_code
+from preservica_modify.entity_cache import CachedEntityAPI, EntityCache
+from preservica_modify.compiled_metadata import CompiledTemplate
+from preservica_modify.common import RowStore, ISO_DATE_FORMAT, bool_column, date_column, check_nan, check_bool, export_csv, export_json, export_xml, export_xl, export_ods
+from typing import Optional, Union, Dict, List, Hashable, Any, Coroutine, Iterator, Tuple
 import logging
 import configparser
 from getpass import getpass
@@ -27,12 +33,79 @@ except Exception:
     class KeyringError(Exception):
         pass
 
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+    import pyarrow.ipc
+    import pyarrow.parquet as parquet
+except Exception:
+    pyarrow = None
+
 logger = logging.getLogger(__name__)
 
+async def _resolve(result: Any) -> Any:
+    """
+    Awaits the result of a transport call if the transport is asynchronous, otherwise returns it as is.
+    """
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+def _not_found(exc: BaseException) -> bool:
+    """
+    Whether an error from fetching an entity means the reference was not found, or is not of the type requested.
+    """
+    return isinstance(exc, ReferenceNotFoundException) or status_code(exc) == 404
+
+def _run_sync(coro: Coroutine) -> Any:
+    """
+    Runs an update coroutine against a synchronous transport (pyPreservica).
+
+    With a synchronous transport nothing is ever awaited, so the coroutine completes on its first step.
+    """
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError('Update suspended on a synchronous transport, use the async backend to run asynchronous transports.')
+
+def _log_config() -> Dict[str, Any]:
+    """
+    The root logger's level, format and log file, as set up by the cli, to be passed to logging.basicConfig in worker processes.
+    """
+    root = logging.getLogger()
+    config: Dict[str, Any] = {'level': root.getEffectiveLevel()}
+    if root.handlers:
+        handler = root.handlers[0]
+        if handler.formatter is not None and handler.formatter._fmt is not None:
+            config['format'] = handler.formatter._fmt
+        if isinstance(handler, logging.FileHandler):
+            config.update(filename=handler.baseFilename, filemode='a')
+    return config
+
+def _run_shard(init_kwargs: dict, shard: int, shards: int, log_config: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """
+    Runs one shard of the spreadsheet in a worker process and returns the shard's summary.
+
+    Runs with its own Preservica login and its own continue token, logging as the parent process does.
+    """
+    if not logging.getLogger().handlers:
+        logging.basicConfig(**(log_config or {'level': logging.INFO}))
+    mod = PreservicaMassMod(**init_kwargs)
+    mod.shard = (shard, shards)
+    mod.main()
+    return dict(mod.summary)
+
 class PreservicaMassMod:
     """
     Mass Modification Class
     """
+    _summary_lock = threading.Lock()
+    DESCENDANT_PAGE_SIZE = 100
+    ENTITY_CACHE_SIZE = 4096
+    ENTITY_CACHE_TTL = 300.0
+
     def __init__(self,
                  input_file: str,
                  metadata_dir: str = os.path.join(os.path.dirname(__file__), "metadata"),
@@ -54,10 +127,19 @@ class PreservicaMassMod:
                  save_password_to_keyring: bool = False,
                  disable_continue: bool = False,
                  column_sensitivity: bool = False,
+                 workers: int = 1,
+                 async_backend: bool = False,
+                 max_in_flight: int = 50,
+                 processes: int = 1,
+                 pipeline: bool = False,
+                 compiled_metadata: bool = False,
+                 chunk_size: Optional[int] = None,
+                 cache_input: bool = False,
                  options_file: str = os.path.join(os.path.dirname(__file__),'options', 'options.properties')):
         
         self.metadata_dir = metadata_dir
         self.metadata_flag = metadata
+        self.compiled_metadata = compiled_metadata
         self.dummy_flag = dummy
         self.blank_override = blank_override
         self.delete_flag = delete
@@ -90,8 +172,30 @@ class PreservicaMassMod:
 
         self.column_sensitivity = column_sensitivity
 
+        if workers is None or int(workers) < 1:
+            logger.error(f'Invalid number of workers: {workers}, must be 1 or greater.')
+            raise ValueError(f'Invalid number of workers: {workers}, must be 1 or greater.')
+        self.workers = int(workers)
+        self.async_backend = async_backend
+        self.max_in_flight = max_in_flight
+
+        if processes is None or int(processes) < 1:
+            logger.error(f'Invalid number of processes: {processes}, must be 1 or greater.')
+            raise ValueError(f'Invalid number of processes: {processes}, must be 1 or greater.')
+        self.processes = int(processes)
+        self.shard: Optional[tuple[int, int]] = None
+        self.pipeline = pipeline
+        self.summary: Counter = Counter()
+
+        if chunk_size is not None and int(chunk_size) < 1:
+            logger.error(f'Invalid chunk size: {chunk_size}, must be 1 or greater.')
+            raise ValueError(f'Invalid chunk size: {chunk_size}, must be 1 or greater.')
+        self.chunk_size = int(chunk_size) if chunk_size is not None else None
+        self.cache_input = cache_input
+
         if options_file is None:
             options_file = os.path.join(os.path.dirname(__file__),'options','options.properties')
+        self.options_file = options_file
         self.parse_config(options_file=os.path.abspath(options_file), column_sensitivity=self.column_sensitivity)
 
         self.xnames: list[str] = []
@@ -163,6 +267,36 @@ class PreservicaMassMod:
         except KeyringError as e:
             logger.warning(f"Unable to save password to keyring: {e}")
 
+    def _check_password(self, username: Optional[str], password: Optional[str]) -> str:
+
+        if None in (username, self.server):
+            logger.error('A Username or Server has not been provided... Please try again...')
+            raise ValueError('A Username or Server has not been provided... Please try again...')
+
+        if password is None and self.save_password_to_keyring is False:
+            password = self._get_password_from_keyring(username)
+        
+        if password is None:
+            password = getpass(prompt=f"Please enter your password for Preservica for {username}: ")
+            if self.save_password_to_keyring is True:
+                self._set_password_in_keyring(str(username), password)
+        
+        if password is not None:
+            return password
+        else:
+            logger.error('Password not provided and could not be retrieved from keyring. Please try again...')
+            raise ValueError('Password not provided and could not be retrieved from keyring. Please try again...')
+
+    def _resolve_passwords(self) -> None:
+        """
+        Resolves the user and manager passwords, from the keyring or by prompting.
+        """
+        if self.username:
+            self.password = self._check_password(self.username, self.password)
+
+        if self.manager_username:
+            self.manager_password = self._check_password(self.manager_username, self.manager_password)
+
     def login_preservica(self):
         """
         Logs into Preservica. Either through manually logging in.
@@ -175,45 +309,65 @@ class PreservicaMassMod:
                 self.upload = UploadAPI(credentials_path=self.credentials_file)
                 self.workflow = WorkflowAPI(credentials_path=self.credentials_file)
                 self.admin = AdminAPI(credentials_path=self.credentials_file)
+                self._limit_apis()
                 logger.info(f'Successfully logged into Preservica Server {self.server}, as user: {self.username}')
                 return
                         
-            def _check_password(username: str, password: Optional[str]):
-
-                if None in (username, self.server):
-                    logger.error('A Username or Server has not been provided... Please try again...')
-                    raise ValueError('A Username or Server has not been provided... Please try again...')
-
-                if password is None and self.save_password_to_keyring is False:
-                    password = self._get_password_from_keyring(username)
-                
-                if password is None:
-                    password = getpass(prompt=f"Please enter your password for Preservica for {username}: ")
-                    if self.save_password_to_keyring is True:
-                        self._set_password_in_keyring(username, password)
-                
-                if password is not None:
-                    return password
-                else:
-                    logger.error('Password not provided and could not be retrieved from keyring. Please try again...')
-                    raise ValueError('Password not provided and could not be retrieved from keyring. Please try again...')
-            
-            if self.username:
-                self.password = _check_password(self.username, self.password)
-
-            if self.manager_username:
-                self.manager_password = _check_password(self.manager_username, self.manager_password)
+            self._resolve_passwords()
 
             self.entity = EntityAPI(username=str(self.username), password=str(self.password),server=str(self.server), tenant=str(self.tenant) if self.tenant else None)
             self.retention = RetentionAPI(username=str(self.username), password=str(self.password),server=str(self.server), tenant=str(self.tenant) if self.tenant else None)
             self.upload = UploadAPI(username=str(self.username), password=str(self.password),server=str(self.server), tenant=str(self.tenant) if self.tenant else None)
             self.workflow = WorkflowAPI(username=str(self.username), password=str(self.password),server=str(self.server), tenant=str(self.tenant) if self.tenant else None)
             self.admin = AdminAPI(username=str(self.username), password=str(self.password),server=str(self.server), tenant=str(self.tenant) if self.tenant else None)
+            self._limit_apis()
             logger.info(f'Successfully logged into Preservica Server {self.server}, as user {self.username}')
         except Exception:
             logger.exception('Failed to login to Preservica')
             raise
 
+    def _limit_apis(self) -> None:
+        """
+        Routes every EntityAPI and RetentionAPI call through an adaptive (AIMD) concurrency limiter, capped at the number of threads
+        which can call Preservica at once. Entity fetches are served from the run's entity cache where possible, without taking a slot.
+        """
+        workers = getattr(self, 'workers', 1)
+        self.limiter = AIMDLimiter(initial=min(workers, 4), maximum=self._api_concurrency())
+        self.entity = CachedEntityAPI(LimitedAPI(self.entity, self.limiter), self._entity_cache())
+        self.retention = LimitedAPI(self.retention, self.limiter)
+
+    def _api_concurrency(self) -> int:
+        """
+        Most calls the synchronous transport can have in flight: one per row thread (the fetch and write stages each have
+        self.workers threads when pipelined), doubled with descendants as each row thread also prefetches children listings.
+        Never below 2, so the limiter can always grow past a single call.
+        """
+        threads = getattr(self, 'workers', 1)
+        if getattr(self, 'pipeline', False) is True:
+            threads *= 2
+        if getattr(self, 'descendants_flag', None):
+            threads *= 2
+        return max(2, threads)
+
+    def _entity_cache(self) -> EntityCache:
+        """
+        The run's entity cache, shared by rows, moves, deletes and descendants.
+        """
+        with self._summary_lock:
+            cache = self.__dict__.get('entity_cache')
+            if cache is None:
+                cache = self.entity_cache = EntityCache(maxsize=self.ENTITY_CACHE_SIZE, ttl=self.ENTITY_CACHE_TTL)
+            return cache
+
+    def _count_cache(self) -> None:
+        """
+        Adds the entity cache's hits and misses to the run summary.
+        """
+        cache = getattr(self, 'entity_cache', None)
+        if cache is not None and (cache.hits or cache.misses):
+            self._count('entity cache hits', cache.hits)
+            self._count('entity cache misses', cache.misses)
+
     def test_login(self):
         """
         Test Login function, to ensure credentials are correct before running main.
@@ -271,6 +425,28 @@ class PreservicaMassMod:
             os.remove(token_file)
             logger.info(f'Continue token file {token_file} removed.')
 
+    def _token_file(self) -> str:
+        """
+        Base path of the continue token. Each shard keeps its own continue token alongside the input file.
+        """
+        shard = getattr(self, 'shard', None)
+        if shard is not None:
+            return f'{self.input_file}.shard{shard[0]}of{shard[1]}'
+        return self.input_file
+
+    def _count(self, key: str, n: int = 1) -> None:
+        """
+        Adds to the run summary. Safe to call from worker threads.
+        """
+        with self._summary_lock:
+            summary = self.__dict__.setdefault('summary', Counter())
+            summary[key] += n
+
+    def _log_summary(self, summary: Optional[Counter] = None) -> None:
+        summary = summary if summary is not None else getattr(self, 'summary', Counter())
+        if summary:
+            logger.info('Summary: ' + ', '.join(f'{k}: {v}' for k, v in sorted(summary.items())))
+
     def _set_input_flags(self) -> None:
         """
         Sets the input flags
@@ -293,34 +469,318 @@ class PreservicaMassMod:
             self.move_flag = True
         logger.debug(f'Input Flags - Title: {self.title_flag}, Description: {self.description_flag}, Security: {self.security_flag}, Retention: {self.retention_flag}, Move: {self.move_flag}')
 
-    def init_df(self) -> None:
-
+    def _input_format(self) -> str:
         from .cli import fmthelper
+        return fmthelper(os.path.splitext(self.input_file)[-1].replace('.',''))
+
+    def init_df(self) -> None:
 
-        input_fmt = fmthelper(os.path.splitext(self.input_file)[-1].replace('.',''))
+        input_fmt = self._input_format()
         logger.info(f'Initializing dataframe from input file: {self.input_file} with detected format: {input_fmt}. May take time to load.')
+        usecols = self._project_columns()
+        cache_key = None
+        if getattr(self, 'cache_input', False) is True:
+            cache_key = self._cache_key(usecols)
+            df = self._load_cached_frame(cache_key)
+            if df is not None:
+                self._init_headers(list(df.columns))
+                self._store_frame(df)
+                return
 
         if input_fmt.endswith("xlsx"):
-            self.df: pd.DataFrame = pd.read_excel(self.input_file)
+            if usecols is not None:
+                df: pd.DataFrame = self._read_xlsx_columns(usecols)
+            else:
+                df: pd.DataFrame = pd.read_excel(self.input_file)
         elif input_fmt.endswith("csv"):
-            self.df: pd.DataFrame = pd.read_csv(self.input_file)
+            df: pd.DataFrame = pd.read_csv(self.input_file, usecols=usecols)
         elif input_fmt.endswith("ods"):
-            self.df: pd.DataFrame = pd.read_excel(self.input_file, engine='odf')
+            df: pd.DataFrame = pd.read_excel(self.input_file, engine='odf')
+        elif input_fmt.endswith("jsonl"):
+            df: pd.DataFrame = pd.read_json(self.input_file, lines=True)
         elif input_fmt.endswith("json"):
-            self.df: pd.DataFrame = pd.read_json(self.input_file, orient='index')
+            df: pd.DataFrame = pd.read_json(self.input_file, orient='index')
         elif input_fmt.endswith("xml"):
-            self.df: pd.DataFrame = pd.read_xml(self.input_file)
+            df: pd.DataFrame = pd.read_xml(self.input_file)
+        elif input_fmt in {"parquet", "feather"}:
+            df: pd.DataFrame = self._read_arrow(input_fmt, usecols)
         else:
-            logger.error("Unsupported file type for input. Please use .xlsx, .csv, .json or .xml")
-            raise ValueError("Unsupported file type for input. Please use .xlsx, .csv, .json or .xml")
-       
-        self.column_headers = list(self.df.columns.values)
+            logger.error("Unsupported file type for input. Please use .xlsx, .csv, .json, .jsonl, .xml, .parquet or .feather")
+            raise ValueError("Unsupported file type for input. Please use .xlsx, .csv, .json, .jsonl, .xml, .parquet or .feather")
+
+        self._init_headers(list(df.columns))
+        self._load_frame(df)
+        if cache_key is not None:
+            self._save_cached_frame(cache_key, df)
+
+    def _cache_file(self) -> str:
+        return f'{self.input_file}.cache.parquet'
+
+    def _cache_key(self, usecols: Optional[list]) -> Dict[str, Any]:
+        """
+        Identifies the input file's contents and everything which changes how it is loaded, so a cached frame is only used for the same input and options.
+        """
+        stat = os.stat(self.input_file)
+        digest = hashlib.sha256()
+        with open(self.input_file, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return {'version': 1,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'sha256': digest.hexdigest(),
+                'usecols': [str(header) for header in usecols] if usecols is not None else None,
+                'column_sensitivity': self.column_sensitivity,
+                'flag_columns': sorted(str(header) for header in {self.DELETE_FIELD, self.PAX_PRES_FIELD, self.PAX_ACCESS_FIELD})}
+
+    def _load_cached_frame(self, cache_key: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """
+        Loads the normalised frame saved by a previous run, if its key matches the input file. None if there is no usable cache.
+        """
+        cache_file = self._cache_file()
+        if pyarrow is None or not os.path.isfile(cache_file):
+            return None
+        try:
+            metadata = parquet.read_schema(cache_file).metadata or {}
+            saved_key = json.loads(metadata.get(b'preservica_modify', b'null'))
+            if saved_key != cache_key:
+                logger.info(f'Input file has changed since {cache_file} was saved, reloading from {self.input_file}')
+                return None
+            df = parquet.read_table(cache_file, memory_map=True).to_pandas()
+            logger.info(f'Loaded cached input from {cache_file}')
+            return df
+        except Exception as e:
+            logger.warning(f'Unable to read cached input {cache_file}: {e}, reloading from {self.input_file}')
+            return None
+
+    def _save_cached_frame(self, cache_key: Dict[str, Any], df: pd.DataFrame) -> None:
+        """
+        Saves the normalised frame next to the input file. Written to a temporary file first, so a partial cache is never read.
+        """
+        if pyarrow is None:
+            logger.warning('pyarrow package is not installed, unable to cache input. Install with: pip install pyarrow')
+            return
+        cache_file = self._cache_file()
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        try:
+            table = pyarrow.Table.from_pandas(df)
+            metadata = dict(table.schema.metadata or {})
+            metadata[b'preservica_modify'] = json.dumps(cache_key).encode('utf-8')
+            parquet.write_table(table.replace_schema_metadata(metadata), tmp_file)
+            os.replace(tmp_file, cache_file)
+            logger.info(f'Cached input saved to {cache_file}')
+        except Exception as e:
+            logger.warning(f'Unable to cache input to {cache_file}: {e}')
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _init_headers(self, headers: list) -> None:
+        """
+        Sets the column headers, and the identifier columns, from the input's header row.
+        """
+        self.column_headers = list(headers)
         if self.column_sensitivity is True:
             self.column_headers = [str(header).lower() for header in self.column_headers]
-            self.df.columns = self.column_headers
-        date_headers = [header for header in self.column_headers if "date" in str(header).lower()]
-        self.df[date_headers] = self.df[date_headers].apply(lambda x: pd.to_datetime(x,format='mixed'))
+        self.ident_plan = self._ident_plan()
+
+    def _read_headers(self) -> Optional[list]:
+        """
+        Header row of a .csv, .xlsx, .parquet or .feather input, read without loading any rows. None for other formats.
+        """
+        input_fmt = self._input_format()
+        if input_fmt == "csv":
+            return list(pd.read_csv(self.input_file, nrows=0).columns)
+        if input_fmt in {"parquet", "feather"}:
+            self._check_pyarrow()
+            if input_fmt == "parquet":
+                return parquet.read_schema(self.input_file, memory_map=True).names
+            try:
+                with pyarrow.memory_map(self.input_file) as source:
+                    return pyarrow.ipc.open_file(source).schema.names
+            except pyarrow.ArrowInvalid:
+                # Feather V1 files aren't Arrow IPC files, read all their columns.
+                return None
+        if os.path.splitext(self.input_file)[-1].lower() in {'.xlsx', '.xlsm'}:
+            from openpyxl import load_workbook
+            wb = load_workbook(self.input_file, read_only=True, data_only=True, keep_links=False)
+            try:
+                return [header for header in next(wb.worksheets[0].iter_rows(max_row=1, values_only=True), ()) if header is not None]
+            finally:
+                wb.close()
+        return None
+
+    def _check_pyarrow(self) -> None:
+        if pyarrow is None:
+            logger.error("pyarrow package is not installed. Install with: pip install pyarrow")
+            raise RuntimeError("pyarrow package is not installed. Install with: pip install pyarrow")
+
+    def _read_arrow(self, input_fmt: str, usecols: Optional[list] = None) -> pd.DataFrame:
+        """
+        Reads a Parquet or Feather (Arrow IPC) file, memory-mapped and limited to the given columns.
+        """
+        self._check_pyarrow()
+        if input_fmt == "parquet":
+            table = parquet.read_table(self.input_file, columns=usecols, memory_map=True)
+        else:
+            table = feather.read_table(self.input_file, columns=usecols, memory_map=True)
+        return table.to_pandas()
+
+    def _needed_columns(self) -> set:
+        """
+        Columns the run reads: the configured fields, identifier columns and the columns mapped to XML template elements.
+        """
+        needed = {self.ENTITY_REF, self.DOCUMENT_TYPE, self.UPLOAD_TYPE, self.TITLE_FIELD, self.DESCRIPTION_FIELD, self.SECURITY_FIELD,
+                  self.RETENTION_FIELD, self.MOVETO_FIELD, self.DELETE_FIELD, self.FILE_PATH, self.PAX_PRES_FIELD, self.PAX_ACCESS_FIELD, self.PAX_PATH}
+        needed.update(header for header, _ in self.ident_plan)
+        for xml_file in getattr(self, 'xml_files', None) or []:
+            for elem_dict in xml_file.get('data'):
+                needed.update({elem_dict.get('Name'), elem_dict.get('Path')})
+        return needed
+
+    def _project_columns(self) -> Optional[list]:
+        """
+        Works out which columns of the input to read, from its header row and the XML templates matching it.
+        Returns the headers to read, or None to read every column: when the format's header can't be read on its own, in upload mode,
+        or when headers are duplicated.
+        """
+        if self.upload_flag is True:
+            return None
+        headers = self._read_headers()
+        if headers is None or len(set(headers)) != len(headers):
+            return None
+        self._init_headers(headers)
+        if self.metadata_flag is not None:
+            self.init_generate_descriptive_metadata()
+        needed = self._needed_columns()
+        usecols = [raw for raw, header in zip(headers, self.column_headers) if header in needed]
+        logger.info(f'Reading {len(usecols)} of {len(headers)} columns from {self.input_file}')
+        return usecols
 
+    def _read_xlsx_columns(self, usecols: list) -> pd.DataFrame:
+        """
+        Reads only the given columns of the first sheet of an .xlsx file, with openpyxl in read-only mode.
+        Cells are converted and parsed the same way as read_excel, so the result matches read_excel(usecols=usecols).
+        """
+        from openpyxl import load_workbook
+        from openpyxl.cell.cell import ERROR_CODES
+        from pandas.io.parsers import TextParser
+        wb = load_workbook(self.input_file, read_only=True, data_only=True, keep_links=False)
+        try:
+            sheet = wb.worksheets[0]
+            sheet.reset_dimensions()
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, ())
+            wanted = set(usecols)
+            positions = [i for i, value in enumerate(header) if value in wanted]
+            data: List[list] = [[header[i] for i in positions]]
+            last_row_with_data = 0
+            for row in rows:
+                values = []
+                for i in positions:
+                    value = row[i] if i < len(row) else None
+                    if value is None:
+                        value = ""
+                    elif isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    elif isinstance(value, str) and value in ERROR_CODES:
+                        value = float('nan')
+                    values.append(value)
+                data.append(values)
+                # Trailing rows are trimmed when empty across the whole sheet, not only the columns read, as read_excel does.
+                if row.count(None) != len(row):
+                    last_row_with_data = len(data) - 1
+        finally:
+            wb.close()
+        data = data[:last_row_with_data + 1]
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+
+    def _load_frame(self, df: pd.DataFrame) -> None:
+        """
+        Normalises a loaded dataframe, or chunk of one, and builds its row store.
+        """
+        if self.column_sensitivity is True:
+            df.columns = self.column_headers
+        # Normalised once here, so rows are read without checking each cell's type.
+        for header in self.column_headers:
+            if "date" in str(header).lower():
+                df[header] = date_column(df[header])
+            elif header in {self.DELETE_FIELD, self.PAX_PRES_FIELD, self.PAX_ACCESS_FIELD}:
+                df[header] = bool_column(df[header])
+        self._store_frame(df)
+
+    def _store_frame(self, df: pd.DataFrame) -> None:
+        """
+        Keeps a loaded frame as a row store, and releases the frame so the input is only held once.
+        Upload mode keeps the frame instead, as PreservicaMassUpload reads from it.
+        """
+        if self.upload_flag is True:
+            self.df: Optional[pd.DataFrame] = df
+            self.rows = None
+        else:
+            self.rows = RowStore(df)
+            self.df = None
+
+    def _iter_chunks(self, usecols: Optional[list] = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads a CSV or JSON Lines input in chunks of self.chunk_size rows. The index carries on across chunks, so row indexes
+        and continue tokens are the same as when loading the whole input.
+
+        In upload mode the trailing rows of a chunk which share a PAX Path are held over to the next chunk, so pax_lookup sees
+        all of a PAX's rows. This relies on the rows of each PAX being next to each other in the spreadsheet.
+        """
+        input_fmt = self._input_format()
+        if input_fmt == "csv":
+            reader = pd.read_csv(self.input_file, usecols=usecols, chunksize=self.chunk_size)
+        elif input_fmt == "jsonl":
+            reader = pd.read_json(self.input_file, lines=True, chunksize=self.chunk_size)
+        else:
+            logger.error(f'Chunked reading is only supported for .csv and .jsonl input, not: {input_fmt}')
+            raise ValueError(f'Chunked reading is only supported for .csv and .jsonl input, not: {input_fmt}')
+        held = None
+        with reader:
+            for chunk in reader:
+                if self.column_sensitivity is True:
+                    chunk.columns = [str(header).lower() for header in chunk.columns]
+                if held is not None:
+                    chunk = pd.concat([held, chunk])
+                    held = None
+                if self.upload_flag is True and self.PAX_PATH in chunk.columns and len(chunk) > 0:
+                    pax_paths = chunk[self.PAX_PATH]
+                    last = pax_paths.iloc[-1]
+                    if pd.notna(last):
+                        others = (pax_paths != last).to_numpy().nonzero()[0]
+                        split = others[-1] + 1 if len(others) else 0
+                        held = chunk.iloc[split:]
+                        chunk = chunk.iloc[:split]
+                        if len(chunk) == 0:
+                            continue
+                yield chunk
+            if held is not None:
+                yield held
+
+    def _process_stream(self, chunks: Iterator[pd.DataFrame]) -> None:
+        """
+        Processes the input one chunk at a time, freeing each chunk once its rows are done, so memory use stays flat whatever the size of the input.
+        Chunks before the continue token are skipped without being processed.
+        """
+        start_idx = self._continue_start()
+        for chunk in chunks:
+            if len(chunk) == 0 or chunk.index[-1] < start_idx:
+                continue
+            logger.info(f'Processing rows {chunk.index[0]} to {chunk.index[-1]}')
+            self._load_frame(chunk)
+            if self.retention_flag is True:
+                self._prepare_retentions()
+            self._mark_noop_rows()
+            if self.upload_flag is True:
+                self._process_upload_mode()
+            else:
+                data_dict = self.rows
+                if getattr(self, 'shard', None) is not None:
+                    data_dict = self._shard_rows(data_dict)
+                self._process_rows(data_dict)
+            self.df = None
+            self.rows = None
 
     def print_local_xmls(self) -> None:
         try:
@@ -449,87 +909,168 @@ class PreservicaMassMod:
         """
         self.policies = self.retention.policies()
         self.policy_dict = [{"Name": p.name, "Reference": p.reference} for p in self.policies.get_results()]
+        self.policy_index = self._index_policies(self.policy_dict)
         logger.info(f'Retention Policies retrieved')
         logger.debug(f'Retention Policies obtained: {self.policy_dict}')
         return self.policy_dict
 
-    def xml_merge(self, xml_a: Union[etree._Element, etree._ElementTree], xml_b: Union[etree._Element, etree._ElementTree], x_parent: Union[etree._Element, etree._ElementTree, None] = None) -> etree._Element:
+    @staticmethod
+    def _index_policies(policy_dict: List[dict]) -> Dict[str, List[str]]:
+        """
+        Indexes the retention policies by name, to the references of every policy with that name.
+        """
+        index: Dict[str, List[str]] = {}
+        for policy in policy_dict:
+            index.setdefault(policy.get('Name'), []).append(policy.get('Reference'))
+        return index
+
+    def _policy_refs(self) -> Dict[str, List[str]]:
+        index = self.__dict__.get('policy_index')
+        if index is None:
+            index = self.policy_index = self._index_policies(getattr(self, 'policy_dict', []))
+        return index
+
+    async def _policy_object(self, reference: str) -> Any:
+        """
+        The retention policy for a reference, retrieved from Preservica once per run.
+        """
+        policy_objects = self.__dict__.setdefault('policy_objects', {})
+        if reference not in policy_objects:
+            policy_objects[reference] = await _resolve(self.retention.policy(reference))
+        return policy_objects[reference]
+
+    def _prepare_retentions(self) -> None:
+        """
+        Pre-pass over the Retention Policy column. Unknown or ambiguous policy names are rejected before any rows are processed,
+        and each policy used is retrieved once per run, so rows make no policy lookups. Runs before the async backend is entered,
+        so policies are retrieved through the sync API and cached across chunks.
+        """
+        rows = getattr(self, 'rows', None)
+        if rows is None or self.RETENTION_FIELD not in rows.columns:
+            return
+        names = {name for name in rows.columns[self.RETENTION_FIELD] if name is not None}
+        index = self._policy_refs()
+        unknown = sorted(str(name) for name in names if name not in index)
+        ambiguous = sorted(str(name) for name in names if len(index.get(name, ())) > 1)
+        if unknown:
+            logger.error(f'Retention policies not found for names: {unknown}')
+            raise LookupError(f'Retention policies not found for names: {unknown}')
+        if ambiguous:
+            logger.error(f'Multiple Retention Policies found for names: {ambiguous}, please rename them in Preservica to use them.')
+            raise LookupError(f'Multiple Retention Policies found for names: {ambiguous}, please rename them in Preservica to use them.')
+        policy_objects = self.__dict__.setdefault('policy_objects', {})
+        for name in names:
+            reference = index[name][0]
+            if reference not in policy_objects:
+                policy_objects[reference] = self.retention.policy(reference)
+        logger.info(f'{len(names)} Retention Policies used in {self.input_file}, all found.')
+
+    def xml_merge(self, xml_a: Union[etree._Element, etree._ElementTree], xml_b: Union[etree._Element, etree._ElementTree], x_parent: Union[etree._Element, etree._ElementTree, None] = None, xnames: Optional[List[str]] = None) -> etree._Element:
         """
         Merges two xml's together. xml_b overwrites xml_a, unless xml_b's element contains a blank value.
         If blank_override is set, blank value will override xml_a's element.
 
+        Children are matched by tag in document order, so the nth of a repeated element in xml_b merges into the nth in xml_a,
+        and any further repeats are added.
+
         :param xml_a: xml to merge into
         :param xml_b: xml to merge from
-        :param x_parent: xml parent, only use for recursion
+        :param x_parent: no longer used, kept for compatibility
+        :param xnames: XNames of the elements being updated for this row, blank_override only clears these. Defaults to self.xnames
         """
+        if xnames is None:
+            xnames = getattr(self, 'xnames', [])
         a_root = xml_a.getroot() if isinstance(xml_a, etree._ElementTree) else xml_a
         b_root = xml_b.getroot() if isinstance(xml_b, etree._ElementTree) else xml_b
+        debug = logger.isEnabledFor(logging.DEBUG)
+        self._merge_children(a_root, b_root, set(xnames), debug)
+        if debug:
+            logger.debug(f'Merged XML: {etree.tostring(a_root)}')
+        return a_root
 
-        for b_child in b_root.findall('./'):
-            a_child = a_root.find('./' + b_child.tag)
-            if a_child is not None:
-                logger.debug(f'Found matching element in original XML for {b_child.tag}')
-                x_parent = None
-                if a_child.text is not None:
-                    if b_child.text:
-                        logger.debug(f'Updating element: {b_child.tag} with value: {b_child.text}')
-                        a_child.text = b_child.text
-                    elif self.blank_override is True and b_child.tag in self.xnames:
-                        logger.debug(f'Blank override enabled, updating element: {b_child.tag} with blank value')
-                        a_child.text = None
-                    else:
-                        logger.debug(f'Keeping existing value for element: {b_child.tag} with value: {a_child.text}')
-                        a_child.text = a_child.text
-                else:
-                    if b_child.text:
-                        logger.debug(f'Updating blank element: {b_child.tag} with value: {b_child.text}')
-                        a_child.text = b_child.text
-                    else:
-                        logger.debug(f'Element: {b_child.tag} is blank in both XMLs, keeping as blank')
-                        pass
-            else:
-                logger.debug(f'Element: {b_child.tag} not found in original XML, adding element with value: {b_child.text}')
-                x_parent = a_root
-                a_child = etree.SubElement(a_root,b_child.tag)
+    def _merge_children(self, a_root: etree._Element, b_root: etree._Element, xnames: set, debug: bool) -> None:
+        """
+        Merges the children of b_root into a_root, recursing into children with children. See xml_merge.
+
+        a_root's children are indexed by tag once, so each level is merged in a single pass.
+        """
+        a_index: Dict[str, List[etree._Element]] = {}
+        for a_child in a_root.iterchildren(tag=etree.Element):
+            a_index.setdefault(a_child.tag, []).append(a_child)
+        matched: Counter = Counter()
+        for b_child in b_root.iterchildren(tag=etree.Element):
+            tag = b_child.tag
+            n = matched[tag]
+            matched[tag] += 1
+            candidates = a_index.get(tag)
+            if candidates is not None and n < len(candidates):
+                a_child = candidates[n]
                 if b_child.text:
-                    logger.debug(f'Adding value for new element: {b_child.tag} with value: {b_child.text}')
+                    if debug:
+                        logger.debug(f'Updating element: {tag} with value: {b_child.text}')
                     a_child.text = b_child.text
-                else:
-                    logger.debug(f'New element: {b_child.tag} is blank, setting as blank')
+                elif a_child.text is not None and self.blank_override is True and tag in xnames:
+                    if debug:
+                        logger.debug(f'Blank override enabled, updating element: {tag} with blank value')
                     a_child.text = None
+                elif debug:
+                    logger.debug(f'Keeping existing value for element: {tag} with value: {a_child.text}')
+            else:
+                if debug:
+                    logger.debug(f'Element: {tag} not found in original XML, adding element with value: {b_child.text}')
+                a_child = etree.SubElement(a_root, tag)
+                a_child.text = b_child.text or None
             if len(b_child) > 0:
-                logger.debug(f'Element: {b_child.tag} has children, merging children elements')
-                self.xml_merge(a_child,b_child,x_parent)
-        logger.debug(f'Merged XML: {etree.tostring(xml_a)}')
-        return a_root
-    
+                self._merge_children(a_child, b_child, xnames, debug)
+
     def _cell(self, idx: Any, column: str) -> Any:
+        rows = getattr(self, 'rows', None)
+        if rows is not None:
+            return rows.value(idx, column)
         return self.df.at[idx, column]
 
+    def _value(self, idx: Any, column: str) -> Any:
+        """
+        Cell value with blanks as None. The row store is normalised at load, otherwise the cell is checked with check_nan.
+        """
+        rows = getattr(self, 'rows', None)
+        if rows is not None:
+            return rows.value(idx, column)
+        return check_nan(self.df.at[idx, column])
+
+    def _flag(self, idx: Any, column: str) -> bool:
+        """
+        Cell value of a True/False column. Converted to bool at load, otherwise checked with check_bool.
+        """
+        value = self._cell(idx, column)
+        if isinstance(value, bool):
+            return value
+        return check_bool(value)
+
     def xip_lookup(self, idx: Hashable) -> tuple[Optional[str], Optional[str], Optional[str]]:
         """
         Uses the pandas index to retrieve data from the "Title, Description and Security" columns. Sets data in Entity.
         :param idx: Pandas Index to lookup
         """
 
-        if getattr(self, 'df', None) is None:
+        if getattr(self, 'rows', None) is None and getattr(self, 'df', None) is None:
             logger.error('Dataframe not initialised, cannot perform lookup')
             raise RuntimeError('Dataframe not initialised, cannot perform lookup')
         try:
             if self.title_flag:
-                title = check_nan(self._cell(idx, self.TITLE_FIELD))
+                title = self._value(idx, self.TITLE_FIELD)
                 logger.debug(f'XIP Lookup Title: {title}')
             else:
                 title = None
             if self.description_flag:
-                description = check_nan(self._cell(idx, self.DESCRIPTION_FIELD))
+                description = self._value(idx, self.DESCRIPTION_FIELD)
                 if description is None and self.blank_override is True:
                     description = None
                 logger.debug(f'XIP Lookup Description: {description}')
             else:
                 description = None
             if self.security_flag:
-                security = check_nan(self._cell(idx, self.SECURITY_FIELD))
+                security = self._value(idx, self.SECURITY_FIELD)
                 logger.debug(f'XIP Lookup Security: {security}')
             else:
                 security = None
@@ -546,6 +1087,55 @@ class PreservicaMassMod:
             logger.exception(f'Retention XIP failed: for {idx}')
             raise
     
+    def _mark_noop_rows(self) -> None:
+        """
+        Pre-pass over the loaded rows, building a mask of the rows with something to apply: a value in a Title, Description, Security,
+        identifier, XML, Retention Policy or Move to column, or a Delete set. With blank_override, blank identifier, XML and retention cells
+        clear values on the rows that are kept, but a row blank in every column is still taken as having nothing to apply. Rows without
+        anything to apply are skipped in _row_reference, before any call to Preservica.
+        """
+        self.noop_rows = set()
+        rows = getattr(self, 'rows', None)
+        if rows is None or self.upload_flag is True or len(rows) == 0:
+            return
+        columns = [column for column, flag in ((self.TITLE_FIELD, self.title_flag), (self.DESCRIPTION_FIELD, self.description_flag),
+                                               (self.SECURITY_FIELD, self.security_flag), (self.MOVETO_FIELD, self.move_flag)) if flag is True]
+        clearing = [header for header, _ in getattr(self, 'ident_plan', None) or self._ident_plan()]
+        if self.retention_flag is True:
+            clearing.append(self.RETENTION_FIELD)
+        if self.metadata_flag is not None:
+            key = 'Path' if self.metadata_flag == 'exact' else 'Name'
+            clearing.extend(elem_dict.get(key) for xml_file in self.xml_files for elem_dict in xml_file.get('data'))
+        clearing = [column for column in dict.fromkeys(clearing) if column in rows.columns]
+        # The store's columns already hold blanks as None.
+        ops = pd.Series(False, index=rows.index)
+        for column in dict.fromkeys(columns + clearing):
+            if column in rows.columns:
+                ops |= pd.Series(rows.columns[column], index=rows.index, dtype=object).notna()
+        if self.delete_flag is True and self.DELETE_FIELD in rows.columns:
+            ops |= pd.Series(rows.columns[self.DELETE_FIELD], index=rows.index, dtype=object).eq(True)
+        self.noop_rows = set(ops.index[~ops])
+        if self.noop_rows:
+            logger.info(f'{len(self.noop_rows)} of {len(rows)} rows have nothing to update and will be skipped.')
+
+    def _ident_plan(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Maps each "Identifier", "Archive_Reference" and "Accession_Reference" column to its identifier key, in column order.
+        Columns which take the default key are mapped to None. Built once in init_df, so rows only read the planned columns.
+        """
+        plan = []
+        for header in self.column_headers:
+            header = str(header)
+            if any(s in header for s in {self.IDENTIFIER_FIELD,'Archive_Reference','Accession_Reference'}):
+                if f"{self.IDENTIFIER_FIELD}:" in header:
+                    key_name = header.rsplit(':',1)[-1]
+                elif self.ARCREF_FIELD not in header and self.ACCREF_FIELD in header:
+                    key_name = self.ACCREF_CODE
+                else:
+                    key_name = None
+                plan.append((header, key_name))
+        return plan
+
     def ident_lookup(self, idx: Hashable, default_key: Optional[str] = None) -> Optional[Dict[str, Optional[str]]]:
         """
         Uses the pandas index to retrieve data from the "Identifier","Archive_Reference", columns. Sets identifiers in Entity.
@@ -557,23 +1147,16 @@ class PreservicaMassMod:
         """
         try:
             ident_dict = {}
-            for header in self.column_headers:
-                header = str(header)
-                if any(s in header for s in {self.IDENTIFIER_FIELD,'Archive_Reference','Accession_Reference'}):
-                    if f"{self.IDENTIFIER_FIELD}:" in header:
-                        key_name = str(header).rsplit(':',1)[-1]
-                    else:
-                        if self.ARCREF_FIELD in header:
-                            key_name = default_key if default_key else self.IDENTIFIER_DEFAULT
-                        elif self.ACCREF_FIELD in header:
-                            key_name = self.ACCREF_CODE
-                        elif self.IDENTIFIER_FIELD in header:
-                            key_name = default_key if default_key else self.IDENTIFIER_DEFAULT
-                        else:
-                            key_name = default_key if default_key else self.IDENTIFIER_DEFAULT
-                    ident = check_nan(self._cell(idx, header))
-                    logger.debug(f'Identifier Lookup for {key_name}: {ident}')
-                    ident_dict.update({key_name:ident})
+            plan = getattr(self, 'ident_plan', None)
+            if plan is None:
+                plan = self._ident_plan()
+            default_key = default_key if default_key else self.IDENTIFIER_DEFAULT
+            for header, key_name in plan:
+                if key_name is None:
+                    key_name = default_key
+                ident = self._value(idx, header)
+                logger.debug(f'Identifier Lookup for {key_name}: {ident}')
+                ident_dict[key_name] = ident
             if len(ident_dict) == 0:
                 ident_dict = None
             return ident_dict
@@ -599,7 +1182,7 @@ class PreservicaMassMod:
         """
         try:
             if self.retention_flag:
-                retention_policy = check_nan(self._cell(idx,self.RETENTION_FIELD))
+                retention_policy = self._value(idx,self.RETENTION_FIELD)
             else:
                 retention_policy = None
             logger.debug(f'Retention Lookup for {idx}: {retention_policy}')    
@@ -617,10 +1200,10 @@ class PreservicaMassMod:
 
     def pax_lookup(self, idx: Hashable) -> Optional[tuple[Optional[str], Optional[list], Optional[list]]]:
         try:
-            pax_path = check_nan(self._cell(idx, self.PAX_PATH))
-            pax_dict = self.df.loc[[self.df[self.PAX_PATH] == pax_path, [self.FILE_PATH,self.PAX_PRES_FIELD,self.PAX_ACCESS_FIELD]]].to_dict(orient='index')
-            file_access = check_bool(self._cell(idx, self.PAX_ACCESS_FIELD))
-            file_preservation = check_bool(self._cell(idx, self.PAX_ACCESS_FIELD))
+            pax_path = self._value(idx, self.PAX_PATH)
+            pax_dict = self.df.loc[self.df[self.PAX_PATH] == pax_path, [self.FILE_PATH,self.PAX_PRES_FIELD,self.PAX_ACCESS_FIELD]].to_dict(orient='index')
+            file_access = self._flag(idx, self.PAX_ACCESS_FIELD)
+            file_preservation = self._flag(idx, self.PAX_PRES_FIELD)
             if file_access is False and file_preservation is False:
                 logger.info(f'Preservation/Access is not set for {idx, pax_path}, setting Preservation to True by default')
                 pax_dict[idx][self.PAX_PRES_FIELD] = True
@@ -654,7 +1237,7 @@ class PreservicaMassMod:
         Delete Flag must also be set.
         """
         try:
-            return check_bool(self._cell(idx, self.DELETE_FIELD))    
+            return self._flag(idx, self.DELETE_FIELD)    
         except Exception:
             logger.exception('Failed to lookup delete flag')
             raise
@@ -710,7 +1293,14 @@ class PreservicaMassMod:
                         logger.exception(f'Error comparing XML elements to column headers for file {file.name}')
                         raise
                 if len(list_xml) > 0:
-                    self.xml_files.append({'data': list_xml, 'local_name': root_element_ln, 'local_ns': root_element_ns, 'xml_file': path})
+                    self._compile_template(xml_file, list_xml, root_element_ln)
+                    xml_dict = {'data': list_xml, 'local_name': root_element_ln, 'local_ns': root_element_ns, 'xml_file': path, 'template': xml_file}
+                    if getattr(self, 'compiled_metadata', False) is True:
+                        for elem_dict in list_xml:
+                            if elem_dict.get('Position') is None:
+                                logger.warning(f'XML element not found for {elem_dict.get("Name"), elem_dict.get("Path")} in {path}, it will not be updated.')
+                        xml_dict['compiled'] = CompiledTemplate(xml_file, [elem_dict.get('Position') for elem_dict in list_xml])
+                    self.xml_files.append(xml_dict)
                     logger.info(f'Matching columns found in spreadsheet for XML file: {file.name}, added to metadata generation list.')
                 else:
                     logger.debug(f'No matching columns found in spreadsheet for XML file: {file.name}, skipping this file for metadata generation.')
@@ -722,6 +1312,46 @@ class PreservicaMassMod:
             logger.exception('Failed to intialise XML Metadata')
             raise
     
+    def _template_xpath(self, elem_dict: Dict[str, Any], local_name: str) -> str:
+        """
+        Path used to find a mapped element in its template, by Path in exact mode or by Name anywhere in the template in flat mode.
+        """
+        elm_ns = elem_dict.get('Namespace')
+        if self.metadata_flag in {'flat'}:
+            return f'.//{{{elm_ns}}}{str(elem_dict.get("Name")).split(":")[-1]}'
+        return './' + str(elem_dict.get('Path')).replace(local_name + ":", f"{{{elm_ns}}}")
+
+    def _compile_template(self, template: etree._ElementTree, list_xml: List[Dict[str, Any]], local_name: str) -> None:
+        """
+        Resolves each mapped element of a parsed template once, storing its position as child indexes from the root.
+        Rows then fill a copy of the template by index instead of searching it. Position is None when the element is not in the template.
+        """
+        for elem_dict in list_xml:
+            elem = template.find(self._template_xpath(elem_dict, local_name))
+            if elem is None:
+                elem_dict['Position'] = None
+                continue
+            position = []
+            while elem.getparent() is not None:
+                parent = elem.getparent()
+                position.append(parent.index(elem))
+                elem = parent
+            elem_dict['Position'] = tuple(reversed(position))
+
+    def _metadata_value(self, idx: Hashable, elem_dict: Dict[str, Any]) -> Any:
+        """
+        Value of a mapped element for a row, from the Path column in exact mode or the Name column in flat mode. None if blank.
+        """
+        if self.metadata_flag in {'exact'}:
+            val = self._value(idx, elem_dict.get('Path'))
+        elif self.metadata_flag in {'flat'}:
+            val = self._value(idx, elem_dict.get('Name'))
+        if val is None:
+            return None
+        if isinstance(val, datetime):
+            val = val.strftime(ISO_DATE_FORMAT)
+        return val
+
     def generate_descriptive_metadata(self, idx: Hashable, xml_files: List[Dict[str, Any]]) -> Optional[List[Dict[str, Union[etree._ElementTree, list[Optional[str]]]]]]:
         """
         Generates the xml file based on the returned list of xml_files from the init_generate_descriptive_metadata function.
@@ -730,6 +1360,7 @@ class PreservicaMassMod:
         :param xml_file: Dictionary of XML files created as part of init 
         
         This version returns a list of dictionaries containing the XML tree and the XNames for each file, which can be used in the xml_merge function to merge the generated metadata with the original XML template. This allows for more flexible handling of multiple XML files and ensures that all relevant metadata is included in the final Opex manifest.
+        Templates compiled with compiled_metadata are returned as serialized bytes instead of a tree.
         """
         try:
             xml_list = []
@@ -747,7 +1378,18 @@ class PreservicaMassMod:
                     logger.warning(f'No XML elements found for {xml_file.get("xml_file")}, skipping XML generation for this file.')
                     continue
                 else:
-                    xml_new = etree.parse(str(xml_file.get('xml_file')))
+                    compiled = xml_file.get('compiled')
+                    if compiled is not None:
+                        xml_bytes = compiled.render([self._metadata_value(idx, elem_dict) for elem_dict in xml_data])
+                        if xml_bytes is not None:
+                            xml_list.append({local_ns: xml_bytes, 'xnames': xnames})
+                            continue
+                    template = xml_file.get('template')
+                    if template is not None:
+                        xml_new = copy.deepcopy(template)
+                    else:
+                        xml_new = etree.parse(str(xml_file.get('xml_file')))
+                    root = xml_new.getroot()
                     for elem_dict in xml_data:
                         if not isinstance(elem_dict, Dict):
                             logger.warning(f'Invalid element data for {elem_dict} in file {xml_file.get("xml_file")}, skipping this element.')
@@ -758,27 +1400,21 @@ class PreservicaMassMod:
                         if not isinstance(name, str) or not isinstance(path, str) or not isinstance(elm_ns, str):
                             logger.warning(f'Missing Name or Path or Namespace for element {elem_dict} in file {xml_file.get("xml_file")}, skipping this element.')
                             continue
-                        if self.metadata_flag in {'exact'}:
-                            val = check_nan(self._cell(idx, path))
-                        elif self.metadata_flag in {'flat'}:
-                            val = check_nan(self._cell(idx, name))
-                        if pd.isnull(val) or val is None:
+                        val = self._metadata_value(idx, elem_dict)
+                        if val is None:
                             continue
-                        else:
-                            if is_datetime64_dtype(val):
-                                val = pd.to_datetime(val)
-                                val = datetime.strftime(val, "%Y-%m-%dT%H:%M:%S.000Z")
-                        if self.metadata_flag in {'exact'}:
-                            n = path.replace(local_name + ":", f"{{{elm_ns}}}")
-                            elem = xml_new.find(f'./{n}')
-                            if elem is None:
-                                logger.warning(f'XML element not found for path: {n, path} in {xml_file}.')
+                        if template is not None and 'Position' in elem_dict:
+                            position = elem_dict.get('Position')
+                            if position is None:
+                                logger.warning(f'XML element not found for {name, path} in {xml_file.get("xml_file")}.')
                                 continue
-                        elif self.metadata_flag in {'flat'}:
-                            n = name.split(':')[-1]
-                            elem = xml_new.find(f'.//{{{elm_ns}}}{n}')
+                            elem = root
+                            for i in position:
+                                elem = elem[i]
+                        else:
+                            elem = xml_new.find(self._template_xpath(elem_dict, local_name))
                             if elem is None:
-                                logger.warning(f'Element not found in XML for {name, path} in {xml_file}.')
+                                logger.warning(f'XML element not found for {name, path} in {xml_file.get("xml_file")}.')
                                 continue
                         if elem is not None:
                             elem.text = str(val)
@@ -799,50 +1435,79 @@ class PreservicaMassMod:
             raise
 
     def xip_update(self, ent: Entity, title: Optional[str] = None, description: Optional[str] = None, security: Optional[str] = None):
+        return _run_sync(self.xip_update_async(ent, title, description, security))
+
+    async def xip_update_async(self, ent: Entity, title: Optional[str] = None, description: Optional[str] = None, security: Optional[str] = None):
+        """
+        Values matching the entity already are skipped, and the entity is only saved when its title or description changes.
+        The security tag is always set when the entity's current tag is not known.
+        """
         try:
+            changed = False
             if title:
-                logger.info(f"Updating {ent.reference} Title from {ent.title} to {title}")
-                if self.dummy_flag is False:
-                    ent.title = title
+                if str(title) == ent.title:
+                    self._count('title unchanged')
+                else:
+                    logger.info(f"Updating {ent.reference} Title from {ent.title} to {title}")
+                    changed = True
+                    if self.dummy_flag is False:
+                        ent.title = title
             if description:
-                logger.info(f"Updating {ent.reference} Description from {ent.description} to {description}")
-                if self.dummy_flag is False:
-                    ent.description = description
+                if str(description) == ent.description:
+                    self._count('description unchanged')
+                else:
+                    logger.info(f"Updating {ent.reference} Description from {ent.description} to {description}")
+                    changed = True
+                    if self.dummy_flag is False:
+                        ent.description = description
             if security:
-                logger.info(f"Updating {ent.reference} Security Tag from {ent.security_tag} to {security}")
-                if self.dummy_flag is False:
-                    self.entity.security_tag_async(ent, security)
-            if any([title,description]):
-                self.entity.save(ent)
+                # Entities without a known tag, such as listed descendants, are always updated.
+                if getattr(ent, 'security_tag', None) is not None and str(security) == ent.security_tag:
+                    self._count('security unchanged')
+                else:
+                    logger.info(f"Updating {ent.reference} Security Tag from {ent.security_tag} to {security}")
+                    if self.dummy_flag is False:
+                        await _resolve(self.entity.security_tag_async(ent, security))
+            if changed and self.dummy_flag is False:
+                await _resolve(self.entity.save(ent))
         except Exception:
             logger.exception('Error updating XIP metadata')
             raise
     
-    def ident_update(self, ent: Entity, ident_dict: Union[dict,None]):
+    def ident_update(self, ent: Entity, ident_dict: Union[dict,None], xip_idents: Optional[set] = None):
+        return _run_sync(self.ident_update_async(ent, ident_dict, xip_idents))
+
+    async def ident_update_async(self, ent: Entity, ident_dict: Union[dict,None], xip_idents: Optional[set] = None):
+        """
+        :param xip_idents: Existing identifiers of the entity, if already fetched. Fetched when not given.
+        """
         if ident_dict is None:
             return
         try:
-            xip_idents = self.entity.identifiers_for_entity(ent)
+            if xip_idents is None:
+                xip_idents = await _resolve(self.entity.identifiers_for_entity(ent))
             for items in ident_dict.items():
                 key_name = items[0]
                 ident = items[1]
                 if ident is not None:
-                    if any(x[0] for x in xip_idents if x[0] == key_name):
+                    if any(x[0] == key_name and x[1] == str(ident) for x in xip_idents):
+                        self._count('identifiers unchanged')
+                    elif any(x[0] for x in xip_idents if x[0] == key_name):
                         old_ident = [x[1] for x in xip_idents if x[0] == key_name][0]
                         logger.info(f'Updating {ent.reference} Updating identifier {key_name, old_ident} to: {key_name, ident}')
                         if self.dummy_flag is False:
-                            self.entity.update_identifiers(ent,key_name,str(ident))
+                            await _resolve(self.entity.update_identifiers(ent,key_name,str(ident)))
                     else: 
                         logger.info(f'Updating {ent.reference} Adding identifier: {key_name, ident}')
                         if self.dummy_flag is False:
-                            self.entity.add_identifier(ent,key_name,str(ident))
+                            await _resolve(self.entity.add_identifier(ent,key_name,str(ident)))
                 else:
                     if self.blank_override is True:
                         if any(x[0] for x in xip_idents if x[0] == key_name):
                             old_ident = [x[1] for x in xip_idents if x[0] == key_name][0]
                             logger.info(f'Updating {ent.reference} Deleting identifier {key_name, old_ident}')
                             if self.dummy_flag is False:
-                                self.entity.delete_identifiers(ent,key_name,str(old_ident))
+                                await _resolve(self.entity.delete_identifiers(ent,key_name,str(old_ident)))
                         else:
                             pass
         except Exception:
@@ -850,44 +1515,52 @@ class PreservicaMassMod:
             raise
                     
     def retention_update(self, ent: Entity, retention_policy: Optional[str] = None):
+        return _run_sync(self.retention_update_async(ent, retention_policy))
+
+    async def retention_update_async(self, ent: Entity, retention_policy: Optional[str] = None):
         try:
             if retention_policy is not None:
-                assignments = self.retention.assignments(ent)
-                policies = [policy for policy in self.policy_dict if policy.get('Name') == retention_policy]
+                assignments = list(await _resolve(self.retention.assignments(ent)))
+                policies = self._policy_refs().get(retention_policy, [])
                 if len(policies) > 1:
                     logger.warning(f'Multiple Retention Policies found for reference: {ent.reference}, taking no action.')
                 elif len(policies) == 1:
-                    policy = policies[0].get('Reference', None)
-                    policy_name = policies[0].get('Name', None)
-                    if policy is None:
-                        logger.error(f'Retention policy reference not found for name: {retention_policy}')
-                        raise LookupError(f'Retention policy reference not found for name: {retention_policy}')
-                    if any(assignments):
-                        for ass in assignments:
-                            logger.info(f"Updating {ent.reference} Removing retention policy: {ass.policy_reference}")
-                            if self.dummy_flag is False:
-                                self.retention.remove_assignments(ass)
-                    logger.info(f"Updating {ent.reference} Adding retention policy: {policy, policy_name}")
-                    if self.dummy_flag is False:
-                        self.retention.add_assignments(ent,self.retention.policy(policy))
+                    policy = policies[0]
+                    policy_name = retention_policy
+                    # Only stale assignments are removed, and the policy is only added when the entity does not carry it already.
+                    current = [ass for ass in assignments if ass.policy_reference == policy]
+                    stale = [ass for ass in assignments if ass.policy_reference != policy] + current[1:]
+                    if not stale and current:
+                        logger.debug(f"Retention policy for {ent.reference} already {policy_name}, skipping")
+                        self._count('retention unchanged')
+                        return
+                    for ass in stale:
+                        logger.info(f"Updating {ent.reference} Removing retention policy: {ass.policy_reference}")
+                        if self.dummy_flag is False:
+                            await _resolve(self.retention.remove_assignments(ass))
+                    if not current:
+                        logger.info(f"Updating {ent.reference} Adding retention policy: {policy, policy_name}")
+                        if self.dummy_flag is False:
+                            await _resolve(self.retention.add_assignments(ent, await self._policy_object(policy)))
                 elif len(policies) == 0:
                     logger.error(f'Retention policy not found for name: {retention_policy}')
                     raise LookupError(f'Retention policy not found for name: {retention_policy}')
 
             elif retention_policy is None and self.blank_override is True:
-                assignments = self.retention.assignments(ent)
-                if any(assignments):
-                    for ass in assignments:
-                        logger.info(f"Updating {ent.reference} Removing Retention Policy: {ass.policy_reference}")
-                        if self.dummy_flag is False:
-                            self.retention.remove_assignments(ass)
+                assignments = list(await _resolve(self.retention.assignments(ent)))
+                if not any(assignments):
+                    self._count('retention unchanged')
+                for ass in assignments:
+                    logger.info(f"Updating {ent.reference} Removing Retention Policy: {ass.policy_reference}")
+                    if self.dummy_flag is False:
+                        await _resolve(self.retention.remove_assignments(ass))
             else:
                 pass                    
         except Exception:
             logger.exception(f'Error updating retention: {ent.reference}')
             raise
                     
-    def xml_update(self, ent: Entity, ns: str, xml_new: etree._ElementTree):
+    def xml_update(self, ent: Entity, ns: str, xml_new: Union[etree._ElementTree, bytes], xnames: Optional[List[str]] = None, xml_bytes: Optional[bytes] = None, metadata: Optional[Dict[str, Optional[str]]] = None):
         """
         Makes the call on Preservica's API using pyPreservica to update, remove or add metadata from given entity.
 
@@ -895,31 +1568,79 @@ class PreservicaMassMod:
 
         :param e: Entity to act upon
         :param ns: Namespace of XML being updated
+        :param xnames: XNames of the elements generated for this row, passed through to xml_merge
+        :param xml_bytes: xml_new already serialized, used as is when the entity has no existing metadata
+        :param metadata: Existing metadata of the entity by namespace, if already fetched. Fetched when not given.
         """
+        return _run_sync(self.xml_update_async(ent, ns, xml_new, xnames, xml_bytes, metadata))
+
+    async def xml_update_async(self, ent: Entity, ns: str, xml_new: Union[etree._ElementTree, bytes], xnames: Optional[List[str]] = None, xml_bytes: Optional[bytes] = None, metadata: Optional[Dict[str, Optional[str]]] = None):
         try:
             #Change so it's dynamic - not only self.upload_flag - also indent_update needs same treatment
             if self.upload_flag:
                 ent_meta = None
+            elif metadata is not None and ns in metadata:
+                ent_meta = metadata[ns]
             else:
-                ent_meta = self.entity.metadata_for_entity(ent, ns)
-            # Check if metadata exists for the entity
-            if ent_meta is None:
-                xml_to_upload = etree.tostring(xml_new)
-                logger.info(f"Updating {ent.reference} Adding Metadata for: {ns}")
-                logger.debug(f'New XML Metadata: {xml_to_upload}')
-                if self.dummy_flag is False:
-                    self.entity.add_metadata(ent, ns, xml_to_upload.decode('utf-8'))
-            # Metadata exists, merge and update
-            else:
-                xml_to_upload = etree.tostring(self.xml_merge(etree.fromstring(ent_meta), xml_new))
-                logger.info(f"Updating {ent.reference} Updating Metadata for: {ns}")
-                logger.debug(f'Updated XML Metadata: {xml_to_upload}')
-                if self.dummy_flag is False:
-                    self.entity.update_metadata(ent, ns, xml_to_upload.decode('utf-8'))
+                ent_meta = await _resolve(self.entity.metadata_for_entity(ent, ns))
+            exists, xml_to_upload = self.xml_payload(ent, ns, ent_meta, xml_new, xnames, xml_bytes)
+            await self.xml_write_async(ent, ns, exists, xml_to_upload)
         except Exception:
             logger.exception('Error updating XML metadata')
             raise
 
+    def xml_payload(self, ent: Entity, ns: str, ent_meta: Optional[str], xml_new: Union[etree._ElementTree, bytes], xnames: Optional[List[str]] = None, xml_bytes: Optional[bytes] = None) -> tuple[bool, Optional[bytes]]:
+        """
+        Builds the XML to upload for an entity. Merges with the existing metadata, if there is any.
+
+        :param ent_meta: Existing metadata for the namespace, None if the entity has none
+        :param xml_new: Generated XML, as a tree or already serialized by a compiled template
+        :param xml_bytes: xml_new already serialized, if available
+        :return: Whether the metadata already exists on the entity, and the XML to upload (None if merging leaves the existing metadata unchanged)
+        """
+        if isinstance(xml_new, bytes):
+            xml_bytes = xml_new
+        # Check if metadata exists for the entity
+        if ent_meta is None:
+            xml_to_upload = xml_bytes if xml_bytes is not None else etree.tostring(xml_new)
+            logger.debug(f'New XML Metadata: {xml_to_upload}')
+            return False, xml_to_upload
+        # Metadata exists, merge and update
+        if isinstance(xml_new, bytes):
+            xml_new = etree.ElementTree(etree.fromstring(xml_new))
+        xml_existing = etree.fromstring(ent_meta)
+        digest = self._xml_digest(xml_existing)
+        xml_merged = self.xml_merge(xml_existing, xml_new, xnames=xnames)
+        if self._xml_digest(xml_merged) == digest:
+            logger.debug(f'XML Metadata for {ent.reference} unchanged for: {ns}')
+            return True, None
+        xml_to_upload = etree.tostring(xml_merged)
+        logger.debug(f'Updated XML Metadata: {xml_to_upload}')
+        return True, xml_to_upload
+
+    @staticmethod
+    def _xml_digest(xml: etree._Element) -> str:
+        """
+        Digest of the canonical (C14N) form of an element, equal for documents differing only in serialization.
+        """
+        return hashlib.sha256(etree.tostring(xml, method='c14n')).hexdigest()
+
+    def xml_write(self, ent: Entity, ns: str, exists: bool, xml_to_upload: Optional[bytes]):
+        return _run_sync(self.xml_write_async(ent, ns, exists, xml_to_upload))
+
+    async def xml_write_async(self, ent: Entity, ns: str, exists: bool, xml_to_upload: Optional[bytes]):
+        if xml_to_upload is None:
+            logger.info(f"Metadata for {ent.reference} unchanged for: {ns}, skipping update")
+            self._count('metadata unchanged')
+        elif exists is False:
+            logger.info(f"Updating {ent.reference} Adding Metadata for: {ns}")
+            if self.dummy_flag is False:
+                await _resolve(self.entity.add_metadata(ent, ns, xml_to_upload.decode('utf-8')))
+        else:
+            logger.info(f"Updating {ent.reference} Updating Metadata for: {ns}")
+            if self.dummy_flag is False:
+                await _resolve(self.entity.update_metadata(ent, ns, xml_to_upload.decode('utf-8')))
+
     def move_update(self, idx: int, ent: Entity):
         """
         Uses the pandas index to retrieve data from the "Move To" column. Initiates a move. 
@@ -927,14 +1648,17 @@ class PreservicaMassMod:
         :param idx: Pandas Index to lookup
         :param ent: Entity to act upon
         """
+        return _run_sync(self.move_update_async(idx, ent))
+
+    async def move_update_async(self, idx: int, ent: Entity):
         if self.move_flag is True:
-            dest = check_nan(self.df[self.MOVETO_FIELD].loc[idx])
+            dest = self._value(idx, self.MOVETO_FIELD)
             if dest is not None:
                 if re.search("^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$", dest):
-                    dest_folder = self.entity.folder(dest)
+                    dest_folder = await _resolve(self.entity.folder(dest))
                     logger.info(f'Moving Entity: {ent.reference}, {ent.title}, to: {dest_folder.reference}, {dest_folder.title}')
                     if self.dummy_flag is False:
-                        self.entity.move_async(entity=ent, dest_folder=dest_folder)
+                        await _resolve(self.entity.move_async(entity=ent, dest_folder=dest_folder))
                 else:
                     logger.error(f'Reference: {ent.reference} in "Move To" is formatted incorrectly: {dest}')
                     raise ValueError(f'Reference: {ent.reference} in "Move To" is formatted incorrectly: {dest}')
@@ -973,56 +1697,122 @@ class PreservicaMassMod:
             logger.exception('Failed to delete entity')
             raise
 
-    def _process_descent(self,idx: int, descendant_ent: Entity, entity_type: EntityType):
+    def _descendant_payload(self, idx: Hashable) -> Dict[str, Any]:
         """
-        Process function for descendants, separated to avoid repetition.
+        Values applied to every descendant of a row: generated XML (as trees and serialized), identifiers, XIP fields and retention policy.
+        These depend only on the row, so are computed once per row and reused for each descendant.
         """
-        if self.descendants_flag is None:
-            logger.error('Descendants flag not set, cannot process descendants. Ensure you have selected at least 1 option for descendants processing.')
-            raise ValueError('Descendants flag not set, cannot process descendants. Ensure you have selected at least 1 option for descendants processing.')
-        if not any(x in ["include-xml","include-retention","include-description","include-security","include-title","include-identifiers"] for x in self.descendants_flag):
-            logger.error('No data to process. Ensure you select 1 option of data to edit')
-            raise ValueError('No data to process. Ensure you select 1 option of data to edit')
+        payload: Dict[str, Any] = {'xml': [], 'identifiers': None, 'xip': None, 'retention': None}
         if any(x in ["include-xml","include-all"] for x in self.descendants_flag) and self.metadata_flag is not None:
             xmls = self.generate_descriptive_metadata(idx, self.xml_files)
             if xmls is not None:                                
                 for x in xmls:
                     rawxnames = x.get('xnames')
-                    if isinstance(rawxnames, list):
-                        self.xnames = [x for x in rawxnames if isinstance(x, str)]
+                    xnames = [x for x in rawxnames if isinstance(x, str)] if isinstance(rawxnames, list) else []
                     ns = list(x.keys())[0]
                     xml_new = x.get(ns)
-                    if isinstance(xml_new, etree._ElementTree):
-                        self.xml_update(descendant_ent, ns, xml_new)
+                    if isinstance(xml_new, bytes):
+                        payload['xml'].append((ns, xml_new, xnames, xml_new))
+                    elif isinstance(xml_new, etree._ElementTree):
+                        payload['xml'].append((ns, xml_new, xnames, etree.tostring(xml_new)))
         if any(x in ["include-identifiers","include-all"] for x in self.descendants_flag):
-            self.ident_update(descendant_ent, self.ident_lookup(idx, self.IDENTIFIER_DEFAULT))
+            payload['identifiers'] = self.ident_lookup(idx, self.IDENTIFIER_DEFAULT)
         if any(x in ["include-all","include-title","include-description","include-security"] for x in self.descendants_flag):
+            title, description, security = self.xip_lookup(idx)
             if not "include-title" in self.descendants_flag:
                 title = None
             if not any(x in ["include-all","include-description"] for x in self.descendants_flag):
                 description = None
             if not any(x in ["include-all","include-security"] for x in self.descendants_flag):
                 security = None
+            payload['xip'] = (title, description, security)
+        if self.retention_flag is True and any(x in ["include-retention","include-all"] for x in self.descendants_flag):
+            payload['retention'] = self.retention_lookup(idx)
+        return payload
+
+    def _process_descent(self,idx: int, descendant_ent: Entity, entity_type: EntityType, payload: Optional[Dict[str, Any]] = None):
+        """
+        Process function for descendants, separated to avoid repetition.
+
+        :param payload: The row's descendant payload from _descendant_payload, computed if not given. Only the merge against each descendant's existing metadata is done per descendant.
+        """
+        if self.descendants_flag is None:
+            logger.error('Descendants flag not set, cannot process descendants. Ensure you have selected at least 1 option for descendants processing.')
+            raise ValueError('Descendants flag not set, cannot process descendants. Ensure you have selected at least 1 option for descendants processing.')
+        if not any(x in ["include-xml","include-retention","include-description","include-security","include-title","include-identifiers"] for x in self.descendants_flag):
+            logger.error('No data to process. Ensure you select 1 option of data to edit')
+            raise ValueError('No data to process. Ensure you select 1 option of data to edit')
+        if payload is None:
+            payload = self._descendant_payload(idx)
+        for ns, xml_new, xnames, xml_bytes in payload['xml']:
+            self.xml_update(descendant_ent, ns, xml_new, xnames=xnames, xml_bytes=xml_bytes)
+        if any(x in ["include-identifiers","include-all"] for x in self.descendants_flag):
+            self.ident_update(descendant_ent, payload['identifiers'])
+        if payload['xip'] is not None:
+            title, description, security = payload['xip']
             self.xip_update(descendant_ent,title=title,description=description,security=security)
         if entity_type == EntityType.ASSET and self.retention_flag is True and any(x in ["include-retention","include-all"] for x in self.descendants_flag):
-            self.retention_update(descendant_ent, self.retention_lookup(idx))
+            self.retention_update(descendant_ent, payload['retention'])
+
+    def _iter_descendants(self, folder: Entity):
+        """
+        Yields all descendants of a folder from the children listings, walking subfolders breadth first.
+
+        The next page, or the first page of the next folder, is requested in the background while the current page is processed.
+        """
+        folders = deque([folder.reference])
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='preservica_modify_descendants') as executor:
+            def _request(ref: str, next_page: Optional[str]) -> tuple[Future, str]:
+                return executor.submit(self.entity.children, ref, self.DESCENDANT_PAGE_SIZE, next_page), ref
+            request: Optional[tuple[Future, str]] = _request(folders.popleft(), None)
+            while request is not None:
+                future, ref = request
+                page = future.result()
+                for child in page.results:
+                    if child.entity_type == EntityType.FOLDER:
+                        folders.append(child.reference)
+                        self._remember_type(child.reference, "SO", persist=False, count=False)
+                    elif child.entity_type == EntityType.ASSET:
+                        self._remember_type(child.reference, "IO", persist=False, count=False)
+                if page.has_more:
+                    request = _request(ref, page.next_page)
+                elif folders:
+                    request = _request(folders.popleft(), None)
+                else:
+                    request = None
+                yield from page.results
 
     def _process_descendants(self, idx: int, ent: Entity):            
         """
         Descendants handling.
+
+        Descendants are taken from the children listings. Entity types which are not included are skipped before any fetch,
+        and the full entity is only fetched when the Title or Description is being saved, as saving writes back every XIP field,
+        or when XML or the Security Tag is being updated, as listed entities have no metadata map to update against and no tag to compare with.
         """
         if self.descendants_flag:
             if ent.entity_type == EntityType.FOLDER:
-                for ent_dir in self.entity.all_descendants(ent):
+                include_types = set()
+                if "include-assets" in self.descendants_flag:
+                    include_types.add(EntityType.ASSET)
+                if "include-folders" in self.descendants_flag:
+                    include_types.add(EntityType.FOLDER)
+                full_entity = any(x in ["include-all","include-title","include-description","include-security","include-xml"] for x in self.descendants_flag)
+                payload = None
+                for ent_dir in self._iter_descendants(ent):
                     if ent_dir.entity_type is None:
                         logger.info(f'No descendants found for entity: {ent.reference}')
                         continue
+                    if ent_dir.entity_type not in include_types:
+                        continue
                     logger.info(f"Processing Descendant: {ent_dir.reference}")
-                    descendant_ent = self.entity.entity(ent_dir.entity_type, ent_dir.reference)
-                    if "include-assets" in self.descendants_flag and descendant_ent.entity_type == EntityType.ASSET:
-                        self._process_descent(idx, descendant_ent, EntityType.ASSET)
-                    elif "include-folders" in self.descendants_flag and descendant_ent.entity_type == EntityType.FOLDER:
-                        self._process_descent(idx, descendant_ent, EntityType.FOLDER)
+                    if full_entity:
+                        descendant_ent = self.entity.entity(ent_dir.entity_type, ent_dir.reference)
+                    else:
+                        descendant_ent = ent_dir
+                    if payload is None:
+                        payload = self._descendant_payload(idx)
+                    self._process_descent(idx, descendant_ent, ent_dir.entity_type, payload=payload)
 
     def _process_upload_mode(self) -> None:
         try:
@@ -1052,7 +1842,8 @@ class PreservicaMassMod:
             raise
 
         try:
-            last_ref = None
+            # Carried between chunks when streaming.
+            last_ref = getattr(self, 'upload_last_ref', None)
             keys, start_pos = self._process_continue_token(data_dict)
 
             for idx in keys[start_pos:]:
@@ -1074,6 +1865,7 @@ class PreservicaMassMod:
                     PreservicaMassUpload('placeholder', spreadsheet_path=self.input_file).process_upload_row(idx, str(last_ref), str(upload_type))
                 else:
                     last_ref = PreservicaMassUpload('placeholder',spreadsheet_path=self.input_file).process_upload_row(idx, ref, str(upload_type))
+                    self.upload_last_ref = last_ref
         except KeyboardInterrupt:
             logger.warning('Process interrupted by user during upload mode, exiting...')
             if self.disable_continue is False:
@@ -1084,79 +1876,633 @@ class PreservicaMassMod:
             raise
 
 
-    def _process_continue_token(self, data_dict: dict) -> tuple[list[int], int]:
+    def _continue_start(self) -> Any:
+        """
+        Index to resume from, read from the continue token once per run. 0 when continue tokens are disabled.
+        """
         if self.disable_continue is True:
-            start_idx = 0
-        else:
-            start_idx = self._load_continue_token(self.input_file)
-            if not isinstance(start_idx, int):
-                logger.error(f'Invalid continue token: {start_idx}, must be an integer index. Please ensure the continue token file contains a valid integer index.')
-                raise ValueError(f'Invalid continue token: {start_idx}, must be an integer index. Please ensure the continue token file contains a valid integer index.')
-            keys = list(data_dict.keys())
-            if start_idx in keys:
-                start_pos = keys.index(start_idx)
-            else:
-                start_pos = max(0, int(start_idx))
+            return 0
+        start_idx = self.__dict__.get('continue_start')
+        if start_idx is None:
+            start_idx = self.continue_start = self._load_continue_token(self._token_file())
+        return start_idx
+
+    def _process_continue_token(self, data_dict: dict) -> tuple[list[int], int]:
+        start_idx = self._continue_start()
+        if not isinstance(start_idx, int):
+            logger.error(f'Invalid continue token: {start_idx}, must be an integer index. Please ensure the continue token file contains a valid integer index.')
+            raise ValueError(f'Invalid continue token: {start_idx}, must be an integer index. Please ensure the continue token file contains a valid integer index.')
         keys = list(data_dict.keys())
         if start_idx in keys:
             start_pos = keys.index(start_idx)
+        elif all(isinstance(key, int) for key in keys):
+            # Rows before the token may be missing from data_dict, when they belong to another shard or an earlier chunk,
+            # so resume from the first row at or after it.
+            start_pos = bisect.bisect_left(keys, start_idx)
         else:
             start_pos = max(0, int(start_idx))
         return keys, start_pos    
 
     def _process_rows(self, data_dict: dict) -> None:
+        if getattr(self, 'async_backend', False) is True:
+            self._process_rows_async(data_dict)
+            return
+        if getattr(self, 'pipeline', False) is True:
+            self._process_rows_pipelined(data_dict)
+            return
+        if getattr(self, 'workers', 1) > 1:
+            self._process_rows_concurrent(data_dict)
+            return
         try:
             keys, start_pos = self._process_continue_token(data_dict)
             for idx in keys[start_pos:]:
+                self._process_row(idx, data_dict.get(idx))
+        except KeyboardInterrupt:
+            logger.warning('Process interrupted by user, exiting...')
+            if self.disable_continue is False:
+                self._save_continue_token(self._token_file(), idx)
+            raise KeyboardInterrupt('Process interrupted by user, exiting...')
+        except Exception:
+            logger.exception('Error processing rows.')
+            raise
+
+    def _row_reference(self, idx: Hashable, reference_dict: Optional[dict]) -> Optional[tuple[str, Optional[str]]]:
+        """
+        Reference and document type of a row, or None if the row has no reference and should be skipped.
+        """
+        if reference_dict is not None:
+            if idx in getattr(self, 'noop_rows', ()):
+                logger.debug(f'Nothing to update for index: {idx}, skipping to next row.')
+                self._count('rows skipped (nothing to update)')
+                return None
+            ref = check_nan(reference_dict.get(self.ENTITY_REF))
+            if ref is None:
+                logger.warning(f'No reference found for index: {idx}, skipping to next row.')
+                return None
+            doc_type = check_nan(reference_dict.get(self.DOCUMENT_TYPE))
+            if doc_type is None:
+                logger.warning(f'No document type found for index: {idx}, attempting to retrieve entity without document type.')
+            return ref, doc_type
+        else:
+            logger.error(f'No data found for index: {idx}')
+            raise ValueError(f'No data found for index: {idx}')
+
+    def _process_row(self, idx: Hashable, reference_dict: Optional[dict]) -> None:
+        """
+        Processes a single row of the spreadsheet. All state for the row is kept local, so rows can be run concurrently.
+        """
+        row_ref = self._row_reference(idx, reference_dict)
+        if row_ref is None:
+            return
+        ref, doc_type = row_ref
+        logger.info(f"Processing Row Index: {idx}, Reference: {ref}")
+        ent = self._process_fetch_ent(ref, doc_type)
+        if ent is not None:
+            self._process_row_ent(ent, idx, reference_dict)
+            self._count('rows processed')
+        else:
+            logger.warning(f'Entity not found for reference {ref}, skipping to next row.')
+            self._count('entities not found')
+
+    def _process_rows_concurrent(self, data_dict: dict) -> None:
+        """
+        Runs rows on a bounded thread pool of self.workers threads.
+
+        At most workers * 2 rows are queued at once. Rows sharing an Entity Ref are never run at the same time,
+        the later row waits for the earlier one, so updates to the same entity are applied in spreadsheet order.
+        On interruption the continue token is set to the first row which has not completed.
+        """
+        keys, start_pos = self._process_continue_token(data_dict)
+        pending_keys = keys[start_pos:]
+        futures: Dict[Future, tuple[Hashable, Optional[str]]] = {}
+        ref_futures: Dict[str, Future] = {}
+        completed: set = set()
+
+        def _collect(return_when: str) -> None:
+            done, _ = wait(list(futures), return_when=return_when)
+            for future in done:
+                idx, ref = futures.pop(future)
+                if ref is not None and ref_futures.get(ref) is future:
+                    del ref_futures[ref]
+                future.result()
+                completed.add(idx)
+
+        logger.info(f'Processing {len(pending_keys)} rows with {self.workers} workers.')
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='preservica_modify')
+        try:
+            for idx in pending_keys:
+                while len(futures) >= self.workers * 2:
+                    _collect(FIRST_COMPLETED)
                 reference_dict = data_dict.get(idx)
-                if reference_dict is not None:
-                    ref = check_nan(reference_dict.get(self.ENTITY_REF))
-                    if ref is None:
-                        logger.warning(f'No reference found for index: {idx}, skipping to next row.')
-                        continue
-                    doc_type = check_nan(reference_dict.get(self.DOCUMENT_TYPE))
-                    if doc_type is None:
-                        logger.warning(f'No document type found for index: {idx}, attempting to retrieve entity without document type.')
-                else:
-                    logger.error(f'No data found for index: {idx}')
-                    raise ValueError(f'No data found for index: {idx}')
-                logger.info(f"Processing Row Index: {idx}, Reference: {ref}")
-                ent = self._process_fetch_ent(ref, doc_type)
-                if ent is not None:
-                    self._process_row_ent(ent, idx, reference_dict)
-                else:
-                    logger.warning(f'Entity not found for reference {ref}, skipping to next row.')
+                ref = check_nan(reference_dict.get(self.ENTITY_REF)) if reference_dict is not None else None
+                previous = ref_futures.get(ref) if ref is not None else None
+                if previous is not None and not previous.done():
+                    logger.debug(f'Reference: {ref} already in progress, waiting before processing index: {idx}')
+                    wait([previous])
+                future = executor.submit(self._process_row, idx, reference_dict)
+                futures[future] = (idx, ref)
+                if ref is not None:
+                    ref_futures[ref] = future
+            while futures:
+                _collect(FIRST_COMPLETED)
+            executor.shutdown(wait=True)
+        except KeyboardInterrupt:
+            logger.warning('Process interrupted by user, waiting for running rows to finish...')
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future, (idx, _) in futures.items():
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    completed.add(idx)
+            if self.disable_continue is False:
+                token = next((k for k in pending_keys if k not in completed), None)
+                self._save_continue_token(self._token_file(), token)
+            raise KeyboardInterrupt('Process interrupted by user, exiting...')
+        except Exception:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.exception('Error processing rows.')
+            raise
+
+    def _process_rows_pipelined(self, data_dict: dict) -> None:
+        """
+        Runs rows through three stages connected by bounded queues, so the GETs for later rows overlap the writes for earlier ones:
+
+        fetch (entity, existing identifiers and metadata) -> compute (lookups, XML generation and merging) -> write.
+
+        The fetch and write stages run on self.workers threads each, the compute stage on one thread. Each queue holds at most
+        max(4, workers * 2) rows, so memory stays flat on large inputs. A row is not fetched while an earlier row for the same
+        Entity Ref is still in the pipeline. On interruption the continue token is set to the first row which has not completed.
+        """
+        keys, start_pos = self._process_continue_token(data_dict)
+        pending_keys = keys[start_pos:]
+        workers = getattr(self, 'workers', 1)
+        size = max(4, workers * 2)
+        fetch_q: Queue = Queue(maxsize=size)
+        compute_q: Queue = Queue(maxsize=size)
+        write_q: Queue = Queue(maxsize=size)
+        completed: set = set()
+        errors: List[BaseException] = []
+        stop = threading.Event()
+        refs = threading.Condition()
+        in_flight: Counter = Counter()
+
+        def _finish(idx: Hashable, ref: Optional[str]) -> None:
+            with refs:
+                completed.add(idx)
+                if ref is not None:
+                    in_flight[ref] -= 1
+                    if in_flight[ref] <= 0:
+                        del in_flight[ref]
+                refs.notify_all()
+
+        def _fetch(idx: Hashable, reference_dict: Optional[dict], ref: Optional[str]) -> Optional[tuple]:
+            row_ref = self._row_reference(idx, reference_dict)
+            if row_ref is None:
+                return None
+            logger.info(f"Processing Row Index: {idx}, Reference: {ref}")
+            ent = self._process_fetch_ent(row_ref[0], row_ref[1])
+            if ent is None:
+                logger.warning(f'Entity not found for reference {ref}, skipping to next row.')
+                self._count('entities not found')
+                return None
+            return idx, ent, ref, self._prefetch_row(idx, ent)
+
+        def _compute(idx: Hashable, ent: Entity, ref: Optional[str], prefetched: Dict[str, Any]) -> tuple:
+            return idx, ent, ref, prefetched, self._compute_row(idx, ent, prefetched)
+
+        def _write(idx: Hashable, ent: Entity, ref: Optional[str], prefetched: Dict[str, Any], payload: Dict[str, Any]) -> None:
+            self._write_row(idx, ent, prefetched, payload)
+            self._count('rows processed')
+
+        def _stage(source: Queue, target: Optional[Queue], handler) -> None:
+            while True:
+                item = source.get()
+                if item is None:
+                    return
+                if stop.is_set():
+                    # Keep draining so earlier stages never block on a full queue.
                     continue
+                try:
+                    result = handler(*item)
+                except BaseException as e:
+                    errors.append(e)
+                    stop.set()
+                    with refs:
+                        refs.notify_all()
+                    continue
+                if result is None or target is None:
+                    _finish(item[0], item[2])
+                else:
+                    target.put(result)
+
+        def _start(count: int, source: Queue, target: Optional[Queue], handler) -> List[threading.Thread]:
+            threads = [threading.Thread(target=_stage, args=(source, target, handler), daemon=True, name=f'preservica_modify_{handler.__name__.strip("_")}_{i}') for i in range(count)]
+            for t in threads:
+                t.start()
+            return threads
+
+        def _shutdown() -> None:
+            for source, threads in ((fetch_q, fetchers), (compute_q, computers), (write_q, writers)):
+                for _ in threads:
+                    source.put(None)
+                for t in threads:
+                    t.join()
+
+        logger.info(f'Processing {len(pending_keys)} rows in a fetch, compute and write pipeline with {workers} workers per I/O stage.')
+        fetchers = _start(workers, fetch_q, compute_q, _fetch)
+        computers = _start(1, compute_q, write_q, _compute)
+        writers = _start(workers, write_q, None, _write)
+        try:
+            for idx in pending_keys:
+                if stop.is_set():
+                    break
+                reference_dict = data_dict.get(idx)
+                ref = check_nan(reference_dict.get(self.ENTITY_REF)) if reference_dict is not None else None
+                with refs:
+                    while ref is not None and in_flight[ref] > 0 and not stop.is_set():
+                        refs.wait()
+                    if ref is not None:
+                        in_flight[ref] += 1
+                fetch_q.put((idx, reference_dict, ref))
+            _shutdown()
+            if errors:
+                raise errors[0]
         except KeyboardInterrupt:
-            logger.warning('Process interrupted by user, exiting...')
+            logger.warning('Process interrupted by user, waiting for rows in the pipeline to finish...')
+            stop.set()
+            _shutdown()
             if self.disable_continue is False:
-                self._save_continue_token(self.input_file, idx)
+                token = next((k for k in pending_keys if k not in completed), None)
+                self._save_continue_token(self._token_file(), token)
             raise KeyboardInterrupt('Process interrupted by user, exiting...')
         except Exception:
+            stop.set()
             logger.exception('Error processing rows.')
             raise
 
+    def _prefetch_row(self, idx: Hashable, ent: Entity) -> Dict[str, Any]:
+        """
+        Fetch stage of the pipeline. Retrieves the entity's existing identifiers, when the row has any, and its existing metadata for each generated schema.
+        """
+        return _run_sync(self._hydrate_row_async(ent, self.ident_lookup(idx, self.IDENTIFIER_DEFAULT) is not None))
+
+    async def _hydrate_row_async(self, ent: Entity, identifiers: bool) -> Dict[str, Any]:
+        """
+        Fetches the state of an entity a row is compared against: its identifiers, if wanted, and its metadata for each schema
+        in xml_files the entity holds. Preservica has no single request returning an entity with its identifiers and metadata,
+        so these are requested together once the entity has been fetched, concurrently on an asynchronous transport.
+
+        :param identifiers: Whether to fetch the identifiers
+        :return: Identifiers (None if not fetched) and metadata by namespace
+        """
+        schemas: List[str] = []
+        if self.metadata_flag is not None and not self.upload_flag:
+            schemas = [ns for ns in (xml_file.get('local_ns') for xml_file in self.xml_files) if isinstance(ns, str)]
+        results = []
+        if identifiers:
+            results.append(self.entity.identifiers_for_entity(ent))
+        results.extend(self.entity.metadata_for_entity(ent, ns) for ns in schemas)
+        if any(inspect.isawaitable(result) for result in results):
+            results = await asyncio.gather(*(_resolve(result) for result in results))
+        results = list(results)
+        return {'identifiers': results.pop(0) if identifiers else None, 'metadata': dict(zip(schemas, results))}
+
+    def _compute_row(self, idx: Hashable, ent: Entity, prefetched: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compute stage of the pipeline. Runs the lookups and builds the merged XML for each schema, without calling Preservica.
+        """
+        payload: Dict[str, Any] = {'xip': None, 'identifiers': self.ident_lookup(idx, self.IDENTIFIER_DEFAULT), 'xml': []}
+        if any([self.title_flag, self.description_flag, self.security_flag]) is True:
+            payload['xip'] = self.xip_lookup(idx)
+        if self.metadata_flag is not None:
+            xmls = self.generate_descriptive_metadata(idx, self.xml_files)
+            if xmls is not None:
+                for x in xmls:
+                    rawxnames = x.get('xnames')
+                    xnames = [x for x in rawxnames if isinstance(x, str)] if isinstance(rawxnames, list) else []
+                    ns = list(x.keys())[0]
+                    xml_new = x.get(ns)
+                    if not isinstance(ns, str) or not isinstance(xml_new, (etree._ElementTree, bytes)):
+                        logger.warning(f'Invalid XML data retrieved for index {idx}. Skipping XML update for this file.')
+                        continue
+                    exists, xml_to_upload = self.xml_payload(ent, ns, prefetched['metadata'].get(ns), xml_new, xnames)
+                    payload['xml'].append((ns, exists, xml_to_upload))
+        if ent.entity_type == EntityType.ASSET and self.retention_flag is True:
+            payload['retention'] = self.retention_lookup(idx)
+        return payload
+
+    def _write_row(self, idx: Hashable, ent: Entity, prefetched: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        """
+        Write stage of the pipeline. Applies the row's updates in the same order as _process_row_ent.
+        """
+        if self.delete_flag is True:
+            delete_check = self.delete_update(idx, ent)
+            if delete_check is True:
+                return
+        if payload['xip'] is not None:
+            self.xip_update(ent, *payload['xip'])
+        self.ident_update(ent, payload['identifiers'], prefetched['identifiers'])
+        for ns, exists, xml_to_upload in payload['xml']:
+            self.xml_write(ent, ns, exists, xml_to_upload)
+        if 'retention' in payload:
+            self.retention_update(ent, payload['retention'])
+        self.move_update(idx, ent)
+        self._process_descendants(idx, ent)
+
+    def _process_rows_async(self, data_dict: dict) -> None:
+        """
+        Runs rows on the asyncio backend, using aiohttp against the Preservica REST API.
+        """
+        from preservica_modify.async_backend import AsyncPreservicaSession, credentials_from_file
+        if self.delete_flag is True or self.descendants_flag:
+            logger.error('The async backend does not support the delete or descendants options.')
+            raise ValueError('The async backend does not support the delete or descendants options.')
+        if self.credentials_file:
+            credentials = credentials_from_file(self.credentials_file)
+        else:
+            credentials = {'username': self.username, 'password': self.password, 'server': self.server, 'tenant': self.tenant}
+        session = AsyncPreservicaSession(server=str(credentials.get('server')),
+                                         username=credentials.get('username'),
+                                         password=credentials.get('password'),
+                                         tenant=credentials.get('tenant'),
+                                         max_in_flight=self.max_in_flight)
+        asyncio.run(self._run_rows_async(data_dict, session))
+
+    async def _run_rows_async(self, data_dict: dict, session: Any) -> None:
+        """
+        Processes rows with max_in_flight row tasks sharing one session. The async EntityAPI and RetentionAPI
+        replace self.entity and self.retention for the duration of the run.
+        """
+        from preservica_modify.async_backend import AsyncEntityAPI, AsyncRetentionAPI
+        keys, start_pos = self._process_continue_token(data_dict)
+        pending_keys = keys[start_pos:]
+        completed: set = set()
+        errors: List[BaseException] = []
+        queue: asyncio.Queue = asyncio.Queue(maxsize=session.max_in_flight * 2)
+        ref_locks: Dict[str, List[Any]] = {}
+
+        async def _worker() -> None:
+            while True:
+                idx = await queue.get()
+                try:
+                    if idx is None:
+                        return
+                    if errors:
+                        continue
+                    reference_dict = data_dict.get(idx)
+                    ref = check_nan(reference_dict.get(self.ENTITY_REF)) if reference_dict is not None else None
+                    if ref is None:
+                        await self._process_row_async(idx, reference_dict)
+                    else:
+                        # Rows sharing a reference are run one after another, in spreadsheet order.
+                        lock_count = ref_locks.setdefault(ref, [asyncio.Lock(), 0])
+                        lock_count[1] += 1
+                        try:
+                            async with lock_count[0]:
+                                await self._process_row_async(idx, reference_dict)
+                        finally:
+                            lock_count[1] -= 1
+                            if lock_count[1] == 0:
+                                del ref_locks[ref]
+                    completed.add(idx)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    queue.task_done()
+
+        sync_entity, sync_retention = getattr(self, 'entity', None), getattr(self, 'retention', None)
+        sync_limiter = getattr(self, 'limiter', None)
+        async with session:
+            self.limiter = AIMDLimiter(initial=min(session.max_in_flight, 4), maximum=session.max_in_flight)
+            self.entity = CachedEntityAPI(LimitedAPI(AsyncEntityAPI(session), self.limiter), self._entity_cache())
+            self.retention = LimitedAPI(AsyncRetentionAPI(session), self.limiter)
+            logger.info(f'Processing {len(pending_keys)} rows on the async backend with up to {session.max_in_flight} requests in flight.')
+            workers = [asyncio.create_task(_worker()) for _ in range(session.max_in_flight)]
+            try:
+                for idx in pending_keys:
+                    if errors:
+                        break
+                    await queue.put(idx)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+                if errors:
+                    raise errors[0]
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                logger.warning('Process interrupted by user, exiting...')
+                if self.disable_continue is False:
+                    token = next((k for k in pending_keys if k not in completed), None)
+                    self._save_continue_token(self._token_file(), token)
+                raise KeyboardInterrupt('Process interrupted by user, exiting...')
+            except Exception:
+                logger.exception('Error processing rows.')
+                raise
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                logger.info(f'Final concurrency limit: {self.limiter.limit}')
+                self.entity, self.retention, self.limiter = sync_entity, sync_retention, sync_limiter
+
+    async def _process_row_async(self, idx: Hashable, reference_dict: Optional[dict]) -> None:
+        row_ref = self._row_reference(idx, reference_dict)
+        if row_ref is None:
+            return
+        ref, doc_type = row_ref
+        logger.info(f"Processing Row Index: {idx}, Reference: {ref}")
+        ent = await self._process_fetch_ent_async(ref, doc_type)
+        if ent is not None:
+            await self._process_row_ent_async(ent, idx)
+            self._count('rows processed')
+        else:
+            logger.warning(f'Entity not found for reference {ref}, skipping to next row.')
+            self._count('entities not found')
+
+    async def _process_row_ent_async(self, ent: Entity, idx: Hashable) -> None:
+        """
+        Async counterpart of _process_row_ent. Row operations are applied in the same order.
+        """
+        idents = self.ident_lookup(idx, self.IDENTIFIER_DEFAULT)
+        hydrated = await self._hydrate_row_async(ent, idents is not None)
+        if any([self.title_flag, self.description_flag, self.security_flag]) is True:
+            title, description, security = self.xip_lookup(idx)
+            await self.xip_update_async(ent, title, description, security)
+        await self.ident_update_async(ent, idents, hydrated['identifiers'])
+        if self.metadata_flag is not None:
+            xmls = self.generate_descriptive_metadata(idx, self.xml_files)
+            if xmls is not None:
+                for x in xmls:
+                    rawxnames = x.get('xnames')
+                    xnames = [x for x in rawxnames if isinstance(x, str)] if isinstance(rawxnames, list) else []
+                    ns = list(x.keys())[0]
+                    xml_new = x.get(ns)
+                    if isinstance(ns, str) and isinstance(xml_new, (etree._ElementTree, bytes)):
+                        await self.xml_update_async(ent, ns, xml_new, xnames, metadata=hydrated['metadata'])
+        if ent.entity_type == EntityType.ASSET and self.retention_flag is True:
+            await self.retention_update_async(ent, self.retention_lookup(idx))
+        await self.move_update_async(idx, ent)
+
      # Setup for Local Definition of Entity?
     def _process_fetch_ent(self, ref: str, doc_type: Optional[str]) -> Optional[Entity]:
+        return _run_sync(self._process_fetch_ent_async(ref, doc_type))
+
+    async def _process_fetch_ent_async(self, ref: str, doc_type: Optional[str]) -> Optional[Entity]:
+        """
+        Fetches a row's entity. None if the reference is not found. Other errors, such as server errors or timeouts, are raised
+        rather than reported as a missing entity.
+        """
         try:
             if doc_type is not None:
-                if doc_type == "SO":
-                    ent = self.entity.folder(ref)
-                elif doc_type == "IO":
-                    ent = self.entity.asset(ref)
-                else:
-                    raise ValueError(f'Unsupported document type for reference {ref}: {doc_type}')
+                ent = await self._fetch_by_type(ref, doc_type)
+                self._remember_type(ref, doc_type, persist=False)
                 return ent
             else:
-                #This is a lazy lookup solution to the issue of not being able to determine if the entity is a folder or asset.
-                try:
-                    ent = self.entity.asset(ref)
-                except Exception:
-                    ent = self.entity.folder(ref)
-                return ent
+                # The type is taken from previous runs or descendant listings when known, otherwise the most common type
+                # so far is tried first, so most references need a single request. Only a not found response means the
+                # reference is of the other type.
+                known = self._entity_types().get(ref)
+                if known is not None:
+                    try:
+                        return await self._fetch_by_type(ref, known)
+                    except Exception as e:
+                        if not _not_found(e):
+                            raise
+                        logger.debug(f'Reference {ref} was a {known}, retrieving it without a document type.')
+                first = self._likely_type()
+                error: Optional[Exception] = None
+                for probe in (first, "SO" if first == "IO" else "IO"):
+                    if probe == known:
+                        continue
+                    try:
+                        ent = await self._fetch_by_type(ref, probe)
+                    except Exception as e:
+                        if not _not_found(e):
+                            raise
+                        error = e
+                        continue
+                    self._remember_type(ref, probe)
+                    return ent
+                raise error
         except Exception as e:
-            logger.warning(f'Error retrieving entity with reference {ref}: {e}, skipping to next row.')
+            if _not_found(e) or isinstance(e, ValueError):
+                logger.warning(f'Error retrieving entity with reference {ref}: {e}, skipping to next row.')
+                return None
+            logger.error(f'Error retrieving entity with reference {ref}: {e}')
+            raise
+
+    async def _fetch_by_type(self, ref: str, doc_type: str) -> Entity:
+        if doc_type == "SO":
+            return await _resolve(self.entity.folder(ref))
+        elif doc_type == "IO":
+            return await _resolve(self.entity.asset(ref))
+        else:
+            raise ValueError(f'Unsupported document type for reference {ref}: {doc_type}')
+
+    def _types_file(self) -> Optional[str]:
+        """
+        Types file saved to by this run. Each shard saves to its own, alongside its continue token, and _process_shards merges
+        them into the input's types file once the shards finish, so shards never write the same file.
+        """
+        if not getattr(self, 'input_file', None):
             return None
+        return f'{self._token_file()}_types.json'
+
+    def _entity_types(self) -> Dict[str, str]:
+        """
+        Map of references to their document type ("IO" or "SO"), loaded from the previous run's types file on first use.
+        """
+        with self._summary_lock:
+            types = self.__dict__.get('entity_types')
+            if types is None:
+                types = self.entity_types = self._load_entity_types()
+            return types
+
+    def _load_entity_types(self) -> Dict[str, str]:
+        """
+        Types from the input's types file, and from this shard's own types file if an earlier run of it was interrupted before merging.
+        """
+        if not getattr(self, 'input_file', None):
+            return {}
+        types = self._read_types(f'{self.input_file}_types.json')
+        if getattr(self, 'shard', None) is not None:
+            types.update(self._read_types(self._types_file()))
+        return types
+
+    @staticmethod
+    def _read_types(types_file: str) -> Dict[str, str]:
+        if not os.path.isfile(types_file):
+            return {}
+        try:
+            with open(types_file, 'r', encoding='utf-8') as f:
+                return {str(ref): doc_type for ref, doc_type in json.load(f).items() if doc_type in {"IO", "SO"}}
+        except Exception as e:
+            logger.warning(f'Unable to read entity types from {types_file}: {e}, looking types up again.')
+            return {}
+
+    @staticmethod
+    def _write_types(types_file: str, types: Dict[str, str]) -> bool:
+        """
+        Writes a types file, through a temporary file, so a partial file is never read. Returns whether it was written.
+        """
+        tmp_file = f'{types_file}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(types, f)
+            os.replace(tmp_file, types_file)
+            logger.info(f'Entity types saved to {types_file}')
+            return True
+        except Exception as e:
+            logger.warning(f'Unable to save entity types to {types_file}: {e}')
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return False
+
+    def _remember_type(self, ref: str, doc_type: str, persist: bool = True, count: bool = True) -> None:
+        """
+        Records a resolved type for the rest of the run, and for later runs when persist is set.
+
+        :param count: Whether the type counts towards the type tried first. Only rows count, so descendant listings don't decide the type for the rows.
+        """
+        types = self._entity_types()
+        with self._summary_lock:
+            if count:
+                self.__dict__.setdefault('type_counts', Counter())[doc_type] += 1
+            if types.get(ref) != doc_type:
+                types[ref] = doc_type
+                if persist:
+                    self.__dict__.setdefault('new_entity_types', {})[ref] = doc_type
+
+    def _likely_type(self) -> str:
+        counts = getattr(self, 'type_counts', None)
+        if counts and counts["SO"] > counts["IO"]:
+            return "SO"
+        return "IO"
+
+    def _save_entity_types(self) -> None:
+        """
+        Saves the types resolved this run, merged with the types file, so later runs can skip looking them up.
+        """
+        types_file = self._types_file()
+        with self._summary_lock:
+            new_types = self.__dict__.pop('new_entity_types', None)
+        if types_file is None or not new_types:
+            return
+        types = self._read_types(types_file)
+        types.update(new_types)
+        self._write_types(types_file, types)
+
+    def _merge_shard_types(self) -> None:
+        """
+        Merges the types files saved by each shard into the input's types file, and removes them.
+        """
+        shard_files = sorted(glob.glob(f'{glob.escape(self.input_file)}.shard*of*_types.json'))
+        if not shard_files:
+            return
+        types_file = f'{self.input_file}_types.json'
+        types = self._read_types(types_file)
+        for shard_file in shard_files:
+            types.update(self._read_types(shard_file))
+        if self._write_types(types_file, types):
+            for shard_file in shard_files:
+                os.remove(shard_file)
 
     # Instead of using lookups, can reference_dict be used directly?
     def _process_row_ent(self, ent: Entity, idx: int, reference_dict: Optional[dict] = None) -> None:
@@ -1164,53 +2510,178 @@ class PreservicaMassMod:
             delete_check = self.delete_update(idx, ent)
             if delete_check is True:
                 return
+        # Identifiers and existing metadata are fetched together up front, and served to the updates below.
+        idents = self.ident_lookup(idx, self.IDENTIFIER_DEFAULT)
+        hydrated = _run_sync(self._hydrate_row_async(ent, idents is not None))
         if any([self.title_flag, self.description_flag, self.security_flag]) is True:
             title, description, security = self.xip_lookup(idx)
             self.xip_update(ent,title,description,security)
-        self.ident_update(ent, self.ident_lookup(idx, self.IDENTIFIER_DEFAULT))
+        self.ident_update(ent, idents, xip_idents=hydrated['identifiers'])
         if self.metadata_flag is not None:
             xmls = self.generate_descriptive_metadata(idx, self.xml_files)
             if xmls is not None:                                
                 for x in xmls:
                     rawxnames = x.get('xnames')
-                    if isinstance(rawxnames, list):
-                        self.xnames = [x for x in rawxnames if isinstance(x, str)]
+                    xnames = [x for x in rawxnames if isinstance(x, str)] if isinstance(rawxnames, list) else []
                     ns = list(x.keys())[0]
                     if not isinstance(ns, str):
                         logger.warning(f'Invalid namespace retrieved for index {idx}, expected string but got {type(ns)}. Skipping XML update for this file.')
                         continue
                     xml_new = x.get(ns)
-                    if not isinstance(xml_new, etree._ElementTree):
-                        logger.warning(f'Invalid XML data retrieved for index {idx}, expected etree._ElementTree but got {type(xml_new)}. Skipping XML update for this file.')
+                    if not isinstance(xml_new, (etree._ElementTree, bytes)):
+                        logger.warning(f'Invalid XML data retrieved for index {idx}, expected etree._ElementTree or bytes but got {type(xml_new)}. Skipping XML update for this file.')
                         continue
-                    self.xml_update(ent, ns, xml_new)
+                    self.xml_update(ent, ns, xml_new, xnames=xnames, metadata=hydrated['metadata'])
         if ent.entity_type == EntityType.ASSET and self.retention_flag is True:
             self.retention_update(ent, self.retention_lookup(idx))
         self.move_update(idx, ent)
         self._process_descendants(idx, ent)
 
+    def _shard_of(self, ref: Any, shards: int) -> int:
+        """
+        Shard for an Entity Ref. Uses crc32 so the result is stable across processes and runs.
+        """
+        ref = check_nan(ref)
+        if ref is None:
+            return 0
+        return zlib.crc32(str(ref).encode('utf-8')) % shards
+
+    def _shard_rows(self, data_dict: dict) -> dict:
+        """
+        Keeps only the rows belonging to this process's shard. All rows for an Entity Ref land in the same shard.
+        """
+        shard, shards = self.shard
+        data_dict = {idx: row for idx, row in data_dict.items() if self._shard_of(row.get(self.ENTITY_REF), shards) == shard}
+        logger.info(f'Shard {shard + 1} of {shards}: {len(data_dict)} rows.')
+        return data_dict
+
+    def _shard_kwargs(self) -> dict:
+        """
+        Arguments used to rebuild this instance in a worker process. Passwords are already resolved, so workers never prompt.
+        """
+        return {'input_file': self.input_file,
+                'metadata_dir': self.metadata_dir,
+                'blank_override': self.blank_override,
+                'upload_mode': self.upload_flag,
+                'metadata': self.metadata_flag,
+                'descendants': self.descendants_flag,
+                'dummy': self.dummy_flag,
+                'username': self.username,
+                'password': self.password,
+                'manager_username': self.manager_username,
+                'manager_password': self.manager_password,
+                'server': self.server,
+                'tenant': self.tenant,
+                'credentials': self.credentials_file,
+                'delete': self.delete_flag,
+                'use_keyring': False,
+                'disable_continue': self.disable_continue,
+                'column_sensitivity': self.column_sensitivity,
+                'workers': self.workers,
+                'async_backend': self.async_backend,
+                'max_in_flight': self.max_in_flight,
+                'pipeline': self.pipeline,
+                'chunk_size': self.chunk_size,
+                'cache_input': self.cache_input,
+                'compiled_metadata': self.compiled_metadata,
+                'options_file': self.options_file}
+
+    def _process_shards(self) -> None:
+        """
+        Splits the rows by a hash of the Entity Ref and runs each shard in its own process, then merges the shard summaries.
+
+        Each shard logs in separately and keeps its own continue token, so an interrupted run resumes every shard where it stopped.
+        """
+        if not self.credentials_file:
+            self._resolve_passwords()
+        init_kwargs = self._shard_kwargs()
+        log_config = _log_config()
+        logger.info(f'Processing {self.input_file} in {self.processes} processes.')
+        summary: Counter = Counter()
+        errors: List[BaseException] = []
+        executor = ProcessPoolExecutor(max_workers=self.processes)
+        try:
+            futures = {executor.submit(_run_shard, init_kwargs, i, self.processes, log_config): i for i in range(self.processes)}
+            for future in futures:
+                try:
+                    summary.update(future.result())
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    logger.error(f'Shard {futures[future] + 1} of {self.processes} failed: {e}')
+                    errors.append(e)
+            executor.shutdown(wait=True)
+        except KeyboardInterrupt:
+            logger.warning('Process interrupted by user, waiting for shards to save their continue tokens...')
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise KeyboardInterrupt('Process interrupted by user, exiting...')
+        finally:
+            self._merge_shard_types()
+        with self._summary_lock:
+            self.summary = summary
+        self._log_summary(summary)
+        if errors:
+            raise errors[0]
+        logger.info('Process completed.')
+
     def main(self):
         """
         Main loop.
         """
+        self.__dict__.pop('continue_start', None)
         try:
-            self.init_df()
+            if getattr(self, 'processes', 1) > 1 and getattr(self, 'shard', None) is None:
+                if self.upload_flag is True:
+                    logger.warning('Upload mode does not support multiple processes, running in a single process.')
+                else:
+                    self._process_shards()
+                    return
+            chunks = None
+            if getattr(self, 'chunk_size', None) is not None:
+                chunks = self._iter_chunks(self._project_columns())
+                first = next(chunks, None)
+                if first is None:
+                    logger.warning(f'No rows found in {self.input_file}, nothing to process.')
+                    return
+                self._init_headers(list(first.columns))
+                chunks = itertools.chain([first], chunks)
+            else:
+                self.init_df()
             self._set_input_flags()
             self.login_preservica()
-            if self.metadata_flag is not None:
+            if self.metadata_flag is not None and getattr(self, 'xml_files', None) is None:
                 self.init_generate_descriptive_metadata()
             if self.retention_flag is True:
                 self.get_retentions()
+                self._prepare_retentions()
             if self.upload_flag is True:
-                self._process_upload_mode()
+                if chunks is not None:
+                    self._process_stream(chunks)
+                else:
+                    self._process_upload_mode()
                 self._remove_continue_token(self.input_file)
                 return
-            if self.DOCUMENT_TYPE in self.column_headers:
-                data_dict = self.df[[self.ENTITY_REF, self.DOCUMENT_TYPE]].to_dict(orient='index')
-            else:
-                data_dict = self.df[[self.ENTITY_REF]].to_dict(orient='index')
-            self._process_rows(data_dict)
-            self._remove_continue_token(self.input_file)
+            try:
+                if chunks is not None:
+                    self._process_stream(chunks)
+                else:
+                    self._mark_noop_rows()
+                    if getattr(self, 'rows', None) is not None:
+                        data_dict = self.rows
+                    elif self.DOCUMENT_TYPE in self.column_headers:
+                        data_dict = self.df[[self.ENTITY_REF, self.DOCUMENT_TYPE]].to_dict(orient='index')
+                    else:
+                        data_dict = self.df[[self.ENTITY_REF]].to_dict(orient='index')
+                    if getattr(self, 'shard', None) is not None:
+                        data_dict = self._shard_rows(data_dict)
+                    self._process_rows(data_dict)
+            finally:
+                self._save_entity_types()
+            self._remove_continue_token(self._token_file())
+            if getattr(self, 'limiter', None) is not None and getattr(self, 'workers', 1) > 1:
+                logger.info(f'Final concurrency limit: {self.limiter.limit}')
+            self._count_cache()
+            self._log_summary()
             logger.info('Process completed.')
         except KeyError as e:
             logger.exception(f'Key Error: {e}.')
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from preservica_modify.async_backend import AsyncEntityAPI, AsyncPreservicaSession, AsyncRetentionAPI
+from preservica_modify.pres_modify import PreservicaMassMod
+
+XIP = "http://preservica.com/XIP/v7.0"
+ENT = "http://preservica.com/EntityAPI/v7.0"
+
+
+class MockPreservica(BaseHTTPRequestHandler):
+    requests: list = []
+    base_url = ""
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: str = "", content_type: str = "application/xml") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _record(self) -> str:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        MockPreservica.requests.append((self.command, self.path.split("?")[0], body))
+        return body
+
+    def do_POST(self):
+        self._record()
+        if self.path == "/api/accesstoken/login":
+            self._send(200, '{"token": "token-1"}', "application/json")
+        else:
+            self._send(200, f"<Identifier xmlns='{XIP}'><ApiId>2</ApiId></Identifier>")
+
+    def do_GET(self):
+        self._record()
+        with MockPreservica.lock:
+            MockPreservica.active += 1
+            MockPreservica.max_active = max(MockPreservica.max_active, MockPreservica.active)
+        time.sleep(0.01)
+        with MockPreservica.lock:
+            MockPreservica.active -= 1
+        if self.path == "/api/entity/information-objects/ref-1":
+            self._send(200, f"""<EntityResponse xmlns="{ENT}" xmlns:xip="{XIP}">
+                <xip:InformationObject><xip:Ref>ref-1</xip:Ref><xip:Title>Old Title</xip:Title>
+                <xip:Description>Old Description</xip:Description><xip:SecurityTag>open</xip:SecurityTag>
+                <xip:Parent>parent-1</xip:Parent></xip:InformationObject>
+                <AdditionalInformation><Metadata>
+                <Fragment schema="urn:test">{self.base_url}/api/entity/information-objects/ref-1/metadata/m-1</Fragment>
+                </Metadata></AdditionalInformation></EntityResponse>""")
+        elif self.path == "/api/entity/information-objects/ref-1/identifiers":
+            self._send(200, f"""<IdentifiersResponse xmlns="{ENT}" xmlns:xip="{XIP}"><Identifiers>
+                <xip:Identifier><xip:ApiId>1</xip:ApiId><xip:Type>code</xip:Type><xip:Value>OLD</xip:Value>
+                <xip:Entity>ref-1</xip:Entity></xip:Identifier></Identifiers></IdentifiersResponse>""")
+        elif self.path == "/api/entity/information-objects/ref-1/metadata/m-1":
+            self._send(200, f"""<MetadataResponse xmlns="{ENT}" xmlns:xip="{XIP}"><xip:MetadataContainer schemaUri="urn:test">
+                <xip:Ref>m-1</xip:Ref><xip:Entity>ref-1</xip:Entity><xip:Content>
+                <dc:record xmlns:dc="urn:test"><dc:title>old</dc:title></dc:record>
+                </xip:Content></xip:MetadataContainer></MetadataResponse>""")
+        else:
+            self._send(404)
+
+    def do_PUT(self):
+        self._record()
+        if self.path.endswith("/security-descriptor?includeDescendants=false"):
+            self._send(202, "progress-1", "text/plain")
+        else:
+            self._send(200, "<ok/>")
+
+
+@pytest.fixture()
+def mock_server():
+    MockPreservica.requests = []
+    MockPreservica.max_active = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockPreservica)
+    host = f"127.0.0.1:{server.server_address[1]}"
+    MockPreservica.base_url = f"http://{host}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield host
+    server.shutdown()
+
+
+def make_session(host: str, max_in_flight: int = 4) -> AsyncPreservicaSession:
+    return AsyncPreservicaSession(server=host, username="user", password="pw", max_in_flight=max_in_flight, protocol="http")
+
+
+def make_instance() -> PreservicaMassMod:
+    instance = PreservicaMassMod.__new__(PreservicaMassMod)
+    instance.ENTITY_REF = "Entity Ref"
+    instance.DOCUMENT_TYPE = "Document type"
+    instance.TITLE_FIELD = "Title"
+    instance.DESCRIPTION_FIELD = "Description"
+    instance.SECURITY_FIELD = "Security"
+    instance.IDENTIFIER_FIELD = "Identifier"
+    instance.ARCREF_FIELD = "Archive_Reference"
+    instance.ACCREF_FIELD = "Accession_Reference"
+    instance.ACCREF_CODE = "accref"
+    instance.IDENTIFIER_DEFAULT = "code"
+    instance.disable_continue = True
+    instance.input_file = "input.csv"
+    instance.dummy_flag = False
+    instance.blank_override = False
+    instance.upload_flag = False
+    instance.title_flag = True
+    instance.description_flag = False
+    instance.security_flag = True
+    instance.retention_flag = False
+    instance.move_flag = False
+    instance.metadata_flag = None
+    instance.df = pd.DataFrame({"Entity Ref": ["ref-1"], "Document type": ["IO"], "Title": ["New Title"],
+                                "Security": ["closed"], "Identifier": ["NEW"]})
+    instance.column_headers = list(instance.df.columns)
+    return instance
+
+
+def test_async_row_applies_xip_and_identifier_updates(mock_server) -> None:
+    instance = make_instance()
+    data_dict = {0: {"Entity Ref": "ref-1", "Document type": "IO"}}
+
+    asyncio.run(instance._run_rows_async(data_dict, make_session(mock_server)))
+
+    calls = [(method, path) for method, path, _ in MockPreservica.requests]
+    assert ("GET", "/api/entity/information-objects/ref-1") in calls
+    assert ("PUT", "/api/entity/information-objects/ref-1/security-descriptor") in calls
+    assert ("PUT", "/api/entity/information-objects/ref-1/identifiers/1") in calls
+    assert calls.count(("GET", "/api/entity/information-objects/ref-1/identifiers")) == 1
+    saved = [body for method, path, body in MockPreservica.requests if (method, path) == ("PUT", "/api/entity/information-objects/ref-1")]
+    assert len(saved) == 1
+    assert "<Title>New Title</Title>" in saved[0]
+
+
+def test_async_entity_api_metadata_roundtrip(mock_server) -> None:
+    async def run():
+        async with make_session(mock_server) as session:
+            api = AsyncEntityAPI(session)
+            ent = await api.asset("ref-1")
+            existing = await api.metadata_for_entity(ent, "urn:test")
+            await api.update_metadata(ent, "urn:test", existing.replace("old", "new"))
+            return ent, existing
+
+    ent, existing = asyncio.run(run())
+
+    assert ent.title == "Old Title"
+    assert ent.parent == "parent-1"
+    assert "<dc:title>old</dc:title>" in existing
+    put_body = [body for method, path, body in MockPreservica.requests if path.endswith("/metadata/m-1") and method == "PUT"][0]
+    assert "<dc:title>new</dc:title>" in put_body
+    assert "<xip:Ref>m-1</xip:Ref>" in put_body
+
+
+def test_async_session_caps_requests_in_flight(mock_server) -> None:
+    async def run():
+        async with make_session(mock_server, max_in_flight=2) as session:
+            api = AsyncEntityAPI(session)
+            return await asyncio.gather(*[api.asset("ref-1") for _ in range(10)])
+
+    entities = asyncio.run(run())
+
+    assert len(entities) == 10
+    assert 1 <= MockPreservica.max_active <= 2
+
+
+def test_async_retention_assignments_are_removed_from_the_entitys_own_path() -> None:
+    from pyPreservica import Folder
+
+    class FakeSession:
+        base_url = "https://host"
+        requests = []
+
+        async def request(self, method, url, method_name, reference=None, **kwargs):
+            self.requests.append((method, url))
+            return (b"<RetentionAssignments xmlns='http://preservica.com/RetentionManagement/v6.2'><RetentionAssignment>"
+                    b"<Entity>so-1</Entity><RetentionPolicy>p-1</RetentionPolicy><ApiId>7</ApiId></RetentionAssignment>"
+                    b"</RetentionAssignments>")
+
+    async def run():
+        api = AsyncRetentionAPI(FakeSession())
+        for assignment in await api.assignments(Folder("so-1", "Title", None, "open", None, {})):
+            await api.remove_assignments(assignment)
+
+    asyncio.run(run())
+
+    assert FakeSession.requests[-1] == ("DELETE", "https://host/api/entity/structural-objects/so-1/retention-assignments/7")
@@ -58,6 +58,14 @@ def make_args(**overrides) -> argparse.Namespace:
         "upload_mode": False,
         "options_file": "options.properties",
         "column_sensitivity": False,
+        "workers": 1,
+        "async_backend": False,
+        "max_in_flight": 50,
+        "processes": 1,
+        "pipeline": False,
+        "compiled_metadata": False,
+        "chunk_size": None,
+        "cache_input": False,
     }
     base.update(overrides)
     return argparse.Namespace(**base)
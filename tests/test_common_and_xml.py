@@ -1,8 +1,9 @@
 from pathlib import Path
 
+import pandas as pd
 from lxml import etree
 
-from preservica_modify.common import check_bool, check_nan
+from preservica_modify.common import RowStore, bool_column, check_bool, check_nan, date_column
 from preservica_modify.pres_modify import PreservicaMassMod
 
 
@@ -32,6 +33,32 @@ def test_check_bool_falsey_values() -> None:
     assert check_bool("0") is False
 
 
+def test_row_store_normalises_cells_and_maps_rows() -> None:
+    df = pd.DataFrame({"Entity Ref": ["ref-1", "ref-2", "ref-3"],
+                       "Title": ["Same", "", None],
+                       "Date": pd.to_datetime(["2020-01-01", None, "2021-02-03"])}, index=[5, 6, 7])
+    rows = RowStore(df)
+
+    assert list(rows) == [5, 6, 7]
+    assert rows[6].get("Entity Ref") == "ref-2"
+    assert rows[6].get("Title") is None
+    assert rows[7]["Title"] is None
+    assert rows.value(6, "Date") is None
+    assert rows.value(5, "Date") == pd.Timestamp("2020-01-01")
+    assert rows[5].get("Missing", "default") == "default"
+    assert dict(rows.items())[7].idx == 7
+
+
+def test_column_normalisation_matches_cell_checks() -> None:
+    flags = pd.Series(["Yes", "no", None, True, 1])
+    assert bool_column(flags).tolist() == [check_bool(value) for value in flags]
+
+    assert date_column(pd.Series(["2020-01-02", None, "2021-03-04T05:06:07"])).tolist() == \
+        ["2020-01-02T00:00:00.000Z", None, "2021-03-04T05:06:07.000Z"]
+    assert date_column(pd.Series(["02/01/2020", "2021-03-04"])).tolist() == \
+        ["2020-02-01T00:00:00.000Z", "2021-03-04T00:00:00.000Z"]
+
+
 def test_xml_merge_overwrites_existing_text() -> None:
     instance = make_instance()
     xml_a = etree.fromstring("<root><title>old</title></root>")
@@ -77,6 +104,17 @@ def test_xml_merge_blank_override_ignores_non_whitelisted_tag() -> None:
     assert merged.find("./title").text == "old"
 
 
+def test_xml_merge_matches_repeated_siblings_in_order() -> None:
+    instance = make_instance()
+    xml_a = etree.fromstring("<ead><c><title>one</title></c><c><title>two</title><date>1900</date></c></ead>")
+    xml_b = etree.fromstring("<ead><c><title/></c><c><title>TWO</title></c><c><title>three</title></c></ead>")
+
+    merged = instance.xml_merge(xml_a, xml_b)
+
+    assert [c.findtext("title") for c in merged.findall("c")] == ["one", "TWO", "three"]
+    assert merged.findall("c")[1].findtext("date") == "1900"
+
+
 def test_save_load_and_remove_continue_token(tmp_path: Path) -> None:
     instance = make_instance()
     token_base = str(tmp_path / "input.csv")
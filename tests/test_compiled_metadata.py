@@ -0,0 +1,63 @@
+import os
+import random
+
+import pandas as pd
+import pytest
+from lxml import etree
+
+from preservica_modify.pres_modify import PreservicaMassMod
+
+METADATA_DIR = os.path.join(os.path.dirname(__file__), "..", "preservica_modify", "metadata")
+VALUES = [None, "", "plain", "a & b < c > d", "quote \" and ' apostrophe", "line\r\nbreak\ttab", "café \U0001F600", " padded ", 42, 3.5]
+
+
+def make_instance(metadata_flag: str, template: str, compiled: bool, rows: int = 25) -> PreservicaMassMod:
+    parsed = etree.parse(os.path.join(METADATA_DIR, template))
+    root_ln = etree.QName(parsed.getroot()).localname
+    headers = []
+    for elem in parsed.findall(".//"):
+        if not isinstance(elem.tag, str):
+            continue
+        qname = etree.QName(elem)
+        if metadata_flag == "flat":
+            headers.append(f"{root_ln}:{qname.localname}")
+        else:
+            headers.append(parsed.getelementpath(elem).replace(f"{{{qname.namespace}}}", root_ln + ":"))
+    rng = random.Random(template + metadata_flag)
+    headers = list(dict.fromkeys(headers))
+    df = pd.DataFrame({h: [rng.choice(VALUES) for _ in range(rows)] for h in headers})
+
+    instance = PreservicaMassMod.__new__(PreservicaMassMod)
+    instance.df = df
+    instance.column_headers = headers
+    instance.metadata_flag = metadata_flag
+    instance.compiled_metadata = compiled
+    instance.metadata_dir = METADATA_DIR
+    return instance
+
+
+@pytest.mark.parametrize("metadata_flag", ["exact", "flat"])
+@pytest.mark.parametrize("template", sorted(f for f in os.listdir(METADATA_DIR) if f.endswith(".xml")))
+def test_compiled_templates_match_lxml_output(metadata_flag: str, template: str) -> None:
+    lxml_mod = make_instance(metadata_flag, template, compiled=False)
+    compiled_mod = make_instance(metadata_flag, template, compiled=True)
+    lxml_mod.metadata_dir = compiled_mod.metadata_dir = METADATA_DIR
+    lxml_files = [f for f in lxml_mod.init_generate_descriptive_metadata() if os.path.basename(f["xml_file"]) == template]
+    compiled_files = [f for f in compiled_mod.init_generate_descriptive_metadata() if os.path.basename(f["xml_file"]) == template]
+    assert "compiled" in compiled_files[0]
+
+    for idx in lxml_mod.df.index:
+        expected = lxml_mod.generate_descriptive_metadata(idx, lxml_files)[0]
+        actual = compiled_mod.generate_descriptive_metadata(idx, compiled_files)[0]
+        ns = lxml_files[0]["local_ns"]
+        assert actual[ns] == etree.tostring(expected[ns])
+        assert actual["xnames"] == expected["xnames"]
+
+
+def test_compiled_template_falls_back_to_lxml_for_invalid_characters() -> None:
+    instance = make_instance("flat", "DublinCore Template.xml", compiled=True, rows=1)
+    instance.df.iloc[0, 0] = "bad \x01 value"
+    xml_files = instance.init_generate_descriptive_metadata()
+
+    with pytest.raises(ValueError):
+        instance.generate_descriptive_metadata(0, xml_files)
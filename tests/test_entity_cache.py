@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from preservica_modify.entity_cache import CachedEntityAPI, EntityCache
+
+
+class FakeAPI:
+    def __init__(self):
+        self.calls = []
+
+    def folder(self, ref):
+        self.calls.append(("folder", ref))
+        return SimpleNamespace(reference=ref, title=f"Folder {ref}", parent="root")
+
+    def children(self, ref, maximum=100, next_page=None):
+        self.calls.append(("children", ref))
+        return [ref + "-child"]
+
+    def identifiers_for_entity(self, ent):
+        self.calls.append(("identifiers", ent.reference))
+        return set()
+
+    def save(self, ent):
+        self.calls.append(("save", ent.reference))
+        return ent
+
+
+def test_cached_reads_share_requests_and_hand_out_copies() -> None:
+    api = FakeAPI()
+    cache = EntityCache()
+    cached = CachedEntityAPI(api, cache)
+
+    first = cached.folder("f-1")
+    first.title = "Changed locally"
+    second = cached.folder("f-1")
+    cached.identifiers_for_entity(second)
+    cached.identifiers_for_entity(second)
+
+    assert second.title == "Folder f-1"
+    assert api.calls == [("folder", "f-1"), ("identifiers", "f-1"), ("identifiers", "f-1")]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_writes_invalidate_entity_and_parent_listing() -> None:
+    api = FakeAPI()
+    cached = CachedEntityAPI(api, EntityCache())
+
+    ent = cached.folder("f-1")
+    cached.children("root", 100, None)
+    cached.children("f-2", 100, None)
+    cached.save(ent)
+    cached.folder("f-1")
+    cached.children("root", 100, None)
+    cached.children("f-2", 100, None)
+
+    assert api.calls.count(("folder", "f-1")) == 2
+    assert api.calls.count(("children", "root")) == 2
+    assert api.calls.count(("children", "f-2")) == 1
+
+
+def test_cache_evicts_least_recently_used_and_expired_entries() -> None:
+    cache = EntityCache(maxsize=2, ttl=60)
+    cache.put("a", 1, ["a"])
+    cache.put("b", 2, ["b"])
+    assert cache.get("a") == 1
+    cache.put("c", 3, ["c"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    expired = EntityCache(ttl=0)
+    expired.put("a", 1, ["a"])
+    assert expired.get("a") is None
+
+
+def test_async_reads_are_cached() -> None:
+    calls = []
+
+    class AsyncAPI:
+        async def asset(self, ref):
+            calls.append(ref)
+            return SimpleNamespace(reference=ref, parent=None)
+
+    async def run():
+        cached = CachedEntityAPI(AsyncAPI(), EntityCache())
+        return [await cached.asset("a-1"), await cached.asset("a-1")]
+
+    entities = asyncio.run(run())
+
+    assert calls == ["a-1"]
+    assert entities[0] is not entities[1]
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from pyPreservica.common import HTTPException
+
+from preservica_modify.limiter import AIMDLimiter, LimitedAPI, status_code
+
+
+class FakeAPI:
+    def __init__(self, failures=0, status=429):
+        self.failures = failures
+        self.status = status
+        self.calls = 0
+
+    def asset(self, ref):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise HTTPException(ref, self.status, "url", "asset", "busy")
+        return ref
+
+
+def test_limiter_increases_while_latency_flat_and_halves_on_throttle() -> None:
+    limiter = AIMDLimiter(initial=2, maximum=10)
+    for _ in range(20):
+        limiter.release(limiter.acquire())
+    assert limiter.limit > 2
+
+    raised = limiter.limit
+    started = limiter.acquire()
+    limiter.release(started, HTTPException("ref", 503, "url", "asset", "busy"))
+    assert limiter.limit == max(1, int(raised * 0.5))
+
+    # A call started before the decrease does not cut the limit again.
+    limiter.release(limiter.acquire() - 60, RuntimeError(500, "error"))
+    assert limiter.limit == max(1, int(raised * 0.5))
+
+
+def test_limited_api_retries_throttled_calls(monkeypatch) -> None:
+    monkeypatch.setattr("preservica_modify.limiter.time.sleep", lambda _: None)
+    api = FakeAPI(failures=2)
+    limited = LimitedAPI(api, AIMDLimiter(initial=4, maximum=4))
+
+    assert limited.asset("ref-1") == "ref-1"
+    assert api.calls == 3
+    assert limited._limiter.in_flight == 0
+
+    api = FakeAPI(failures=1, status=404)
+    with pytest.raises(HTTPException):
+        LimitedAPI(api, AIMDLimiter()).asset("ref-1")
+    assert api.calls == 1
+    assert status_code(RuntimeError(404, "not found")) == 404
+
+
+def test_limited_api_caps_async_calls_in_flight() -> None:
+    limiter = AIMDLimiter(initial=2, maximum=2)
+    active = []
+
+    class AsyncAPI:
+        async def asset(self, ref):
+            active.append(limiter.in_flight)
+            await asyncio.sleep(0.01)
+            return ref
+
+    async def run():
+        api = LimitedAPI(AsyncAPI(), limiter)
+        return await asyncio.gather(*[api.asset(i) for i in range(10)])
+
+    assert asyncio.run(run()) == list(range(10))
+    assert max(active) <= 2
+    assert limiter.in_flight == 0
+
+
+def test_default_run_limit_can_rise_above_one() -> None:
+    from preservica_modify.pres_modify import PreservicaMassMod
+
+    instance = PreservicaMassMod.__new__(PreservicaMassMod)
+    instance.workers = 1
+    instance.descendants_flag = {"include-assets", "include-xml"}
+    instance.entity = FakeAPI()
+    instance.retention = object()
+    instance._limit_apis()
+
+    for _ in range(20):
+        instance.limiter.release(instance.limiter.acquire())
+
+    assert instance.limiter.maximum == 2
+    assert instance.limiter.limit == 2
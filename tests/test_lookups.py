@@ -133,16 +133,39 @@ def test_retention_lookup_returns_none_when_flag_disabled() -> None:
     assert value is None
 
 
-def test_xip_lookup_raises_runtime_error_without_dataframe() -> None:
+def test_xip_lookup_raises_runtime_error_without_rows_or_dataframe() -> None:
     instance = PreservicaMassMod.__new__(PreservicaMassMod)
     instance.title_flag = True
     instance.description_flag = False
     instance.security_flag = False
     instance.TITLE_FIELD = "Title"
+    instance.rows = None
+    instance.df = None
 
     try:
         instance.xip_lookup(0)
     except RuntimeError:
         pass
     else:
-        raise AssertionError("Expected RuntimeError when dataframe is not initialized")
+        raise AssertionError("Expected RuntimeError when neither rows nor dataframe are initialized")
+
+
+def test_ident_plan_maps_headers_to_keys_once() -> None:
+    df = pd.DataFrame(
+        {
+            "Title": ["T"],
+            "Identifier:local": ["LOC-3"],
+            "Archive_Reference": ["ARC-3"],
+            "Accession_Reference": ["ACC-3"],
+        }
+    )
+    instance = make_instance(df)
+    instance.ident_plan = instance._ident_plan()
+
+    assert instance.ident_plan == [
+        ("Identifier:local", "local"),
+        ("Archive_Reference", None),
+        ("Accession_Reference", "accref"),
+    ]
+    instance.column_headers = []
+    assert instance.ident_lookup(0, default_key="custom") == {"local": "LOC-3", "custom": "ARC-3", "accref": "ACC-3"}
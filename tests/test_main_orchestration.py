@@ -1,19 +1,29 @@
 import pandas as pd
+import pytest
 
+from preservica_modify.common import RowStore
 from preservica_modify.pres_modify import PreservicaMassMod
 
 
 def make_instance() -> PreservicaMassMod:
     instance = PreservicaMassMod.__new__(PreservicaMassMod)
+    instance.parse_config(options_file="missing.properties")
     instance.input_file = "input.csv"
-    instance.ENTITY_REF = "Entity Ref"
-    instance.DOCUMENT_TYPE = "Document type"
     instance.metadata_flag = None
     instance.retention_flag = False
     instance.upload_flag = False
+    instance.delete_flag = False
+    instance.blank_override = False
+    instance.title_flag = instance.description_flag = instance.security_flag = instance.move_flag = False
     return instance
 
 
+def load_rows(instance: PreservicaMassMod, df: pd.DataFrame) -> None:
+    instance.df = None
+    instance.rows = RowStore(df)
+    instance.column_headers = list(df.columns)
+
+
 def test_main_upload_mode_short_circuit() -> None:
     instance = make_instance()
     calls = []
@@ -41,14 +51,17 @@ def test_main_calls_metadata_and_retention_initializers() -> None:
     calls = []
 
     def init_df():
-        instance.df = pd.DataFrame({"Entity Ref": ["R1"], "Document type": ["SO"]})
-        instance.column_headers = ["Entity Ref", "Document type"]
+        load_rows(instance, pd.DataFrame({"Entity Ref": ["R1"], "Document type": ["SO"]}))
         calls.append("init_df")
 
     instance.init_df = init_df
     instance._set_input_flags = lambda: calls.append("set_input_flags")
     instance.login_preservica = lambda: calls.append("login")
-    instance.init_generate_descriptive_metadata = lambda: calls.append("init_metadata")
+    def init_metadata():
+        instance.xml_files = []
+        calls.append("init_metadata")
+
+    instance.init_generate_descriptive_metadata = init_metadata
     instance.get_retentions = lambda: calls.append("get_retentions")
     instance._process_rows = lambda data: calls.append(("process_rows", data))
     instance._remove_continue_token = lambda path: calls.append(("remove_token", path))
@@ -67,19 +80,15 @@ def test_main_builds_data_dict_without_document_type_column() -> None:
     instance = make_instance()
     captured = []
 
-    def init_df():
-        instance.df = pd.DataFrame({"Entity Ref": ["R1"]})
-        instance.column_headers = ["Entity Ref"]
-
-    instance.init_df = init_df
-    instance._set_input_flags = lambda: None
+    instance.init_df = lambda: load_rows(instance, pd.DataFrame({"Entity Ref": ["R1", "R2"], "Title": [None, "New"]}))
     instance.login_preservica = lambda: None
-    instance._process_rows = lambda data: captured.append(data)
+    instance._process_rows = lambda data: captured.append({idx: data[idx].get("Entity Ref") for idx in data})
     instance._remove_continue_token = lambda _: None
 
     instance.main()
 
-    assert captured == [{0: {"Entity Ref": "R1"}}]
+    assert captured == [{0: "R1", 1: "R2"}]
+    assert instance.noop_rows == {0}
 
 
 def test_main_reraises_value_error() -> None:
@@ -96,3 +105,221 @@ def test_main_reraises_value_error() -> None:
         pass
     else:
         raise AssertionError("Expected ValueError to be re-raised from main")
+
+
+def test_shard_rows_partitions_by_reference() -> None:
+    instance = make_instance()
+    data_dict = {i: {"Entity Ref": f"R{i % 7}"} for i in range(50)}
+
+    shards = []
+    for i in range(3):
+        instance.shard = (i, 3)
+        shards.append(instance._shard_rows(data_dict))
+
+    assert sorted(k for shard in shards for k in shard) == list(range(50))
+    for shard in shards:
+        for other in shards:
+            if shard is not other:
+                assert not {r["Entity Ref"] for r in shard.values()} & {r["Entity Ref"] for r in other.values()}
+    instance.shard = (1, 3)
+    assert instance._token_file() == "input.csv.shard1of3"
+
+
+def test_process_shards_merges_shard_summaries(monkeypatch) -> None:
+    from concurrent.futures import ThreadPoolExecutor
+    from preservica_modify import pres_modify
+
+    instance = make_instance()
+    instance.processes = 3
+    instance.credentials_file = "credentials.properties"
+    instance._shard_kwargs = lambda: {"input_file": "input.csv"}
+    calls = []
+
+    def fake_run_shard(init_kwargs, shard, shards, log_config):
+        calls.append((init_kwargs["input_file"], shard, shards))
+        return {"rows processed": shard + 1, "entities not found": 1}
+
+    monkeypatch.setattr(pres_modify, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pres_modify, "_run_shard", fake_run_shard)
+
+    instance.main()
+
+    assert sorted(calls) == [("input.csv", 0, 3), ("input.csv", 1, 3), ("input.csv", 2, 3)]
+    assert instance.summary == {"rows processed": 6, "entities not found": 3}
+
+
+def test_shards_log_with_the_parents_level_format_and_file(tmp_path, monkeypatch) -> None:
+    import logging
+    from preservica_modify import pres_modify
+
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    handler = logging.FileHandler(tmp_path / "run.log")
+    handler.setFormatter(logging.Formatter("%(levelname)-8s [%(name)s] %(message)s"))
+    root.addHandler(handler)
+    monkeypatch.setattr(root, "level", logging.DEBUG)
+    config = pres_modify._log_config()
+    root.removeHandler(handler)
+    handler.close()
+
+    assert config == {"level": logging.DEBUG, "format": "%(levelname)-8s [%(name)s] %(message)s",
+                      "filename": str(tmp_path / "run.log"), "filemode": "a"}
+
+
+def make_stream_instance(path, chunk_size: int) -> PreservicaMassMod:
+    instance = make_instance()
+    instance.input_file = str(path)
+    instance.chunk_size = chunk_size
+    instance.column_sensitivity = False
+    instance.disable_continue = False
+    instance.parse_config(options_file=str(path.parent / "defaults.properties"))
+    instance._set_input_flags = lambda: None
+    instance.login_preservica = lambda: None
+    return instance
+
+
+def test_main_streams_chunks_and_resumes_from_continue_token(tmp_path) -> None:
+    path = tmp_path / "input.csv"
+    pd.DataFrame({"Entity Ref": [f"R{i}" for i in range(7)]}).to_csv(path, index=False)
+    (tmp_path / "input.csv_continue.txt").write_text("3")
+    instance = make_stream_instance(path, 2)
+    processed = []
+
+    def process_rows(data_dict):
+        keys, start_pos = instance._process_continue_token(data_dict)
+        processed.extend(data_dict[idx].get("Entity Ref") for idx in keys[start_pos:])
+
+    instance._process_rows = process_rows
+
+    instance.main()
+
+    assert processed == ["R3", "R4", "R5", "R6"]
+    assert not (tmp_path / "input.csv_continue.txt").exists()
+    assert instance.rows is None
+
+
+def test_main_resumes_mid_chunk_and_reads_the_token_once(tmp_path) -> None:
+    path = tmp_path / "input.csv"
+    pd.DataFrame({"Entity Ref": [f"R{i}" for i in range(8)]}).to_csv(path, index=False)
+    (tmp_path / "input.csv_continue.txt").write_text("4")
+    instance = make_stream_instance(path, 3)
+    load_continue_token = instance._load_continue_token
+    loads = []
+    instance._load_continue_token = lambda token_file: loads.append(token_file) or load_continue_token(token_file)
+    processed = []
+
+    def process_rows(data_dict):
+        # Drop the token row itself, as when it belongs to another shard.
+        data_dict = {idx: row for idx, row in data_dict.items() if idx != 4}
+        keys, start_pos = instance._process_continue_token(data_dict)
+        processed.extend(data_dict[idx].get("Entity Ref") for idx in keys[start_pos:])
+
+    instance._process_rows = process_rows
+
+    instance.main()
+
+    assert processed == ["R5", "R6", "R7"]
+    assert len(loads) == 1
+    assert not hasattr(instance, "stream_offset")
+
+
+def test_iter_chunks_keeps_pax_rows_together_in_upload_mode(tmp_path) -> None:
+    path = tmp_path / "input.jsonl"
+    pd.DataFrame({"Entity Ref": ["F"] * 5, "PAX Path": ["a", "b", "b", "b", "c"]}).to_json(path, orient="records", lines=True)
+    instance = make_stream_instance(path, 2)
+    instance.upload_flag = True
+
+    chunks = [chunk["PAX Path"].tolist() for chunk in instance._iter_chunks()]
+
+    assert chunks == [["a"], ["b", "b", "b"], ["c"]]
+
+
+def test_init_df_reads_only_needed_columns(tmp_path) -> None:
+    df = pd.DataFrame({"Entity Ref": ["R1", "R2"], "Unused": ["x", "y"], "Title": ["T1", None],
+                       "Identifier:local": [1, None], "Other Date": ["2020-01-01", None]})
+    for name, write in (("input.csv", lambda p: df.to_csv(p, index=False)), ("input.xlsx", lambda p: df.to_excel(p, index=False))):
+        path = tmp_path / name
+        write(path)
+        instance = make_stream_instance(path, None)
+
+        instance.init_df()
+
+        assert instance.column_headers == ["Entity Ref", "Title", "Identifier:local"]
+        assert instance.rows[1].get("Title") is None
+        assert instance.rows[0].get("Identifier:local") == 1.0
+        expected = pd.read_excel(path) if name.endswith("xlsx") else pd.read_csv(path)
+        assert instance.df is None
+        assert instance.rows.columns == RowStore(expected[instance.column_headers]).columns
+
+
+def test_init_df_reads_parquet_and_feather_columns(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"Entity Ref": ["R1", "R2"], "Unused": ["x", "y"], "Title": ["T1", None],
+                       "Modified Date": pd.to_datetime(["2020-01-01", None])})
+    for name, write in (("input.parquet", df.to_parquet), ("input.feather", df.to_feather)):
+        path = tmp_path / name
+        write(path)
+        instance = make_stream_instance(path, None)
+
+        instance.init_df()
+
+        assert instance.column_headers == ["Entity Ref", "Title"]
+        assert instance.rows[0].get("Title") == "T1"
+        assert instance.rows[1].get("Title") is None
+
+
+def test_init_df_reuses_cached_frame_until_input_changes(tmp_path, monkeypatch) -> None:
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "input.csv"
+    pd.DataFrame({"Entity Ref": ["R1", "R2"], "Title": ["T1", None], "Delete": ["yes", None],
+                  "Identifier:local": [1, None], "Modified Date": ["2020-01-01", None]}).to_csv(path, index=False)
+    instance = make_stream_instance(path, None)
+    instance.cache_input = True
+    instance.init_df()
+    loaded = {idx: [row.get(header) for header in instance.column_headers] for idx, row in instance.rows.items()}
+    assert (tmp_path / "input.csv.cache.parquet").exists()
+
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: read_csv(*args, **kwargs) if kwargs.get("nrows") == 0 else pytest.fail("input re-read"))
+    instance.init_df()
+    assert {idx: [row.get(header) for header in instance.column_headers] for idx, row in instance.rows.items()} == loaded
+
+    monkeypatch.setattr(pd, "read_csv", read_csv)
+    path.write_text(path.read_text().replace("T1", "T9"))
+    instance.init_df()
+    assert instance.rows[0].get("Title") == "T9"
+
+
+def test_rows_loaded_through_init_df_are_processed_from_the_row_store(tmp_path) -> None:
+    path = tmp_path / "input.csv"
+    pd.DataFrame({"Entity Ref": ["R1"], "Title": ["New title"], "Security": ["closed"]}).to_csv(path, index=False)
+    instance = make_stream_instance(path, None)
+    instance.dummy_flag = False
+    instance.delete_flag = False
+    instance.descendants_flag = None
+    instance.init_df()
+    PreservicaMassMod._set_input_flags(instance)
+
+    class Entity:
+        reference = "R1"
+        entity_type = None
+        title = "Old title"
+        description = None
+        security_tag = "open"
+
+    class EntityAPI:
+        def __init__(self):
+            self.calls = []
+
+        def save(self, ent):
+            self.calls.append(("save", ent.title))
+
+        def security_tag_async(self, ent, security):
+            self.calls.append(("security", security))
+
+    instance.entity = EntityAPI()
+
+    assert instance.df is None
+    assert instance.xip_lookup(0) == ("New title", None, "closed")
+    instance._process_row_ent(Entity(), 0)
+    assert instance.entity.calls == [("security", "closed"), ("save", "New title")]
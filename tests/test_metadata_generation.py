@@ -125,3 +125,26 @@ def test_generate_descriptive_metadata_skips_when_local_info_missing(tmp_path: P
     result = instance.generate_descriptive_metadata(0, xml_files)
 
     assert result == []
+
+
+def test_generate_descriptive_metadata_uses_compiled_template(tmp_path: Path, monkeypatch) -> None:
+    write_xml(tmp_path / "dc.xml")
+    df = pd.DataFrame({"record:title": ["First", "Second"], "record:description": ["One", None]})
+    instance = make_instance(df, "flat")
+    instance.metadata_dir = str(tmp_path)
+    instance.column_headers = list(df.columns)
+
+    xml_files = instance.init_generate_descriptive_metadata()
+    assert [d["Position"] for d in xml_files[0]["data"]] == [(0,), (1,)]
+
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("template should not be parsed per row")
+
+    monkeypatch.setattr(etree, "parse", fail_parse)
+    first = instance.generate_descriptive_metadata(0, xml_files)[0]["urn:test"]
+    second = instance.generate_descriptive_metadata(1, xml_files)[0]["urn:test"]
+
+    assert first.find("./{urn:test}title").text == "First"
+    assert second.find("./{urn:test}title").text == "Second"
+    assert second.find("./{urn:test}description").text is None
+    assert xml_files[0]["template"].find("./{urn:test}title").text is None
@@ -1,5 +1,6 @@
 from preservica_modify.pres_modify import EntityType, PreservicaMassMod
 from lxml import etree
+from pyPreservica.common import HTTPException, ReferenceNotFoundException
 
 
 class DummyEntity:
@@ -17,13 +18,19 @@ class DummyEntityAPI:
     def asset(self, ref: str):
         self.asset_calls.append(ref)
         if self.fail_asset:
-            raise RuntimeError("asset lookup failed")
+            raise ReferenceNotFoundException(ref, 404, f"https://host/api/entity/information-objects/{ref}", "asset")
         return f"asset:{ref}"
 
     def folder(self, ref: str):
         self.folder_calls.append(ref)
         return f"folder:{ref}"
 
+    def identifiers_for_entity(self, ent):
+        return {("code", "OLD")}
+
+    def metadata_for_entity(self, ent, ns):
+        return "<root/>" if ns == "urn:valid" else None
+
 
 def make_instance() -> PreservicaMassMod:
     instance = PreservicaMassMod.__new__(PreservicaMassMod)
@@ -45,6 +52,63 @@ def test_process_fetch_ent_uses_doc_type_and_fallback() -> None:
     assert fallback_ent == "folder:ref-fallback"
 
 
+def test_process_fetch_ent_remembers_types_between_runs(tmp_path) -> None:
+    instance = make_instance()
+    instance.input_file = str(tmp_path / "input.csv")
+    instance.entity.fail_asset = True
+
+    assert instance._process_fetch_ent("ref-1", None) == "folder:ref-1"
+    assert instance._process_fetch_ent("ref-2", None) == "folder:ref-2"
+    # Folders are now the most common type, so are tried first.
+    assert instance.entity.asset_calls == ["ref-1"]
+    instance._save_entity_types()
+
+    rerun = make_instance()
+    rerun.input_file = instance.input_file
+    assert rerun._process_fetch_ent("ref-1", None) == "folder:ref-1"
+    assert rerun.entity.asset_calls == []
+    assert rerun.entity.folder_calls == ["ref-1"]
+
+
+def test_shards_save_their_own_types_and_are_merged(tmp_path) -> None:
+    input_file = str(tmp_path / "input.csv")
+    for shard, (ref, fail_asset) in enumerate([("ref-a", False), ("ref-f", True)]):
+        instance = make_instance()
+        instance.input_file = input_file
+        instance.shard = (shard, 2)
+        instance.entity.fail_asset = fail_asset
+        instance._process_fetch_ent(ref, None)
+        instance._save_entity_types()
+    assert not (tmp_path / "input.csv_types.json").exists()
+
+    parent = make_instance()
+    parent.input_file = input_file
+    parent._merge_shard_types()
+
+    assert parent._load_entity_types() == {"ref-a": "IO", "ref-f": "SO"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["input.csv_types.json"]
+
+
+def test_process_fetch_ent_does_not_probe_the_other_type_on_server_errors() -> None:
+    instance = make_instance()
+
+    def asset(ref):
+        instance.entity.asset_calls.append(ref)
+        raise HTTPException(ref, 503, "url", "asset", "unavailable")
+
+    instance.entity.asset = asset
+
+    try:
+        instance._process_fetch_ent("ref-1", None)
+    except HTTPException:
+        pass
+    else:
+        raise AssertionError("Expected the server error to be raised")
+    assert instance.entity.asset_calls == ["ref-1"]
+    assert instance.entity.folder_calls == []
+    assert instance._entity_types() == {}
+
+
 def test_process_fetch_ent_returns_none_on_invalid_doc_type() -> None:
     instance = make_instance()
 
@@ -97,8 +161,9 @@ def test_process_row_ent_skips_invalid_xml_and_updates_valid_tree() -> None:
     instance.security_flag = False
     instance.IDENTIFIER_DEFAULT = "code"
     instance.metadata_flag = "exact"
-    instance.xml_files = []
+    instance.xml_files = [{"local_ns": "urn:valid"}]
     instance.retention_flag = False
+    instance.upload_flag = False
     instance.xnames = []
 
     valid_tree = etree.ElementTree(etree.Element("root"))
@@ -113,18 +178,20 @@ def test_process_row_ent_skips_invalid_xml_and_updates_valid_tree() -> None:
     descendants_calls = []
 
     instance.ident_lookup = lambda *args, **kwargs: {"code": "A1"}
-    instance.ident_update = lambda ent, ident: ident_calls.append((ent.reference, ident))
-    instance.xml_update = lambda ent, ns, xml_new: xml_calls.append((ent.reference, ns, xml_new))
+    instance.ident_update = lambda ent, ident, xip_idents=None: ident_calls.append((ent.reference, ident, xip_idents))
+    instance.xml_update = lambda ent, ns, xml_new, xnames=None, metadata=None: xml_calls.append((ent.reference, ns, xml_new, xnames, metadata))
     instance.move_update = lambda idx, ent: move_calls.append((idx, ent.reference))
     instance._process_descendants = lambda idx, ent: descendants_calls.append((idx, ent.reference))
 
     ent = DummyEntity("ref-row", EntityType.ASSET)
     instance._process_row_ent(ent, 5, {})
 
-    assert ident_calls == [("ref-row", {"code": "A1"})]
+    assert ident_calls == [("ref-row", {"code": "A1"}, {("code", "OLD")})]
     assert len(xml_calls) == 1
     assert xml_calls[0][1] == "urn:valid"
     assert xml_calls[0][2] is valid_tree
+    assert xml_calls[0][3] == ["{urn:valid}a"]
+    assert xml_calls[0][4] == {"urn:valid": "<root/>"}
     assert move_calls == [(5, "ref-row")]
     assert descendants_calls == [(5, "ref-row")]
-    assert instance.xnames == ["{urn:invalid}b"]
+    assert instance.xnames == []
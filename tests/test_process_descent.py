@@ -17,14 +17,29 @@ class DescendantRef:
         self.entity_type = entity_type
 
 
+class PagedSet:
+    def __init__(self, results, next_page=None):
+        self.results = results
+        self.has_more = next_page is not None
+        self.next_page = next_page
+
+
 class DummyEntityAPI:
-    def __init__(self, descendants):
+    def __init__(self, descendants, page_size=2):
         self._descendants = descendants
+        self._page_size = page_size
+        self.children_calls = []
+        self.entity_calls = []
 
-    def all_descendants(self, _ent):
-        return self._descendants
+    def children(self, folder, maximum=100, next_page=None):
+        self.children_calls.append((folder, next_page))
+        children = self._descendants.get(folder, []) if isinstance(self._descendants, dict) else (self._descendants if folder == "parent-1" else [])
+        start = int(next_page or 0)
+        end = start + self._page_size
+        return PagedSet(children[start:end], str(end) if end < len(children) else None)
 
     def entity(self, entity_type, reference):
+        self.entity_calls.append(reference)
         return DummyEntity(reference=reference, entity_type=entity_type)
 
 
@@ -54,10 +69,10 @@ def test_process_descent_uses_only_string_xnames_and_xml_trees() -> None:
         },
     ]
 
-    calls: list[tuple[str, etree._ElementTree]] = []
+    calls: list[tuple[str, etree._ElementTree, list]] = []
 
-    def fake_xml_update(entity, ns, xml_new):
-        calls.append((ns, xml_new))
+    def fake_xml_update(entity, ns, xml_new, xnames=None, xml_bytes=None):
+        calls.append((ns, xml_new, xnames))
 
     instance.xml_update = fake_xml_update
     instance.ident_update = lambda *args, **kwargs: None
@@ -68,10 +83,11 @@ def test_process_descent_uses_only_string_xnames_and_xml_trees() -> None:
 
     instance._process_descent(0, DummyEntity(), None)
 
-    assert instance.xnames == ["{urn:skip}b"]
+    assert instance.xnames == []
     assert len(calls) == 1
     assert calls[0][0] == "urn:test"
     assert calls[0][1] is good_tree
+    assert calls[0][2] == ["{urn:test}a"]
 
 
 def test_process_descent_raises_when_descendants_flag_missing() -> None:
@@ -148,7 +164,8 @@ def test_process_descendants_routes_assets_and_folders() -> None:
     instance.entity = DummyEntityAPI(descendants)
 
     calls = []
-    instance._process_descent = lambda idx, ent, ent_type: calls.append((idx, ent.reference, ent_type))
+    instance._descendant_payload = lambda idx: {}
+    instance._process_descent = lambda idx, ent, ent_type, payload=None: calls.append((idx, ent.reference, ent_type))
 
     parent = DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER)
     instance._process_descendants(10, parent)
@@ -165,9 +182,167 @@ def test_process_descendants_ignores_non_folder_parent() -> None:
     instance.entity = DummyEntityAPI([DescendantRef("asset-1", EntityType.ASSET)])
 
     calls = []
-    instance._process_descent = lambda idx, ent, ent_type: calls.append((idx, ent.reference, ent_type))
+    instance._descendant_payload = lambda idx: {}
+    instance._process_descent = lambda idx, ent, ent_type, payload=None: calls.append((idx, ent.reference, ent_type))
 
     parent_asset = DummyEntity(reference="parent-asset", entity_type=EntityType.ASSET)
     instance._process_descendants(2, parent_asset)
 
     assert calls == []
+
+
+def test_process_descendants_uses_listing_and_skips_excluded_types() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-assets", "include-identifiers"}
+    tree = {
+        "parent-1": [DescendantRef(f"asset-{i}", EntityType.ASSET) for i in range(3)] + [DescendantRef("folder-1", EntityType.FOLDER)],
+        "folder-1": [DescendantRef("asset-deep", EntityType.ASSET), DescendantRef("folder-2", EntityType.FOLDER)],
+    }
+    instance.entity = DummyEntityAPI(tree)
+
+    calls = []
+    instance._descendant_payload = lambda idx: {}
+    instance._process_descent = lambda idx, ent, ent_type, payload=None: calls.append((ent.reference, ent_type))
+
+    instance._process_descendants(0, DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER))
+
+    assert sorted(calls) == sorted([(f"asset-{i}", EntityType.ASSET) for i in range(3)] + [("asset-deep", EntityType.ASSET)])
+    assert instance.entity.entity_calls == []
+    assert instance.entity.children_calls == [("parent-1", None), ("parent-1", "2"), ("folder-1", None), ("folder-2", None)]
+
+
+def test_process_descendants_fetches_full_entity_for_title_updates() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-folders", "include-description"}
+    instance.entity = DummyEntityAPI([DescendantRef("asset-1", EntityType.ASSET), DescendantRef("folder-1", EntityType.FOLDER)])
+
+    calls = []
+    instance._descendant_payload = lambda idx: {}
+    instance._process_descent = lambda idx, ent, ent_type, payload=None: calls.append(ent.reference)
+
+    instance._process_descendants(0, DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER))
+
+    assert calls == ["folder-1"]
+    assert instance.entity.entity_calls == ["folder-1"]
+
+
+def test_process_descendants_computes_row_payload_once() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-assets", "include-xml", "include-identifiers"}
+    instance.entity = DummyEntityAPI([DescendantRef(f"asset-{i}", EntityType.ASSET) for i in range(5)])
+    generated = []
+
+    def fake_generate(idx, files):
+        generated.append(idx)
+        return [{"urn:test": etree.ElementTree(etree.Element("{urn:test}root")), "xnames": ["{urn:test}a"]}]
+
+    instance.generate_descriptive_metadata = fake_generate
+    lookups = []
+    instance.ident_lookup = lambda idx, default: lookups.append(idx) or {"code": "ID-1"}
+    xml_calls = []
+    instance.xml_update = lambda ent, ns, xml_new, xnames=None, xml_bytes=None: xml_calls.append((ent.reference, ns, xml_bytes))
+    ident_calls = []
+    instance.ident_update = lambda ent, ident: ident_calls.append((ent.reference, ident))
+
+    instance._process_descendants(3, DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER))
+
+    assert generated == [3]
+    assert lookups == [3]
+    assert len(xml_calls) == 5 and all(c[2] == b'<ns0:root xmlns:ns0="urn:test"/>' for c in xml_calls)
+    assert sorted(c[0] for c in ident_calls) == [f"asset-{i}" for i in range(5)]
+
+
+def test_process_descent_applies_only_selected_xip_fields() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-security"}
+    instance.metadata_flag = None
+    instance.xip_lookup = lambda idx: ("Title", "Description", "closed")
+    xip_calls = []
+    instance.xip_update = lambda ent, title=None, description=None, security=None: xip_calls.append((title, description, security))
+
+    instance._process_descent(0, DummyEntity(reference="child-1", entity_type=EntityType.FOLDER), EntityType.FOLDER)
+
+    assert xip_calls == [(None, None, "closed")]
+
+
+def test_process_descendants_updates_xml_against_full_entity() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-assets", "include-xml"}
+    instance.blank_override = False
+    instance.upload_flag = False
+    instance.dummy_flag = False
+
+    class ListedEntity(DescendantRef):
+        metadata = None
+
+    class MetadataEntityAPI(DummyEntityAPI):
+        def __init__(self, descendants):
+            super().__init__(descendants)
+            self.updated = []
+
+        def entity(self, entity_type, reference):
+            ent = super().entity(entity_type, reference)
+            ent.metadata = {"https://host/metadata/1": "urn:test"}
+            return ent
+
+        def metadata_for_entity(self, ent, ns):
+            return '<root xmlns="urn:test"><a>old</a></root>'
+
+        def update_metadata(self, ent, ns, xml_text):
+            # As pyPreservica, which looks the fragment up in the entity's metadata map.
+            assert ns in ent.metadata.values()
+            self.updated.append((ent.reference, xml_text))
+
+    instance.entity = MetadataEntityAPI([ListedEntity("asset-1", EntityType.ASSET)])
+    instance._descendant_payload = lambda idx: {"xml": [("urn:test", etree.ElementTree(etree.fromstring('<root xmlns="urn:test"><a>new</a></root>')), [], None)],
+                                                "identifiers": None, "xip": None, "retention": None}
+
+    instance._process_descendants(0, DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER))
+
+    assert instance.entity.entity_calls == ["asset-1"]
+    assert len(instance.entity.updated) == 1 and b"new" in instance.entity.updated[0][1].encode()
+
+
+def test_descendant_listings_do_not_count_towards_row_types(tmp_path) -> None:
+    instance = build_instance()
+    instance.input_file = str(tmp_path / "input.csv")
+    instance.DESCENDANT_PAGE_SIZE = 100
+    instance.entity = DummyEntityAPI([DescendantRef(f"asset-{i}", EntityType.ASSET) for i in range(5)])
+    instance._remember_type("row-folder", "SO")
+
+    list(instance._iter_descendants(DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER)))
+    instance._save_entity_types()
+
+    assert instance._likely_type() == "SO"
+    assert instance._entity_types()["asset-3"] == "IO"
+    assert instance._read_types(instance._types_file()) == {"row-folder": "SO"}
+
+
+def test_process_descendants_compares_security_against_full_entity() -> None:
+    instance = build_instance()
+    instance.descendants_flag = {"include-assets", "include-security"}
+    instance.metadata_flag = None
+    instance.dummy_flag = False
+
+    class ListedEntity(DescendantRef):
+        security_tag = None
+
+    security_calls = []
+
+    class SecurityEntityAPI(DummyEntityAPI):
+        def entity(self, entity_type, reference):
+            ent = super().entity(entity_type, reference)
+            ent.security_tag = "closed" if reference == "asset-1" else "open"
+            return ent
+
+        def security_tag_async(self, ent, security):
+            security_calls.append((ent.reference, security))
+
+    instance.entity = SecurityEntityAPI([ListedEntity("asset-1", EntityType.ASSET), ListedEntity("asset-2", EntityType.ASSET)])
+    instance._descendant_payload = lambda idx: {"xml": [], "identifiers": None, "xip": (None, None, "closed"), "retention": None}
+
+    instance._process_descendants(0, DummyEntity(reference="parent-1", entity_type=EntityType.FOLDER))
+
+    assert instance.entity.entity_calls == ["asset-1", "asset-2"]
+    assert security_calls == [("asset-2", "closed")]
+    assert instance.summary["security unchanged"] == 1
@@ -96,3 +96,125 @@ def test_process_rows_passes_none_doc_type_to_fetch_when_missing() -> None:
     instance._process_rows(data_dict)
 
     assert captured == [("R1", None)]
+
+
+def test_process_rows_concurrent_matches_serial_results() -> None:
+    data_dict = {i: {"Entity Ref": f"R{i % 5}", "Document type": "IO"} for i in range(40)}
+
+    def run(workers: int) -> list:
+        instance = make_instance()
+        instance.workers = workers
+        instance._process_continue_token = lambda d: (list(d.keys()), 0)
+        instance._process_fetch_ent = lambda ref, doc_type: DummyEntity(ref, EntityType.ASSET)
+        calls = []
+        instance._process_row_ent = lambda ent, idx, row: calls.append((idx, ent.reference))
+        instance._process_rows(data_dict)
+        return calls
+
+    serial = run(1)
+    concurrent = run(4)
+
+    assert sorted(concurrent) == sorted(serial)
+    for ref in {f"R{i}" for i in range(5)}:
+        assert [c for c in concurrent if c[1] == ref] == [c for c in serial if c[1] == ref]
+
+
+def test_process_rows_concurrent_reraises_row_error() -> None:
+    instance = make_instance()
+    instance.workers = 3
+    data_dict = {i: {"Entity Ref": f"R{i}", "Document type": "IO"} for i in range(6)}
+    instance._process_continue_token = lambda d: (list(d.keys()), 0)
+    instance._process_fetch_ent = lambda ref, doc_type: DummyEntity(ref, EntityType.ASSET)
+
+    def fake_row(ent, idx, row):
+        if idx == 2:
+            raise RuntimeError("row failed")
+
+    instance._process_row_ent = fake_row
+
+    try:
+        instance._process_rows(data_dict)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Expected RuntimeError from failing row to be re-raised")
+
+
+def test_process_rows_pipelined_writes_with_prefetched_state() -> None:
+    instance = make_instance()
+    instance.pipeline = True
+    instance.workers = 2
+    data_dict = {i: {"Entity Ref": f"R{i % 3}", "Document type": "IO"} for i in range(9)}
+    instance._process_continue_token = lambda d: (list(d.keys()), 0)
+    instance._process_fetch_ent = lambda ref, doc_type: DummyEntity(ref, EntityType.ASSET)
+    instance._prefetch_row = lambda idx, ent: {"identifiers": {("code", f"old-{idx}")}, "metadata": {}}
+    instance._compute_row = lambda idx, ent, prefetched: {"idx": idx}
+    writes = []
+    instance._write_row = lambda idx, ent, prefetched, payload: writes.append((idx, ent.reference, prefetched["identifiers"], payload["idx"]))
+
+    instance._process_rows(data_dict)
+
+    assert sorted(w[0] for w in writes) == list(range(9))
+    assert all(w[2] == {("code", f"old-{w[0]}")} and w[3] == w[0] for w in writes)
+    for ref in ("R0", "R1", "R2"):
+        assert [w[0] for w in writes if w[1] == ref] == sorted(w[0] for w in writes if w[1] == ref)
+    assert instance.summary["rows processed"] == 9
+
+
+def test_process_rows_pipelined_reraises_stage_error() -> None:
+    instance = make_instance()
+    instance.pipeline = True
+    instance.workers = 2
+    data_dict = {i: {"Entity Ref": f"R{i}", "Document type": "IO"} for i in range(20)}
+    instance._process_continue_token = lambda d: (list(d.keys()), 0)
+    instance._process_fetch_ent = lambda ref, doc_type: DummyEntity(ref, EntityType.ASSET)
+    instance._prefetch_row = lambda idx, ent: {"identifiers": None, "metadata": {}}
+
+    def fake_compute(idx, ent, prefetched):
+        if idx == 3:
+            raise RuntimeError("compute failed")
+        return {}
+
+    instance._compute_row = fake_compute
+    instance._write_row = lambda idx, ent, prefetched, payload: None
+
+    try:
+        instance._process_rows(data_dict)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Expected RuntimeError from failing stage to be re-raised")
+
+
+def test_rows_with_nothing_to_update_are_skipped_before_fetching() -> None:
+    import pandas as pd
+    from preservica_modify.common import RowStore
+
+    instance = make_instance()
+    instance.parse_config(options_file="missing.properties")
+    instance.upload_flag = False
+    instance.blank_override = False
+    instance.delete_flag = False
+    instance.metadata_flag = None
+    instance.df = pd.DataFrame({
+        "Entity Ref": ["R0", "R1", "R2", "R3"],
+        "Title": ["New", None, "", None],
+        "Identifier": [None, None, "nan", "ID-3"],
+        "Retention Policy": [None, None, None, None],
+    })
+    instance.rows = RowStore(instance.df)
+    instance.column_headers = list(instance.df.columns)
+    instance._set_input_flags()
+    fetched = []
+    instance._process_fetch_ent = lambda ref, doc_type: fetched.append(ref)
+
+    instance._mark_noop_rows()
+    instance._process_rows(instance.rows)
+
+    assert fetched == ["R0", "R3"]
+    assert instance.summary["rows skipped (nothing to update)"] == 2
+
+    # With blank_override, R0 and R3 still clear their blank identifier and retention cells, but R1 and R2 are blank in every column.
+    instance.blank_override = True
+    instance._mark_noop_rows()
+    assert instance.noop_rows == {1, 2}
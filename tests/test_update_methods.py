@@ -186,6 +186,80 @@ def test_retention_update_replaces_existing_assignments() -> None:
     assert len(instance.retention.added) == 1
 
 
+def test_retention_update_only_changes_what_differs() -> None:
+    instance = make_instance()
+    keep, stale = DummyAssignment("new-ref"), DummyAssignment("old-ref")
+    instance.policy_dict = [{"Name": "Keep7", "Reference": "new-ref"}]
+
+    instance.retention = DummyRetentionAPI([keep, stale])
+    instance.retention_update(DummyEntity("ref-3", EntityType.ASSET), "Keep7")
+    assert instance.retention.removed == [stale]
+    assert instance.retention.added == []
+
+    instance.retention = DummyRetentionAPI([keep])
+    instance.retention_update(DummyEntity("ref-3", EntityType.ASSET), "Keep7")
+    assert instance.retention.removed == []
+    assert instance.retention.added == []
+    assert instance.retention.policy_calls == []
+    assert instance.summary["retention unchanged"] == 1
+
+
+def test_prepare_retentions_rejects_unknown_and_ambiguous_names_and_loads_policies_once() -> None:
+    from preservica_modify.common import RowStore
+
+    instance = make_instance()
+    instance.RETENTION_FIELD = "Retention Policy"
+    instance.input_file = "input.csv"
+    instance.policy_index = PreservicaMassMod._index_policies(
+        [{"Name": "Keep7", "Reference": "ref-7"}, {"Name": "Twice", "Reference": "a"}, {"Name": "Twice", "Reference": "b"}])
+    instance.rows = RowStore(pd.DataFrame({"Retention Policy": ["Keep7", None, "Keep7"]}))
+
+    instance._prepare_retentions()
+    instance.retention_update(DummyEntity("ref-4", EntityType.ASSET), "Keep7")
+    instance.retention_update(DummyEntity("ref-5", EntityType.ASSET), "Keep7")
+
+    assert instance.retention.policy_calls == ["ref-7"]
+    assert len(instance.retention.added) == 2
+
+    # A later chunk naming the same policy reuses the one already retrieved.
+    instance.rows = RowStore(pd.DataFrame({"Retention Policy": ["Keep7"]}))
+    instance._prepare_retentions()
+    assert instance.retention.policy_calls == ["ref-7"]
+
+    for names in (["Keep7", "Missing"], ["Twice"]):
+        instance.rows = RowStore(pd.DataFrame({"Retention Policy": names}))
+        try:
+            instance._prepare_retentions()
+        except LookupError:
+            pass
+        else:
+            raise AssertionError(f"Expected LookupError for retention policies {names}")
+
+
+def test_xip_and_ident_updates_skip_unchanged_values() -> None:
+    instance = make_instance()
+    ent = DummyEntity("ref-same", EntityType.ASSET)
+
+    instance.xip_update(ent, title="old-title", description="old-description", security="old-security")
+    instance.ident_update(ent, {"code": "OLD"})
+
+    assert instance.entity.saved_entities == []
+    assert instance.entity.security_calls == []
+    assert instance.entity.updated_idents == []
+    assert instance.summary == {"title unchanged": 1, "description unchanged": 1, "security unchanged": 1, "identifiers unchanged": 1}
+
+
+def test_xip_update_does_not_save_in_dummy_mode() -> None:
+    instance = make_instance()
+    instance.dummy_flag = True
+    ent = DummyEntity("ref-dummy", EntityType.ASSET)
+
+    instance.xip_update(ent, title="new-title")
+
+    assert ent.title == "old-title"
+    assert instance.entity.saved_entities == []
+
+
 def test_xip_update_updates_fields_and_saves() -> None:
     instance = make_instance()
     ent = DummyEntity("ref-xip", EntityType.ASSET)
@@ -223,7 +297,7 @@ def test_xml_update_adds_metadata_when_missing() -> None:
 def test_xml_update_updates_metadata_when_existing() -> None:
     instance = make_instance()
     ent = DummyEntity("ref-xml2", EntityType.ASSET)
-    xml_new = etree.ElementTree(etree.Element("root"))
+    xml_new = etree.ElementTree(etree.fromstring("<root><a>new</a></root>"))
 
     instance.entity.metadata_existing = "<root><a>old</a></root>"
     instance.xml_update(ent, "urn:test", xml_new)
@@ -232,6 +306,18 @@ def test_xml_update_updates_metadata_when_existing() -> None:
     assert instance.entity.updated_metadata[0][0] == "ref-xml2"
 
 
+def test_xml_update_skips_update_when_merge_changes_nothing() -> None:
+    instance = make_instance()
+    ent = DummyEntity("ref-xml3", EntityType.ASSET)
+    xml_new = etree.ElementTree(etree.fromstring("<root><a>old</a><b/></root>"))
+
+    instance.entity.metadata_existing = '<root  ><a>old</a><b></b></root>'
+    instance.xml_update(ent, "urn:test", xml_new)
+
+    assert instance.entity.updated_metadata == []
+    assert instance.summary["metadata unchanged"] == 1
+
+
 def test_xml_update_upload_flag_forces_add_path() -> None:
     instance = make_instance()
     instance.upload_flag = True
@@ -245,6 +331,33 @@ def test_xml_update_upload_flag_forces_add_path() -> None:
     assert instance.entity.updated_metadata == []
 
 
+def test_hydrate_row_fetches_identifiers_and_metadata_concurrently() -> None:
+    import asyncio
+
+    instance = make_instance()
+    instance.metadata_flag = "exact"
+    instance.xml_files = [{"local_ns": "urn:a"}, {"local_ns": "urn:b"}]
+    in_flight = []
+
+    class AsyncEntityAPI:
+        async def _call(self, value):
+            in_flight.append(value)
+            await asyncio.sleep(0)
+            return value
+
+        def identifiers_for_entity(self, ent):
+            return self._call({("code", "OLD")})
+
+        def metadata_for_entity(self, ent, ns):
+            return self._call(None if ns == "urn:b" else f"<root ns='{ns}'/>")
+
+    instance.entity = AsyncEntityAPI()
+    hydrated = asyncio.run(instance._hydrate_row_async(DummyEntity("ref-h", EntityType.ASSET), True))
+
+    assert hydrated == {"identifiers": {("code", "OLD")}, "metadata": {"urn:a": "<root ns='urn:a'/>", "urn:b": None}}
+    assert len(in_flight) == 3
+
+
 def test_move_update_valid_uuid_calls_move_async() -> None:
     instance = make_instance()
     instance.move_flag = True